@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -37,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'employees.metrics.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -78,8 +80,80 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Connections close at the end of each request. Under ASGI each request
+        # runs on a new thread, so a persistent connection would sit idle until
+        # it aged out; put PgBouncer in front for pooling. The health check
+        # thread keeps its own connection (HEALTH_CONN_MAX_AGE).
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+}
+
+# Request instrumentation and the /metrics endpoint, see employees.metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 1.0))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+# Each worker writes its metrics here for /metrics to sum
+METRICS_DIR = os.getenv('METRICS_DIR') or os.path.join(BASE_DIR, 'metrics')
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+
+# Health probes, see employees.health
+HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', 5))
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', 2))
+HEALTH_CONN_MAX_AGE = int(os.getenv('HEALTH_CONN_MAX_AGE', 60))
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# CACHE_BACKEND selects file (shared by the workers of one host, the default),
+# redis (shared across hosts, needs the redis package) or locmem (per process).
+# The analytics data version lives in the database, so every backend is safe;
+# a shared one lets workers reuse each other's cached responses.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_LOCATIONS = {
+    'locmem': 'employee-analytics',
+    'file': os.path.join(BASE_DIR, 'cache'),
+    'redis': 'redis://localhost:6379/1',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION') or CACHE_LOCATIONS[CACHE_BACKEND],
     }
 }
+if CACHE_BACKEND != 'redis':
+    # The default of 300 would cull cached responses (and the data version) early
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10_000))}
+
+# Analytics responses are cached per data version, see employees.caching
+ANALYTICS_CACHE_ALIAS = 'default'
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Throttle state, see employees.throttling: THROTTLE_BACKEND selects memory (per
+# process), file (an SQLite file shared by the workers of one host, the
+# default) or redis (shared across hosts, needs the redis package).
+THROTTLE_BACKEND = os.getenv('THROTTLE_BACKEND', 'file')
+THROTTLE_LOCATION = os.getenv('THROTTLE_LOCATION') or None
+# Requests to these URL names count as this many requests against the rates
+THROTTLE_COSTS = {
+    'export-employees': 5,
+    'export-attendance': 5,
+    'export-performance-reviews': 5,
+}
+
+# Background export and report jobs, see employees.jobs and the run_jobs command
+JOB_STORAGE_DIR = os.getenv('JOB_STORAGE_DIR') or os.path.join(BASE_DIR, 'job_files')
+JOB_RETENTION_HOURS = int(os.getenv('JOB_RETENTION_HOURS', 24))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -129,14 +203,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'employees.encoders.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'employees.throttling.AnonRateThrottle',
+        'employees.throttling.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
@@ -144,6 +222,12 @@ REST_FRAMEWORK = {
     }
 }
 
+# Opt-in keyset pagination (?pagination=keyset), see employees.pagination
+KEYSET_MAX_PAGE_SIZE = int(os.getenv('KEYSET_MAX_PAGE_SIZE', 1000))
+
+# Rows validated and upserted per transaction by the bulk endpoints, see employees.bulk
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
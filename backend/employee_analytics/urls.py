@@ -5,6 +5,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from employees.metrics_views import metrics
+
 # Schema view for Swagger/OpenAPI documentation
 schema_view = get_schema_view(
     openapi.Info(
@@ -29,4 +31,7 @@ urlpatterns = [
 
     # Health check endpoint
     path('health/', include('employees.health_urls')),
+
+    # Prometheus metrics
+    path('metrics', metrics, name='metrics'),
 ]
@@ -1,22 +1,187 @@
+import json
+from datetime import MAXYEAR, MINYEAR, date
 
 from django.contrib import admin
-from .models import Employee, Attendance, PerformanceReview
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractYear
+from django.utils.functional import cached_property
+
+from .caching import ANALYTICS_CACHE_TIMEOUT, data_version, get_cache
+from .cohorts import ensure_cohorts
+from .models import (
+    Attendance,
+    AttendanceDailyRollup,
+    DepartmentStatsSnapshot,
+    Employee,
+    GenderDistributionSnapshot,
+    HireCohort,
+    PerformanceReview,
+)
+from .search import search_employees
+from .snapshots import ensure_snapshot
+
+# Result sets the planner expects to be larger than this are not counted exactly
+EXACT_COUNT_LIMIT = 10_000
+
+
+def estimated_count(queryset):
+    """Row count of ``queryset``: the planner's estimate when it is large, else an exact count.
+
+    On PostgreSQL the estimate comes from ``EXPLAIN`` and the table
+    statistics, so it costs the same on any table size. Other databases
+    always count exactly.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    return estimate if estimate > EXACT_COUNT_LIMIT else queryset.count()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips ``COUNT(*)`` on large result sets; see :func:`estimated_count`."""
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+def cached_facets(name, compute):
+    """``compute()``'s ``[(value, count)]`` pairs, cached until the data version changes."""
+    key = f'admin:facets:{name}:{data_version()}'
+    return get_cache().get_or_set(key, lambda: list(compute()), ANALYTICS_CACHE_TIMEOUT)
+
+
+class FacetFilter(admin.SimpleListFilter):
+    """Choices labelled with their counts over the whole table, from :func:`cached_facets`.
+
+    Subclasses set ``parameter_name`` (the field filtered on) and implement
+    ``facets()``, ideally from a snapshot or rollup table.
+    """
+
+    def facets(self):
+        raise NotImplementedError
+
+    def lookups(self, request, model_admin):
+        return [(str(value), f'{value} ({count:,})') for value, count in cached_facets(self.parameter_name, self.facets)]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        return queryset.filter(**{self.parameter_name: self.value()})
+
+
+class DepartmentFilter(FacetFilter):
+    title = 'department'
+    parameter_name = 'department'
+
+    def facets(self):
+        ensure_snapshot(DepartmentStatsSnapshot)
+        return DepartmentStatsSnapshot.objects.order_by('department').values_list('department', 'employee_count')
+
+
+class GenderFilter(FacetFilter):
+    title = 'gender'
+    parameter_name = 'gender'
+
+    def facets(self):
+        ensure_snapshot(GenderDistributionSnapshot)
+        return GenderDistributionSnapshot.objects.order_by('gender').values_list('gender', 'count')
+
+
+class PositionFilter(FacetFilter):
+    title = 'position'
+    parameter_name = 'position'
+
+    def facets(self):
+        # An index-only scan of employee_position_idx, once per data version
+        return Employee.objects.values_list('position').annotate(count=Count('id')).order_by('position')
+
+
+class HireYearFilter(FacetFilter):
+    title = 'hire year'
+    parameter_name = 'hire_year'
+
+    def facets(self):
+        ensure_cohorts()
+        return HireCohort.objects.annotate(year=ExtractYear('hire_date')) \
+            .values_list('year').annotate(count=Sum('employees')).order_by('-year')
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            year = int(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters(f'Invalid hire year: {self.value()!r}')
+        if not MINYEAR <= year < MAXYEAR:
+            raise IncorrectLookupParameters(f'Hire year out of range: {year}')
+        # A range rather than __year, so employee_hire_date_idx applies
+        return queryset.filter(hire_date__gte=date(year, 1, 1), hire_date__lt=date(year + 1, 1, 1))
+
+
+class AttendanceStatusFilter(FacetFilter):
+    title = 'status'
+    parameter_name = 'status'
+
+    def facets(self):
+        rows = AttendanceDailyRollup.objects.values_list('status').annotate(count=Sum('record_count')).order_by('status')
+        if rows:
+            return rows
+        # Rollups not built yet
+        return Attendance.objects.values_list('status').annotate(count=Count('id')).order_by('status')
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Change lists that stay fast on tables with millions of rows.
+
+    Counts are estimated (:class:`EstimatedCountPaginator`), the unfiltered
+    total is not counted, and filters use cached counts instead of facets
+    and ``DISTINCT`` queries. Set ``ordering`` to match an index.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(LargeTableAdmin):
     list_display = ('first_name', 'last_name', 'email', 'department', 'position', 'salary', 'hire_date')
-    list_filter = ('department', 'position', 'gender')
-    search_fields = ('first_name', 'last_name', 'email', 'department')
-    date_hierarchy = 'hire_date'
+    list_filter = (DepartmentFilter, PositionFilter, GenderFilter, HireYearFilter)
+    search_fields = ('first_name', 'last_name', 'email', 'department', 'position')
+    search_help_text = 'Names, email, department and position; words match as prefixes.'
+    # employee_created_idx
+    ordering = ('-created_at', '-id')
+
+    def get_search_results(self, request, queryset, search_term):
+        # The API's indexed search, also used by the employee autocomplete widgets
+        return search_employees(queryset, search_term), False
+
 
 @admin.register(Attendance)
-class AttendanceAdmin(admin.ModelAdmin):
+class AttendanceAdmin(LargeTableAdmin):
     list_display = ('employee', 'date', 'status', 'hours_worked', 'late_minutes')
-    list_filter = ('status', 'date')
-    date_hierarchy = 'date'
+    list_filter = (AttendanceStatusFilter, 'date')
+    list_select_related = ('employee',)
+    autocomplete_fields = ('employee',)
+    # attendance_date_idx
+    ordering = ('-date', '-id')
+
 
 @admin.register(PerformanceReview)
-class PerformanceReviewAdmin(admin.ModelAdmin):
-    list_display = ('employee', 'review_date', 'overall_score')
+class PerformanceReviewAdmin(LargeTableAdmin):
+    list_display = ('employee', 'review_date', 'reviewer', 'overall_score')
     list_filter = ('review_date',)
-    date_hierarchy = 'review_date'
+    list_select_related = ('employee', 'reviewer')
+    autocomplete_fields = ('employee', 'reviewer')
+    # review_date_idx
+    ordering = ('-review_date', '-id')
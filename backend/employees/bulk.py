@@ -0,0 +1,233 @@
+
+import json
+import uuid
+from itertools import islice
+from types import GeneratorType
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+from .models import Attendance, Employee
+from .serializers import AttendanceBulkSerializer, EmployeeBulkSerializer
+from .signals import schedule_refresh
+
+# Rows validated and written per transaction
+BULK_CHUNK_SIZE = getattr(settings, 'BULK_CHUNK_SIZE', 1000)
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON lazily, one value per line.
+
+    Lines that are not valid JSON are yielded as :class:`ParseError` so they
+    are reported against their row instead of failing the whole request.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return self._rows(stream, encoding)
+
+    def _rows(self, stream, encoding):
+        if stream is None:
+            return
+        for line in stream:
+            try:
+                line = line.decode(encoding).strip()
+                if not line:
+                    continue
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ParseError(f'Invalid JSON: {exc}')
+
+
+def payload_rows(data):
+    """Rows from a JSON array or an NDJSON stream."""
+    if not isinstance(data, (list, GeneratorType)):
+        raise ValidationError({'non_field_errors': ['Expected a JSON array or an NDJSON stream.']})
+    return iter(data)
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _error_detail(exc):
+    if isinstance(exc, ValidationError):
+        return exc.detail
+    return {'non_field_errors': [str(exc.detail)]}
+
+
+class BulkUpsert:
+    """Validate rows in chunks and upsert them with one statement per chunk.
+
+    Invalid rows are reported by their position in the payload and skipped;
+    the valid rows of each chunk are written in a single transaction. When a
+    key occurs more than once in a chunk, the last occurrence wins.
+    """
+    model = None
+    serializer_class = None
+    unique_fields = []
+
+    def __init__(self, chunk_size=BULK_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.update_fields = [
+            field.name for field in self.model._meta.concrete_fields
+            if not field.primary_key and field.name not in self.unique_fields and field.name != 'created_at'
+        ]
+
+    def key(self, instance):
+        return tuple(getattr(instance, field.attname) for field in map(self.model._meta.get_field, self.unique_fields))
+
+    def validate(self, chunk, offset):
+        """Return ``{index: instance}`` for valid rows and ``[error]`` for the rest."""
+        child = self.serializer_class(many=True).child
+        instances, errors = {}, []
+        for index, row in enumerate(chunk, start=offset):
+            try:
+                if isinstance(row, ParseError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValidationError({'non_field_errors': ['Expected an object.']})
+                instances[index] = self.model(**self.to_model_kwargs(child.run_validation(row)))
+            except (ValidationError, ParseError) as exc:
+                errors.append({'index': index, 'errors': _error_detail(exc)})
+        return instances, errors
+
+    def to_model_kwargs(self, validated_data):
+        return validated_data
+
+    def check(self, instances):
+        """Checks that need the whole chunk; return ``{index: errors}``."""
+        return {}
+
+    def existing(self, instances):
+        """Map the key of every row that already exists to whatever ``after_write`` needs."""
+        raise NotImplementedError
+
+    def after_write(self, instances, existing):
+        pass
+
+    def write_chunk(self, chunk, offset):
+        instances, errors = self.validate(chunk, offset)
+        for index, detail in self.check(instances).items():
+            del instances[index]
+            errors.append({'index': index, 'errors': detail})
+
+        rows = list({self.key(instance): instance for instance in instances.values()}.values())
+        if not rows:
+            return 0, 0, errors
+
+        with transaction.atomic():
+            existing = self.existing(rows)
+            self.model.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=self.unique_fields,
+                update_fields=self.update_fields,
+            )
+            # Bulk writes skip the model signals, so refresh the analytics explicitly
+            self.after_write(rows, existing)
+
+        updated = sum(1 for instance in rows if self.key(instance) in existing)
+        return len(rows) - updated, updated, errors
+
+    def run(self, rows):
+        result = {'created': 0, 'updated': 0, 'errors': []}
+        offset = 0
+        for chunk in chunked(rows, self.chunk_size):
+            created, updated, errors = self.write_chunk(chunk, offset)
+            result['created'] += created
+            result['updated'] += updated
+            result['errors'].extend(sorted(errors, key=lambda error: error['index']))
+            offset += len(chunk)
+        return result
+
+
+class EmployeeBulkUpsert(BulkUpsert):
+    """Upsert employees keyed on ``email``."""
+    model = Employee
+    serializer_class = EmployeeBulkSerializer
+    unique_fields = ['email']
+
+    def existing(self, instances):
+        return {
+            (email,): (department, gender, pk, hire_date)
+            for email, department, gender, pk, hire_date in Employee.objects
+                .filter(email__in=[instance.email for instance in instances])
+                .values_list('email', 'department', 'gender', 'pk', 'hire_date')
+        }
+
+    def after_write(self, instances, existing):
+        departments = {instance.department for instance in instances}
+        genders = {instance.gender for instance in instances}
+        hire_dates = {instance.hire_date for instance in instances}
+        moved = []
+        for instance in instances:
+            previous = existing.get(self.key(instance))
+            if previous:
+                departments.add(previous[0])
+                genders.add(previous[1])
+                hire_dates.add(previous[3])
+                if previous[0] != instance.department:
+                    moved.append(previous[2])
+        # Attendance rolls up under the employee's department, so a move restates their days
+        dates = set(Attendance.objects.filter(employee__in=moved).values_list('date', flat=True)) if moved else ()
+        schedule_refresh(departments, genders, dates, hire_dates)
+
+
+class AttendanceBulkUpsert(BulkUpsert):
+    """Upsert attendance records keyed on ``(employee, date)``."""
+    model = Attendance
+    serializer_class = AttendanceBulkSerializer
+    unique_fields = ['employee', 'date']
+
+    def to_model_kwargs(self, validated_data):
+        validated_data['employee_id'] = validated_data.pop('employee')
+        return validated_data
+
+    def check(self, instances):
+        employee_ids = {instance.employee_id for instance in instances.values()}
+        known = set(Employee.objects.filter(pk__in=employee_ids).values_list('pk', flat=True))
+        return {
+            index: {'employee': [f'Invalid pk "{instance.employee_id}" - object does not exist.']}
+            for index, instance in instances.items()
+            if instance.employee_id not in known
+        }
+
+    def existing(self, instances):
+        keys = {self.key(instance) for instance in instances}
+        candidates = Attendance.objects.filter(
+            employee_id__in={employee_id for employee_id, _ in keys},
+            date__in={date for _, date in keys},
+        ).values_list('employee_id', 'date')
+        return {key: None for key in candidates if key in keys}
+
+    def after_write(self, instances, existing):
+        schedule_refresh(dates={instance.date for instance in instances})
+
+
+def bulk_delete(model, rows, chunk_size=BULK_CHUNK_SIZE):
+    """Delete the rows whose ids are listed, one transaction per chunk."""
+    result = {'deleted': 0, 'errors': []}
+    offset = 0
+    for chunk in chunked(rows, chunk_size):
+        ids = []
+        for index, value in enumerate(chunk, start=offset):
+            try:
+                if isinstance(value, ParseError):
+                    raise value
+                ids.append(uuid.UUID(str(value)))
+            except ParseError as exc:
+                result['errors'].append({'index': index, 'errors': _error_detail(exc)})
+            except ValueError:
+                result['errors'].append({'index': index, 'errors': {'id': [f'"{value}" is not a valid UUID.']}})
+        if ids:
+            with transaction.atomic():
+                _, deleted = model.objects.filter(pk__in=ids).delete()
+            result['deleted'] += deleted.get(model._meta.label, 0)
+        offset += len(chunk)
+    return result
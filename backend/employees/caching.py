@@ -0,0 +1,108 @@
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.http import urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import registry
+from .models import DataVersion
+
+ANALYTICS_CACHE_ALIAS = getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')
+# Entries are keyed by data version and never served stale; the timeout only
+# lets entries for superseded versions age out
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# Response headers worth keeping with a cached entry
+CACHED_HEADERS = ['Last-Modified']
+VERSION_ID = 1
+
+
+def get_cache():
+    return caches[ANALYTICS_CACHE_ALIAS]
+
+
+def data_version():
+    """Current data version, kept in the database so every worker agrees on it."""
+    version = DataVersion.objects.filter(id=VERSION_ID).values_list('version', flat=True).first()
+    if version is None:
+        # Seed from the clock so a recreated row cannot revisit versions still in the cache
+        DataVersion.objects.get_or_create(id=VERSION_ID, defaults={'version': int(time.time() * 1000)})
+        version = DataVersion.objects.filter(id=VERSION_ID).values_list('version', flat=True).first()
+    return version
+
+
+def bump_data_version():
+    """Invalidate every cached analytics response.
+
+    The increment is a single ``UPDATE``, so concurrent bumps from any
+    number of processes each move the version on.
+    """
+    if not DataVersion.objects.filter(id=VERSION_ID).update(version=F('version') + 1):
+        data_version()
+        DataVersion.objects.filter(id=VERSION_ID).update(version=F('version') + 1)
+    return data_version()
+
+
+def _count(result):
+    registry.inc('analytics_cache_requests_total', (('result', result),))
+
+
+def _cache_key(request, version):
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(f'{request.path}?{params}'.encode('utf-8')).hexdigest()
+    return f'analytics:response:{version}:{digest}'
+
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def versioned_cache(method):
+    """Cache a view method's response under the current data version.
+
+    The ETag is derived from the version and the cache key, so a matching
+    ``If-None-Match`` is answered with a 304 before any work is done.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        version = data_version()
+        key = _cache_key(request, version)
+        etag = f'"{key.rsplit(":", 1)[1][:16]}-{version}"'
+
+        if _matches(request.headers.get('If-None-Match'), etag):
+            _count('hit')
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            response['X-Cache'] = 'HIT'
+            return response
+
+        cache = get_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            _count('hit')
+            response = Response(cached['data'])
+            for header, value in cached['headers'].items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+        else:
+            _count('miss')
+            response = method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+            cache.set(key, {'data': response.data, 'headers': headers}, ANALYTICS_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+
+        response['ETag'] = etag
+        return response
+
+    return wrapper
@@ -0,0 +1,256 @@
+
+from collections import Counter, defaultdict
+from datetime import MAXYEAR, MINYEAR, date
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Max, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import CohortDeparture, Employee, HireCohort
+
+# Months per period
+INTERVALS = {'month': 1, 'quarter': 3, 'year': 12}
+# Longest headcount series, and most retention periods, a request may ask for
+MAX_PERIODS = 240
+DEFAULT_HEADCOUNT_PERIODS = 24
+DEFAULT_COHORTS = 12
+MAX_COHORTS = 120
+# Longest tenure, in years, a ?edges= bucket may start at
+MAX_TENURE_YEARS = 100
+
+
+def years_before(day, years):
+    """The same calendar day ``years`` earlier; 29 February maps to the 28th.
+
+    Years beyond what ``date`` can represent are clamped to its range.
+    """
+    year = min(max(day.year - years, MINYEAR), MAXYEAR)
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return day.replace(year=year, day=28)
+
+
+def refresh_hire_cohorts(hire_dates=None):
+    """Recount the employees of ``hire_dates`` (every hire date when None)."""
+    employees = Employee.objects.all()
+    cohorts = HireCohort.objects.all()
+    if hire_dates is not None:
+        hire_dates = set(hire_dates)
+        if not hire_dates:
+            return 0
+        employees = employees.filter(hire_date__in=hire_dates)
+        cohorts = cohorts.filter(hire_date__in=hire_dates)
+
+    refreshed_at = timezone.now()
+    rows = [
+        HireCohort(refreshed_at=refreshed_at, **row)
+        for row in employees.values('hire_date').annotate(employees=Count('id')).order_by()
+    ]
+
+    with transaction.atomic():
+        cohorts.delete()
+        HireCohort.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def record_departures(hire_dates, departed_on=None):
+    """Count deleted employees, given by hire date, as departures on ``departed_on``.
+
+    Call this in the deleting transaction so that a rollback undoes it too.
+    The counts are added in the database, so concurrent deletes cannot
+    overwrite each other's.
+    """
+    departed_on = departed_on or timezone.now().date()
+    counts = Counter(hire_dates)
+    if not counts:
+        return
+    table = connection.ops.quote_name(CohortDeparture._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (hire_date, departed_on, employees) VALUES (%s, %s, %s) '
+            f'ON CONFLICT (hire_date, departed_on) DO UPDATE SET employees = {table}.employees + excluded.employees',
+            [(hire_date, departed_on, count) for hire_date, count in counts.items()],
+        )
+
+
+def last_cohort_refresh():
+    return HireCohort.objects.aggregate(refreshed_at=Max('refreshed_at'))['refreshed_at']
+
+
+def hire_dates_changed_since(timestamp):
+    """Hire dates of employees updated after ``timestamp``."""
+    return set(Employee.objects.filter(updated_at__gt=timestamp).values_list('hire_date', flat=True).distinct())
+
+
+def ensure_cohorts():
+    """Build the hire cohorts if they have never been built."""
+    if last_cohort_refresh() is None:
+        refresh_hire_cohorts()
+
+
+def _parse_date_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Dates must be in YYYY-MM-DD format.'})
+    return parsed
+
+
+def parse_as_of(params):
+    return _parse_date_param(params, 'as_of') or timezone.now().date()
+
+
+def parse_cohort_params(params, key, default_interval, default_periods):
+    """Validate the period length in ``key`` and the ``start`` and ``end`` dates.
+
+    ``start`` defaults to ``default_periods`` periods back from ``end``, which
+    defaults to today.
+    """
+    interval = params.get(key, default_interval)
+    if interval not in INTERVALS:
+        raise ValidationError({key: f"Must be one of: {', '.join(INTERVALS)}."})
+
+    end = _parse_date_param(params, 'end') or timezone.now().date()
+    start = _parse_date_param(params, 'start') or _period_start(_period(end, interval) - default_periods + 1, interval)
+    if start > end:
+        raise ValidationError({'start': 'Start must not be after end.'})
+    return {'interval': interval, 'start': start, 'end': end}
+
+
+def tenure_distribution(ranges, as_of):
+    """Employees on the payroll on ``as_of`` per tenure range (in whole years).
+
+    Summed from the cohort tables with one conditional aggregate each, so the
+    cost depends on the number of distinct hire dates, not on the headcount.
+    """
+    buckets = {}
+    for index, range_info in enumerate(ranges):
+        condition = Q(hire_date__lte=years_before(as_of, range_info['min']))
+        if range_info['max'] is not None:
+            condition &= Q(hire_date__gt=years_before(as_of, range_info['max']))
+        buckets[f'bucket_{index}'] = condition
+
+    current = HireCohort.objects.aggregate(**{
+        name: Sum('employees', filter=condition) for name, condition in buckets.items()
+    })
+    # Employees deleted since then were still on the payroll on as_of
+    departed = CohortDeparture.objects.filter(departed_on__gt=as_of).aggregate(**{
+        name: Sum('employees', filter=condition) for name, condition in buckets.items()
+    })
+    return [
+        {'range': range_info['label'], 'count': (current[f'bucket_{index}'] or 0) + (departed[f'bucket_{index}'] or 0)}
+        for index, range_info in enumerate(ranges)
+    ]
+
+
+# Periods are numbered by months since year 0 divided by the months per period
+def _period(day, interval):
+    return (day.year * 12 + day.month - 1) // INTERVALS[interval]
+
+
+def _period_start(period, interval):
+    month = period * INTERVALS[interval]
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _monthly_cohorts():
+    """Hires per hire month, and departures per (hire month, departure month).
+
+    Both count everyone ever hired, whether still employed or not.
+    """
+    hired = Counter()
+    for row in HireCohort.objects \
+            .annotate(month=Trunc('hire_date', 'month', output_field=DateField())) \
+            .values('month').annotate(employees=Sum('employees')).order_by():
+        hired[row['month']] += row['employees']
+
+    departed = Counter()
+    for row in CohortDeparture.objects \
+            .annotate(
+                hire_month=Trunc('hire_date', 'month', output_field=DateField()),
+                departed_month=Trunc('departed_on', 'month', output_field=DateField()),
+            ) \
+            .values('hire_month', 'departed_month').annotate(employees=Sum('employees')).order_by():
+        hired[row['hire_month']] += row['employees']
+        departed[row['hire_month'], row['departed_month']] += row['employees']
+    return hired, departed
+
+
+def headcount(interval, start, end):
+    """Headcount at the end of every period from ``start`` to ``end`` with its hires and departures.
+
+    Periods end on a month end, so month-level cohorts give exact counts.
+    """
+    first, last = _period(start, interval), _period(end, interval)
+    if last - first + 1 > MAX_PERIODS:
+        raise ValidationError({'start': f'At most {MAX_PERIODS} periods are allowed.'})
+
+    hired, departed = _monthly_cohorts()
+    hires_by_period = defaultdict(int)
+    departures_by_period = defaultdict(int)
+    for month, employees in hired.items():
+        hires_by_period[_period(month, interval)] += employees
+    for (_, departed_month), employees in departed.items():
+        departures_by_period[_period(departed_month, interval)] += employees
+
+    # Hired by the end of a period and not departed by then
+    series = []
+    for period in range(first, last + 1):
+        hired_by = sum(employees for month, employees in hired.items() if _period(month, interval) <= period)
+        left_by = sum(
+            employees for (hire_month, departed_month), employees in departed.items()
+            if _period(hire_month, interval) <= period and _period(departed_month, interval) <= period
+        )
+        series.append({
+            'period': _period_start(period, interval),
+            'headcount': hired_by - left_by,
+            'hires': hires_by_period[period],
+            'departures': departures_by_period[period],
+        })
+    return series
+
+
+def cohort_retention(interval, start, end, as_of=None):
+    """Share of each hire cohort still employed at the end of each later period.
+
+    ``remaining[k]`` counts the cohort's employees not deleted by the end of
+    the ``k``-th period after the one they were hired in, up to ``as_of``.
+    """
+    as_of = as_of or timezone.now().date()
+    first, last, current = _period(start, interval), _period(end, interval), _period(as_of, interval)
+    if last - first + 1 > MAX_COHORTS:
+        raise ValidationError({'start': f'At most {MAX_COHORTS} cohorts are allowed.'})
+
+    hired, departed = _monthly_cohorts()
+    sizes = defaultdict(int)
+    for month, employees in hired.items():
+        sizes[_period(month, interval)] += employees
+    departures = defaultdict(lambda: defaultdict(int))
+    for (hire_month, departed_month), employees in departed.items():
+        departures[_period(hire_month, interval)][_period(departed_month, interval)] += employees
+
+    cohorts = []
+    for cohort in range(first, min(last, current) + 1):
+        size = sizes.get(cohort, 0)
+        if not size:
+            continue
+        remaining = []
+        for period in range(cohort, min(current, cohort + MAX_PERIODS - 1) + 1):
+            left = sum(employees for departed_period, employees in departures[cohort].items() if departed_period <= period)
+            remaining.append(size - left)
+        cohorts.append({
+            'cohort': _period_start(cohort, interval),
+            'hired': size,
+            'remaining': remaining,
+            'retention': [round(count / size, 4) for count in remaining],
+        })
+    return cohorts
@@ -0,0 +1,294 @@
+
+import re
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .caching import data_version
+from .cohorts import years_before
+from .models import Employee
+
+COLUMNSTORE_CHUNK_SIZE = getattr(settings, 'COLUMNSTORE_CHUNK_SIZE', 50_000)
+
+# Dictionary-encoded columns: int32 codes into a sorted list of values
+CATEGORICALS = ('department', 'position', 'gender')
+# Numeric columns as stored; hire_date is kept as a date ordinal
+NUMERICS = ('age', 'salary', 'hire_date', 'performance_score')
+# performance_score has one decimal place and is stored in tenths
+SCALES = {'performance_score': 10}
+
+# Bucketed dimensions and the column they bucket
+RANGE_DIMENSIONS = {'age_range': 'age', 'salary_range': 'salary', 'tenure_range': 'hire_date'}
+DIMENSIONS = CATEGORICALS + tuple(RANGE_DIMENSIONS)
+MAX_GROUP_BY = 3
+# Range dimensions over columns with a wider spread of values than this are
+# bucketed by comparison instead of through a lookup table
+MAX_LOOKUP_TABLE = 10_000_000
+
+MEASURE_FIELDS = ('salary', 'performance_score', 'age')
+AGGREGATES = ('sum', 'avg', 'min', 'max')
+PERCENTILE = re.compile(r'p(\d{1,2})$')
+MAX_MEASURES = 20
+
+
+class EmployeeColumns:
+    """The employee table as NumPy columns, tagged with the data version it was read at."""
+
+    def __init__(self, version, codes, categories, numerics):
+        self.version = version
+        self.codes = codes
+        self.categories = categories
+        self.numerics = numerics
+        self.size = len(numerics['age'])
+        self.extents = {
+            name: (int(column.min()), int(column.max())) for name, column in numerics.items() if len(column)
+        }
+        self.loaded_at = timezone.now()
+
+    @classmethod
+    def load(cls, version):
+        """Read the table in chunks, encoding each categorical value to its code once."""
+        indexes = {name: {} for name in CATEGORICALS}
+        code_chunks = {name: [] for name in CATEGORICALS}
+        numeric_chunks = {name: [] for name in NUMERICS}
+
+        rows = Employee.objects.order_by().values_list(*CATEGORICALS, *NUMERICS) \
+            .iterator(chunk_size=COLUMNSTORE_CHUNK_SIZE)
+        while True:
+            chunk = [row for _, row in zip(range(COLUMNSTORE_CHUNK_SIZE), rows)]
+            if not chunk:
+                break
+            columns = dict(zip(CATEGORICALS + NUMERICS, zip(*chunk)))
+            for name in CATEGORICALS:
+                index = indexes[name]
+                code_chunks[name].append(np.fromiter(
+                    (index.setdefault(value, len(index)) for value in columns[name]), dtype=np.int32, count=len(chunk)
+                ))
+            numeric_chunks['age'].append(np.array(columns['age'], dtype=np.int32))
+            numeric_chunks['salary'].append(np.array(columns['salary'], dtype=np.int64))
+            numeric_chunks['hire_date'].append(np.fromiter(
+                (day.toordinal() for day in columns['hire_date']), dtype=np.int32, count=len(chunk)
+            ))
+            numeric_chunks['performance_score'].append(np.fromiter(
+                (int(score * SCALES['performance_score']) for score in columns['performance_score']),
+                dtype=np.int32, count=len(chunk),
+            ))
+
+        codes, categories = {}, {}
+        for name in CATEGORICALS:
+            # Re-code in sorted order so that groups come out sorted
+            values = list(indexes[name])
+            order = sorted(range(len(values)), key=values.__getitem__)
+            recode = np.empty(len(values), dtype=np.int32)
+            recode[order] = np.arange(len(values), dtype=np.int32)
+            raw = np.concatenate(code_chunks[name]) if code_chunks[name] else np.empty(0, dtype=np.int32)
+            codes[name] = recode[raw] if len(values) else raw
+            categories[name] = [values[i] for i in order]
+
+        numerics = {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+            for name, chunks in numeric_chunks.items()
+        }
+        return cls(version, codes, categories, numerics)
+
+    def range_codes(self, dimension, ranges, today):
+        """Bucket index of every row for inclusive ``{'min', 'max'}`` ranges, or -1."""
+        name = RANGE_DIMENSIONS[dimension]
+        column = self.numerics[name]
+        bounds = self._bounds(dimension, ranges, today)
+        if not self.size:
+            return np.empty(0, dtype=np.int32)
+
+        smallest, largest = self.extents[name]
+        if largest - smallest < MAX_LOOKUP_TABLE:
+            # A table from value to range index turns bucketing into one gather;
+            # filled in reverse so that the first matching range wins
+            table = np.full(largest - smallest + 1, -1, dtype=np.int32)
+            for index, (low, high) in reversed(list(enumerate(bounds))):
+                start = 0 if low is None else max(low - smallest, 0)
+                stop = len(table) if high is None else min(high - smallest + 1, len(table))
+                if start < stop:
+                    table[start:stop] = index
+            return table[column - smallest]
+
+        codes = np.full(self.size, -1, dtype=np.int32)
+        for index, (low, high) in enumerate(bounds):
+            mask = codes == -1
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+            codes[mask] = index
+        return codes
+
+    def _bounds(self, dimension, ranges, today):
+        if dimension != 'tenure_range':
+            return [(item.get('min'), item.get('max')) for item in ranges]
+        # Tenure ranges are in whole years: hired no later than ``min`` years
+        # ago and strictly after ``max`` years ago, as TenureDistributionView counts
+        return [
+            (
+                years_before(today, item['max']).toordinal() + 1 if item.get('max') is not None else None,
+                years_before(today, item['min']).toordinal() if item.get('min') is not None else None,
+            )
+            for item in ranges
+        ]
+
+
+_lock = threading.Lock()
+_store = None
+
+
+def get_store():
+    """This process's column store, reloaded whenever the data version has moved on."""
+    global _store
+    version = data_version()
+    store = _store
+    if store is not None and store.version == version:
+        return store
+    with _lock:
+        # Another request may have reloaded it while this one waited
+        if _store is None or _store.version != version:
+            _store = EmployeeColumns.load(version)
+        return _store
+
+
+def parse_measure(value):
+    """``count``, or ``<aggregate>:<field>`` with aggregate sum, avg, min, max or p1..p99."""
+    if value == 'count':
+        return ('count', None, None)
+    aggregate, _, field = value.partition(':')
+    if field not in MEASURE_FIELDS:
+        raise ValidationError({'measures': f"Unknown field in {value!r}; choose from: {', '.join(MEASURE_FIELDS)}."})
+    match = PERCENTILE.match(aggregate)
+    if match and 1 <= int(match.group(1)) <= 99:
+        return (aggregate, field, int(match.group(1)) / 100)
+    if aggregate not in AGGREGATES:
+        raise ValidationError({'measures': f"Unknown aggregate in {value!r}; choose from: {', '.join(AGGREGATES)} or p1..p99."})
+    return (aggregate, field, None)
+
+
+def parse_query_params(params):
+    group_by = [name.strip() for name in params.get('group_by', '').split(',') if name.strip()]
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise ValidationError({'group_by': f"Unknown dimensions: {', '.join(unknown)}. Choose from: {', '.join(DIMENSIONS)}."})
+    if len(set(group_by)) != len(group_by):
+        raise ValidationError({'group_by': 'Dimensions must not repeat.'})
+    if len(group_by) > MAX_GROUP_BY:
+        raise ValidationError({'group_by': f'At most {MAX_GROUP_BY} dimensions are allowed.'})
+
+    names = [name.strip() for name in params.get('measures', 'count').split(',') if name.strip()] or ['count']
+    if len(names) > MAX_MEASURES:
+        raise ValidationError({'measures': f'At most {MAX_MEASURES} measures are allowed.'})
+    measures = {name: parse_measure(name) for name in names}
+
+    filters = {
+        name: [value for value in params.get(name).split(',') if value]
+        for name in CATEGORICALS if params.get(name)
+    }
+    return {'group_by': group_by, 'measures': measures, 'filters': filters}
+
+
+def _percentile(ordered, starts, counts, fraction):
+    # Linear interpolation, as numpy.percentile and percentile_cont do
+    position = starts + (counts - 1) * fraction
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, starts + counts - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_query(store, group_by, measures, filters=None, ranges=None, today=None):
+    """Group the employee columns by ``group_by`` and compute ``measures`` per group.
+
+    ``measures`` maps output names to parsed ``(aggregate, field, fraction)``
+    triples, ``filters`` maps categorical columns to the values to keep and
+    ``ranges`` gives the buckets of each range dimension.
+    """
+    today = today or timezone.now().date()
+    selected = None
+    for name, values in (filters or {}).items():
+        wanted = [store.categories[name].index(value) for value in values if value in store.categories[name]]
+        mask = np.isin(store.codes[name], wanted)
+        selected = mask if selected is None else selected & mask
+
+    # One integer key per row, combining the codes of every dimension
+    labels, sizes = [], []
+    key = None
+    for dimension in group_by:
+        if dimension in CATEGORICALS:
+            codes, dimension_labels = store.codes[dimension], store.categories[dimension]
+        else:
+            codes = store.range_codes(dimension, ranges[dimension], today)
+            dimension_labels = [item['label'] for item in ranges[dimension]]
+            in_range = codes >= 0
+            selected = in_range if selected is None else selected & in_range
+        if key is None:
+            key = codes.astype(np.int64)
+        else:
+            key *= max(len(dimension_labels), 1)
+            key += codes
+        labels.append(dimension_labels)
+        sizes.append(max(len(dimension_labels), 1))
+
+    if key is None:
+        key = np.zeros(store.size, dtype=np.int64)
+    groups = int(np.prod(sizes)) if sizes else 1
+    if selected is not None:
+        # Rows left out go to one extra group after the real ones, which
+        # avoids copying every column down to the selected rows
+        key[~selected] = groups
+    counts = np.bincount(key, minlength=groups + 1)[:groups]
+    starts = np.cumsum(counts) - counts
+    present = np.flatnonzero(counts)
+    counts, starts = counts[present], starts[present]
+
+    results = {}
+    ordered = {}
+    for name, (aggregate, field, fraction) in measures.items():
+        if aggregate == 'count':
+            results[name] = counts
+            continue
+        values = store.numerics[field]
+        scale = SCALES.get(field, 1)
+        if aggregate in ('sum', 'avg'):
+            sums = np.bincount(key, weights=values, minlength=groups + 1)[present]
+            results[name] = sums / scale if aggregate == 'sum' else sums / counts / scale
+            continue
+
+        if field not in ordered:
+            # Values sorted within each group, from one sort of (key, value) pairs
+            low = int(values.min()) if len(values) else 0
+            span = int(values.max()) - low + 1 if len(values) else 1
+            ordered[field] = np.sort(key * span + (values - low)) % span + low
+        if aggregate == 'min':
+            results[name] = ordered[field][starts] / scale
+        elif aggregate == 'max':
+            results[name] = ordered[field][starts + counts - 1] / scale
+        else:
+            results[name] = _percentile(ordered[field], starts, counts, fraction) / scale
+
+    rows = []
+    for position, group in enumerate(present):
+        row = {}
+        for dimension, dimension_labels, size in reversed(list(zip(group_by, labels, sizes))):
+            group, code = divmod(int(group), size)
+            row[dimension] = dimension_labels[code]
+        row = {dimension: row[dimension] for dimension in group_by}
+        for name, (aggregate, field, _) in measures.items():
+            value = results[name][position]
+            # Counts, and sums and extremes of integer columns, stay integers
+            exact = aggregate == 'count' or (aggregate in ('sum', 'min', 'max') and field not in SCALES)
+            row[name] = int(value) if exact else round(float(value), 2)
+        rows.append(row)
+
+    return {
+        'groupBy': group_by,
+        'measures': list(measures),
+        'employees': int(counts.sum()),
+        'rows': rows,
+        'loadedAt': store.loaded_at,
+    }
@@ -0,0 +1,43 @@
+
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import close_old_connections
+
+
+def _run_panel(panel):
+    """Run one panel in an executor thread on that thread's own connection."""
+    started = time.perf_counter()
+    try:
+        return panel(), time.perf_counter() - started
+    finally:
+        # The thread is reused by later panels; don't leave the connection open past CONN_MAX_AGE
+        close_old_connections()
+
+
+async def gather_panels(panels):
+    """Run ``{name: callable}`` concurrently and return ``({name: result}, {name: seconds})``.
+
+    Each panel is a synchronous ORM function run with ``thread_sensitive=False``
+    so it gets its own thread and database connection. The async ORM would
+    route every query through the single thread-sensitive executor and run
+    them one after another.
+    """
+    names = list(panels)
+    results = await asyncio.gather(*(
+        sync_to_async(_run_panel, thread_sensitive=False)(panels[name]) for name in names
+    ))
+    data = {name: result for name, (result, _) in zip(names, results)}
+    timings = {name: elapsed for name, (_, elapsed) in zip(names, results)}
+    return data, timings
+
+
+def run_panels(panels):
+    """Synchronous entry point to :func:`gather_panels`, usable from WSGI and ASGI alike."""
+    return async_to_sync(gather_panels)(panels)
+
+
+def server_timing(timings):
+    """``Server-Timing`` header value reporting each panel's duration."""
+    return ', '.join(f'{name};dur={elapsed * 1000:.1f}' for name, elapsed in timings.items())
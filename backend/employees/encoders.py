@@ -0,0 +1,171 @@
+
+from functools import lru_cache
+from operator import itemgetter
+
+import orjson
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson, with the same output as DRF's renderer.
+
+    Types orjson cannot handle natively (and datetimes, which DRF formats its
+    own way) fall back to DRF's encoder. Indented or ASCII-only output is left
+    to DRF.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if self.ensure_ascii or not self.compact or indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        # Keep the output a strict JavaScript subset, as DRF does
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def _decimal(value):
+    return None if value is None else format(value, 'f')
+
+
+def _date(value):
+    return None if value is None else value.isoformat()
+
+
+def _datetime(tz):
+    # Matches serializers.DateTimeField.to_representation in the timezone ``tz``
+    def convert(value):
+        if value is None:
+            return None
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _converter(model_field):
+    """How to turn a ``values()`` result into what the serializer field would output.
+
+    Returns a converter, a factory taking the current timezone, or None.
+    """
+    if isinstance(model_field, models.DecimalField):
+        return _decimal
+    if isinstance(model_field, models.DateTimeField):
+        return _datetime
+    if isinstance(model_field, models.DateField):
+        return _date
+    # UUIDs are left to the renderer, which writes them in the same form as str()
+    return None
+
+
+class RowEncoder:
+    """Encode ``values()`` rows exactly as a ModelSerializer would encode instances.
+
+    The column plan is worked out once from the serializer's fields, so
+    encoding a row is a dict lookup and at most one conversion per column.
+    Nested serializers (see ``?expand=``) are read from ``related__field``
+    lookups of the same row. Only fields that map directly onto model columns
+    are supported.
+    """
+    def __init__(self, serializer_class, fields=None, expand=None):
+        serializer = serializer_class(context={'expand': expand or ()})
+        self.lookups = []
+        self.columns = self._plan(serializer, '', fields)
+
+    def _plan(self, serializer, prefix, fields=None):
+        model = serializer.Meta.model
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            lookup = prefix + field.source
+            if isinstance(field, serializers.BaseSerializer):
+                # A null foreign key is detected from the related primary key
+                related = f'{lookup}__{field.Meta.model._meta.pk.name}'
+                self.lookups.append(related)
+                columns.append((name, related, None, self._plan(field, f'{lookup}__')))
+                continue
+            self.lookups.append(lookup)
+            columns.append((name, lookup, _converter(model._meta.get_field(field.source)), None))
+        return columns
+
+    def _getters(self, columns, tz):
+        getters = []
+        for name, lookup, converter, nested in columns:
+            if nested is not None:
+                getters.append((name, _nested(lookup, self._getters(nested, tz))))
+            elif converter is None:
+                getters.append((name, itemgetter(lookup)))
+            else:
+                if converter is _datetime:
+                    converter = converter(tz)
+                getters.append((name, _converted(lookup, converter)))
+        return getters
+
+    def encode(self, rows):
+        # Resolve the timezone once rather than per value, as localtime() would
+        getters = self._getters(self.columns, timezone.get_current_timezone())
+        return [{name: getter(row) for name, getter in getters} for row in rows]
+
+
+def _converted(lookup, converter):
+    return lambda row: converter(row[lookup])
+
+
+def _nested(related, getters):
+    return lambda row: None if row[related] is None else {name: getter(row) for name, getter in getters}
+
+
+@lru_cache(maxsize=256)
+def row_encoder(serializer_class, fields=None, expand=None):
+    return RowEncoder(serializer_class, fields, expand)
+
+
+def parse_fields(value, serializer_class):
+    """Parse ``?fields=a,b`` into a frozenset of readable serializer fields."""
+    if not value:
+        return None
+    fields = frozenset(name.strip() for name in value.split(',') if name.strip())
+    readable = [name for name, field in serializer_class().fields.items() if not field.write_only]
+    unknown = fields.difference(readable)
+    if unknown:
+        raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}. Choose from: {', '.join(readable)}."})
+    return fields
+
+
+class FastListMixin:
+    """Serve list actions from ``values()`` rows through a :class:`RowEncoder`.
+
+    Model instances and per-field serializer calls are skipped entirely, and
+    ``?fields=a,b`` narrows both the SELECT and the payload.
+    """
+    fields_query_param = 'fields'
+
+    def get_row_encoder(self):
+        serializer_class = self.get_serializer_class()
+        fields = parse_fields(self.request.query_params.get(self.fields_query_param), serializer_class)
+        expand = self.get_serializer_context().get('expand')
+        return row_encoder(serializer_class, fields, frozenset(expand) if expand else None)
+
+    def list(self, request, *args, **kwargs):
+        encoder = self.get_row_encoder()
+        # Keyset cursors are built from the ordering columns, so select them too
+        ordering = [name.lstrip('-') for name in getattr(self, 'keyset_ordering', None) or ()]
+        lookups = encoder.lookups + [name for name in ordering if name not in encoder.lookups]
+        queryset = self.filter_queryset(self.get_queryset()).values(*lookups)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page))
+        return Response(encoder.encode(queryset))
@@ -0,0 +1,333 @@
+
+import csv
+import io
+import zlib
+from decimal import Decimal
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Rows fetched per round trip from the (server-side, on Postgres) cursor
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+# Rows per Parquet row group; larger groups compress and scan better
+PARQUET_ROW_GROUP_SIZE = getattr(settings, 'PARQUET_ROW_GROUP_SIZE', 100_000)
+
+# ?output= formats as (content type, file extension, allowed ?compression= values)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv', ('gzip',)),
+    'ndjson': ('application/x-ndjson', 'ndjson', ('gzip',)),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows', ('zstd', 'lz4')),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', ('zstd', 'snappy', 'gzip', 'none')),
+}
+
+# Exportable columns per model as (values_list lookup, CSV header)
+EMPLOYEE_COLUMNS = [
+    ('id', 'ID'),
+    ('first_name', 'First Name'),
+    ('last_name', 'Last Name'),
+    ('email', 'Email'),
+    ('gender', 'Gender'),
+    ('age', 'Age'),
+    ('department', 'Department'),
+    ('position', 'Position'),
+    ('salary', 'Salary'),
+    ('hire_date', 'Hire Date'),
+    ('performance_score', 'Performance Score'),
+]
+
+ATTENDANCE_COLUMNS = [
+    ('id', 'ID'),
+    ('employee_id', 'Employee ID'),
+    ('date', 'Date'),
+    ('status', 'Status'),
+    ('hours_worked', 'Hours Worked'),
+    ('late_minutes', 'Late Minutes'),
+    ('notes', 'Notes'),
+]
+
+PERFORMANCE_REVIEW_COLUMNS = [
+    ('id', 'ID'),
+    ('employee_id', 'Employee ID'),
+    ('review_date', 'Review Date'),
+    ('reviewer_id', 'Reviewer ID'),
+    ('communication_score', 'Communication Score'),
+    ('teamwork_score', 'Teamwork Score'),
+    ('technical_score', 'Technical Score'),
+    ('leadership_score', 'Leadership Score'),
+    ('overall_score', 'Overall Score'),
+    ('comments', 'Comments'),
+]
+
+
+def select_columns(request, columns):
+    """Restrict ``columns`` to the ones named in ``?columns=a,b``, keeping the requested order."""
+    requested = request.query_params.get('columns')
+    if not requested:
+        return columns
+
+    available = dict(columns)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ValidationError({
+            'columns': f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(available)}."
+        })
+    return [(name, available[name]) for name in names]
+
+
+def filtered_queryset(request, viewset_class):
+    """Apply the list filters of ``viewset_class`` (filterset fields, search) to its queryset."""
+    view = viewset_class(request=request, action='list', args=(), kwargs={}, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+def iter_chunks(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Yield lists of up to ``chunk_size`` row tuples, calling ``progress(rows)`` after each."""
+    rows = queryset.values_list(*[lookup for lookup, _ in columns]).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [row for _, row in zip(range(chunk_size), rows)]
+        if not chunk:
+            return
+        yield chunk
+        if progress is not None:
+            progress(len(chunk))
+
+
+def iter_csv(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Yield CSV text one chunk of rows at a time.
+
+    Rows are read as tuples with ``values_list().iterator()``, so memory use
+    stays flat no matter how large the table is.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for _, header in columns])
+
+    for chunk in iter_chunks(queryset, columns, chunk_size, progress):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json_default(value):
+    # Decimals are written as JSON numbers, the way data tools expect them
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError
+
+
+def iter_ndjson(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Yield one JSON object per row, keyed by field name, a chunk at a time."""
+    names = [lookup for lookup, _ in columns]
+    for chunk in iter_chunks(queryset, columns, chunk_size, progress):
+        yield b''.join(
+            orjson.dumps(dict(zip(names, row)), default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+            for row in chunk
+        )
+
+
+def arrow_type(field):
+    """The Arrow type of a model field's values."""
+    if isinstance(field, models.ForeignKey):
+        field = field.target_field
+    if isinstance(field, models.UUIDField):
+        return pyarrow.uuid()
+    if isinstance(field, models.DecimalField):
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pyarrow.date32()
+    if isinstance(field, (models.BigIntegerField, models.BigAutoField)):
+        return pyarrow.int64()
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return pyarrow.int32()
+    if isinstance(field, models.FloatField):
+        return pyarrow.float64()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+
+def arrow_schema(model, columns):
+    fields = [(lookup, model._meta.get_field(lookup)) for lookup, _ in columns]
+    return pyarrow.schema([pyarrow.field(lookup, arrow_type(field), nullable=field.null) for lookup, field in fields])
+
+
+def _arrow_array(values, arrow_type):
+    if arrow_type == pyarrow.uuid():
+        storage = pyarrow.array([None if value is None else value.bytes for value in values], pyarrow.binary(16))
+        return pyarrow.ExtensionArray.from_storage(arrow_type, storage)
+    return pyarrow.array(values, type=arrow_type)
+
+
+def iter_record_batches(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Yield typed Arrow record batches, one per chunk of rows."""
+    schema = arrow_schema(queryset.model, columns)
+    for chunk in iter_chunks(queryset, columns, chunk_size, progress):
+        arrays = [_arrow_array(values, field.type) for values, field in zip(zip(*chunk), schema)]
+        yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _StreamSink:
+    """Write-only file that buffers what Arrow writes until the response takes it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def iter_arrow(queryset, columns, compression=None, progress=None):
+    """Yield an Arrow IPC stream, one record batch at a time."""
+    schema = arrow_schema(queryset.model, columns)
+    sink = _StreamSink()
+    options = pyarrow.ipc.IpcWriteOptions(compression=compression)
+    with pyarrow.ipc.new_stream(pyarrow.PythonFile(sink, mode='w'), schema, options=options) as writer:
+        for batch in iter_record_batches(queryset, columns, progress=progress):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(queryset, columns, compression='zstd', row_group_size=PARQUET_ROW_GROUP_SIZE, progress=None):
+    """Yield a Parquet file one row group at a time.
+
+    Batches are held back until they fill a row group, so memory use is
+    bounded by ``row_group_size`` rather than by the size of the export.
+    """
+    schema = arrow_schema(queryset.model, columns)
+    sink = _StreamSink()
+    with pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema, compression=compression) as writer:
+        pending, pending_rows = [], 0
+        for batch in iter_record_batches(queryset, columns, progress=progress):
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pyarrow.Table.from_batches(pending, schema), row_group_size=pending_rows)
+                pending, pending_rows = [], 0
+                yield sink.drain()
+        if pending:
+            writer.write_table(pyarrow.Table.from_batches(pending, schema))
+    yield sink.drain()
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of text or byte chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(request, viewset_class, columns, filename, progress=None):
+    """Validate an export request and return ``(chunks, content type, filename, queryset)``.
+
+    ``?output=`` picks CSV (the default), NDJSON, an Arrow IPC stream or
+    Parquet; Arrow and Parquet keep each column's type. Supports
+    ``?columns=`` for column selection, the viewset's own list filters and
+    ``?compression=``: gzip for CSV and NDJSON, zstd or lz4 inside Arrow
+    and zstd (the default), snappy, gzip or none inside Parquet. Nothing is
+    read from the database until ``chunks`` is iterated.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in EXPORT_FORMATS:
+        raise ValidationError({'output': f"Must be one of: {', '.join(EXPORT_FORMATS)}."})
+    content_type, extension, compressions = EXPORT_FORMATS[output]
+    compression = request.query_params.get('compression')
+    if compression and compression not in compressions:
+        raise ValidationError({'compression': f"Must be one of {', '.join(compressions)} for {output} exports."})
+    if output in ('arrow', 'parquet') and pyarrow is None:
+        raise ValidationError({'output': f'{output} exports need the pyarrow package.'})
+
+    columns = select_columns(request, columns)
+    queryset = filtered_queryset(request, viewset_class)
+    filename = f'{filename}.{extension}'
+    if output == 'arrow':
+        chunks = iter_arrow(queryset, columns, compression, progress=progress)
+    elif output == 'parquet':
+        chunks = iter_parquet(queryset, columns, compression or 'zstd', progress=progress)
+    else:
+        chunks = (iter_ndjson if output == 'ndjson' else iter_csv)(queryset, columns, progress=progress)
+        if compression == 'gzip':
+            chunks, content_type, filename = gzip_stream(chunks), 'application/gzip', f'{filename}.gz'
+    return chunks, content_type, filename, queryset
+
+
+class AsyncChunks:
+    """Async iterator over a sync iterator's chunks, pulled one at a time.
+
+    Django's ASGI handler reads a sync streaming iterator into a list before
+    sending anything. This hands it one chunk at a time instead, each read
+    on the request's thread-sensitive thread, so a server-side cursor stays
+    on the connection that opened it.
+    """
+
+    _end = object()
+
+    def __init__(self, iterator):
+        self.iterator = iter(iterator)
+        self._next = sync_to_async(next)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await self._next(self.iterator, self._end)
+        if chunk is self._end:
+            raise StopAsyncIteration
+        return chunk
+
+    def close(self):
+        # Called by the response when it is closed, also after an aborted download
+        close = getattr(self.iterator, 'close', None)
+        if close is not None:
+            close()
+
+
+def streaming_content(request, chunks):
+    """``chunks`` in the form the server running ``request`` streams without buffering."""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return AsyncChunks(chunks)
+    return chunks
+
+
+def export_response(request, viewset_class, columns, filename):
+    """Stream a filtered export of ``viewset_class``'s queryset; see :func:`export_stream`."""
+    chunks, content_type, filename, _ = export_stream(request, viewset_class, columns, filename)
+    response = StreamingHttpResponse(streaming_content(request, chunks), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,315 @@
+
+import io
+import multiprocessing
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+from faker import Faker
+
+from .factories import ATTENDANCE_STATUSES, DEPARTMENTS, GENDERS, POSITIONS
+from .models import Attendance, Employee, PerformanceReview
+
+# Sizes of the precomputed Faker pools that column values are sampled from
+FIRST_NAME_POOL_SIZE = 500
+LAST_NAME_POOL_SIZE = 1000
+SENTENCE_POOL_SIZE = 200
+PARAGRAPH_POOL_SIZE = 100
+
+# Date windows (in days) matching the factories
+HIRE_WINDOW_DAYS = 3650
+ATTENDANCE_WINDOW_DAYS = 60
+REVIEW_WINDOW_DAYS = 365
+
+EMPLOYEE_FIELDS = [
+    'id', 'first_name', 'last_name', 'email', 'gender', 'age', 'department', 'position',
+    'salary', 'hire_date', 'performance_score', 'created_at', 'updated_at',
+]
+ATTENDANCE_FIELDS = [
+    'id', 'employee_id', 'date', 'status', 'hours_worked', 'late_minutes', 'notes', 'created_at',
+]
+PERFORMANCE_REVIEW_FIELDS = [
+    'id', 'employee_id', 'review_date', 'reviewer_id', 'communication_score', 'teamwork_score',
+    'technical_score', 'leadership_score', 'overall_score', 'comments', 'created_at',
+]
+
+
+class ValuePools:
+    """Faker output generated once and then sampled by index."""
+
+    def __init__(self, seed=None):
+        fake = Faker()
+        if seed is not None:
+            fake.seed_instance(seed)
+        self.first_names = np.array([fake.first_name() for _ in range(FIRST_NAME_POOL_SIZE)], dtype=object)
+        self.last_names = np.array([fake.last_name() for _ in range(LAST_NAME_POOL_SIZE)], dtype=object)
+        self.sentences = np.array([fake.sentence() for _ in range(SENTENCE_POOL_SIZE)], dtype=object)
+        self.paragraphs = np.array([fake.paragraph() for _ in range(PARAGRAPH_POOL_SIZE)], dtype=object)
+
+
+def random_uuids(rng, count):
+    """Draw ``count`` version-4 UUIDs from ``rng``."""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    return [uuid.UUID(bytes=row.tobytes(), version=4) for row in raw]
+
+
+def random_scores(rng, count):
+    return np.round(rng.uniform(1.0, 5.0, count), 1)
+
+
+def distinct_day_offsets(rng, rows, per_row, window):
+    """Pick ``per_row`` distinct day offsets in ``[0, window)`` for each of ``rows`` rows."""
+    window = max(window, per_row)
+    return np.argsort(rng.random((rows, window)), axis=1)[:, :per_row]
+
+
+def generate_employee_rows(rng, pools, count, today):
+    """Sample ``count`` employees as a dict of column lists."""
+    ids = random_uuids(rng, count)
+    first_names = pools.first_names[rng.integers(0, len(pools.first_names), count)]
+    last_names = pools.last_names[rng.integers(0, len(pools.last_names), count)]
+    hire_offsets = rng.integers(0, HIRE_WINDOW_DAYS + 1, count)
+
+    return {
+        'id': ids,
+        'first_name': list(first_names),
+        'last_name': list(last_names),
+        # The id suffix keeps emails unique across chunks and repeated runs
+        'email': [
+            f'{first.lower()}.{last.lower()}.{employee_id.hex[:12]}@example.com'
+            for first, last, employee_id in zip(first_names, last_names, ids)
+        ],
+        'gender': list(np.array(GENDERS, dtype=object)[rng.integers(0, len(GENDERS), count)]),
+        'age': rng.integers(22, 66, count).tolist(),
+        'department': list(np.array(DEPARTMENTS, dtype=object)[rng.integers(0, len(DEPARTMENTS), count)]),
+        'position': list(np.array(POSITIONS, dtype=object)[rng.integers(0, len(POSITIONS), count)]),
+        'salary': rng.integers(30000, 250001, count).tolist(),
+        'hire_date': [today - timedelta(days=int(offset)) for offset in hire_offsets],
+        'performance_score': random_scores(rng, count).tolist(),
+    }
+
+
+def generate_attendance_rows(rng, pools, employee_ids, per_employee, today):
+    """Sample ``per_employee`` attendance records on distinct dates for each employee."""
+    count = len(employee_ids) * per_employee
+    offsets = distinct_day_offsets(rng, len(employee_ids), per_employee, ATTENDANCE_WINDOW_DAYS + 1)
+    statuses = np.array(ATTENDANCE_STATUSES, dtype=object)[rng.integers(0, len(ATTENDANCE_STATUSES), count)]
+
+    hours = np.round(rng.uniform(0.0, 9.0, count), 1)
+    hours[statuses == 'Absent'] = 0.0
+    late_minutes = rng.integers(0, 121, count)
+    late_minutes[statuses != 'Late'] = 0
+
+    # 30% of records carry a note
+    has_notes = rng.random(count) < 0.3
+    notes = pools.sentences[rng.integers(0, len(pools.sentences), count)]
+
+    return {
+        'id': random_uuids(rng, count),
+        'employee_id': [employee_id for employee_id in employee_ids for _ in range(per_employee)],
+        'date': [today - timedelta(days=int(offset)) for offset in offsets.ravel()],
+        'status': list(statuses),
+        'hours_worked': hours.tolist(),
+        'late_minutes': late_minutes.tolist(),
+        'notes': [note if flag else None for note, flag in zip(notes, has_notes)],
+    }
+
+
+def generate_review_rows(rng, pools, employee_ids, per_employee, today):
+    """Sample ``per_employee`` reviews on distinct dates, each by a different employee."""
+    employee_count = len(employee_ids)
+    count = employee_count * per_employee
+    offsets = distinct_day_offsets(rng, employee_count, per_employee, REVIEW_WINDOW_DAYS + 1)
+
+    # A non-zero shift within the chunk never maps an employee onto themselves
+    owners = np.repeat(np.arange(employee_count), per_employee)
+    if employee_count > 1:
+        reviewers = [employee_ids[index] for index in (owners + rng.integers(1, employee_count, count)) % employee_count]
+    else:
+        reviewers = [None] * count
+
+    scores = [random_scores(rng, count) for _ in range(4)]
+    overall = np.round(sum(scores) / len(scores), 1)
+
+    # 70% of reviews carry comments
+    has_comments = rng.random(count) < 0.7
+    comments = pools.paragraphs[rng.integers(0, len(pools.paragraphs), count)]
+
+    return {
+        'id': random_uuids(rng, count),
+        'employee_id': [employee_ids[index] for index in owners],
+        'review_date': [today - timedelta(days=int(offset)) for offset in offsets.ravel()],
+        'reviewer_id': reviewers,
+        'communication_score': scores[0].tolist(),
+        'teamwork_score': scores[1].tolist(),
+        'technical_score': scores[2].tolist(),
+        'leadership_score': scores[3].tolist(),
+        'overall_score': overall.tolist(),
+        'comments': [comment if flag else None for comment, flag in zip(comments, has_comments)],
+    }
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def copy_rows(model, fields, columns, table=None):
+    """Load column lists with Postgres ``COPY FROM STDIN``, into ``table`` if given instead of the model's."""
+    buffer = io.StringIO()
+    for row in zip(*(columns[field] for field in fields)):
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(table or model._meta.db_table)
+    column_list = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {table} ({column_list}) FROM STDIN', buffer)
+
+
+def insert_rows(model, fields, columns):
+    """Load column lists with a batched ``INSERT`` via ``executemany``.
+
+    Values are converted column by column with each field's own database
+    preparation, which skips the per-instance overhead of ``bulk_create``.
+    """
+    # Resolve the connection once; the ``connection`` proxy is costly per value
+    db = connections[DEFAULT_DB_ALIAS]
+    prepared = []
+    for field_name in fields:
+        field = model._meta.get_field(field_name)
+        prepared.append([field.get_db_prep_save(value, db) for value in columns[field_name]])
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    column_list = ', '.join(connection.ops.quote_name(model._meta.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({column_list}) VALUES ({placeholders})', list(zip(*prepared)))
+
+
+class Loader:
+    """Writes generated column lists with COPY (Postgres) or batched INSERTs.
+
+    ``timestamp`` fills ``created_at``/``updated_at``; it defaults to the
+    current time.
+    """
+
+    def __init__(self, method, timestamp=None):
+        self.method = method
+        self.timestamp = timestamp
+
+    def load(self, model, fields, columns):
+        if 'created_at' in fields:
+            timestamp = self.timestamp or timezone.now()
+            row_count = len(columns['id'])
+            columns['created_at'] = [timestamp] * row_count
+            if 'updated_at' in fields:
+                columns['updated_at'] = [timestamp] * row_count
+
+        if self.method == 'copy':
+            copy_rows(model, fields, columns)
+        else:
+            insert_rows(model, fields, columns)
+        return len(columns['id'])
+
+
+def default_load_method():
+    return 'copy' if connection.vendor == 'postgresql' else 'insert'
+
+
+def generate_chunk(rng, pools, loader, employee_count, attendance_per_employee, reviews_per_employee, today):
+    """Generate and load one chunk of employees with their attendance and reviews.
+
+    Returns the number of rows written per model.
+    """
+    employees = generate_employee_rows(rng, pools, employee_count, today)
+    employee_ids = employees['id']
+
+    counts = {}
+    with transaction.atomic():
+        counts['employees'] = loader.load(Employee, EMPLOYEE_FIELDS, employees)
+        counts['attendance'] = 0
+        counts['reviews'] = 0
+        if attendance_per_employee > 0:
+            attendance = generate_attendance_rows(rng, pools, employee_ids, attendance_per_employee, today)
+            counts['attendance'] = loader.load(Attendance, ATTENDANCE_FIELDS, attendance)
+        if reviews_per_employee > 0:
+            reviews = generate_review_rows(rng, pools, employee_ids, reviews_per_employee, today)
+            counts['reviews'] = loader.load(PerformanceReview, PERFORMANCE_REVIEW_FIELDS, reviews)
+    return counts
+
+
+def block_rng(seed, block_index):
+    """RNG for one block of employees, derived only from the run seed and the block index."""
+    return np.random.default_rng([seed, block_index])
+
+
+# Value pools per seed, built once per process
+_pools = {}
+
+
+class GenerationJob:
+    """Generates numbered blocks of employees; picklable for a process pool.
+
+    Each block draws from its own RNG derived from ``(seed, block_index)`` and
+    the value pools depend only on ``seed``, so the generated rows are the
+    same however the blocks are spread across workers.
+    """
+
+    def __init__(self, seed, attendance_per_employee, reviews_per_employee, today, load_method, timestamp=None):
+        self.seed = seed
+        self.attendance_per_employee = attendance_per_employee
+        self.reviews_per_employee = reviews_per_employee
+        self.today = today
+        self.load_method = load_method
+        self.timestamp = timestamp
+
+    def __call__(self, block):
+        block_index, employee_count = block
+        if self.seed not in _pools:
+            _pools[self.seed] = ValuePools(self.seed)
+
+        return generate_chunk(
+            block_rng(self.seed, block_index),
+            _pools[self.seed],
+            Loader(self.load_method, self.timestamp),
+            employee_count,
+            self.attendance_per_employee,
+            self.reviews_per_employee,
+            self.today,
+        )
+
+
+def split_blocks(employee_count, block_size):
+    """Split ``employee_count`` into ``(block_index, size)`` blocks of at most ``block_size``."""
+    return [
+        (block_index, min(block_size, employee_count - start))
+        for block_index, start in enumerate(range(0, employee_count, block_size))
+    ]
+
+
+def run_blocks(job, blocks, workers=1):
+    """Run ``job`` over ``blocks``, in a process pool when ``workers > 1``.
+
+    Yields each block's row counts as it finishes.
+    """
+    if workers <= 1:
+        yield from map(job, blocks)
+        return
+
+    # Forked workers must open their own database connections
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        yield from pool.imap_unordered(job, blocks)
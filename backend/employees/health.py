@@ -0,0 +1,144 @@
+
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+# Seconds a probe result is reused, so a probe storm costs one check per interval
+HEALTH_CACHE_TTL = getattr(settings, 'HEALTH_CACHE_TTL', 5)
+# Seconds a dependency check may take before it is reported as timed out
+HEALTH_CHECK_TIMEOUT = getattr(settings, 'HEALTH_CHECK_TIMEOUT', 2)
+# Seconds the check thread keeps its database connection, whatever CONN_MAX_AGE is
+HEALTH_CONN_MAX_AGE = getattr(settings, 'HEALTH_CONN_MAX_AGE', 60)
+
+# Checks run on one long-lived thread, so its connection is kept open for
+# HEALTH_CONN_MAX_AGE and reused by every probe under both WSGI and ASGI
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='health-check')
+_lock = threading.Lock()
+_results = {}
+# Set once no migrations are pending; the code's migrations cannot change while the process runs
+_migrations_applied = False
+
+
+def _timed(check):
+    started = time.perf_counter()
+    try:
+        result = {'status': 'ok', **(check() or {})}
+    except Exception as exc:
+        result = {'status': 'error', 'error': str(exc)}
+    result['latencyMs'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+@contextmanager
+def _statement_timeout(connection):
+    """A transaction whose statements the server cancels after ``HEALTH_CHECK_TIMEOUT``.
+
+    Without it a hung query would keep running after the probe gave up,
+    and every later probe would queue behind it on the check thread.
+    """
+    with transaction.atomic(using=connection.alias):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'SET LOCAL statement_timeout = {int(HEALTH_CHECK_TIMEOUT * 1000)}')
+        yield
+
+
+def _database():
+    connection = connections[DEFAULT_DB_ALIAS]
+    # Honour HEALTH_CONN_MAX_AGE and drop a connection that went bad since the last probe
+    close_old_connections()
+    reused = connection.connection is not None
+    result = {'vendor': connection.vendor, 'reusedConnection': reused}
+    with _statement_timeout(connection), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT 1, (SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()), "
+                "current_setting('max_connections')::int"
+            )
+            _, used, limit = cursor.fetchone()
+            result['connections'] = {'used': used, 'max': limit}
+        else:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    return result
+
+
+def _cache():
+    cache = caches['default']
+    key = f'health:{uuid.uuid4().hex}'
+    cache.set(key, 1, timeout=HEALTH_CACHE_TTL)
+    if cache.get(key) != 1:
+        raise RuntimeError('cache did not return the value just written')
+    cache.delete(key)
+
+
+def _migrations():
+    global _migrations_applied
+    if _migrations_applied:
+        return {'pending': 0}
+    connection = connections[DEFAULT_DB_ALIAS]
+    with _statement_timeout(connection):
+        # Builds the migration graph, so it is only repeated until everything is applied
+        executor = MigrationExecutor(connection)
+        pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if pending:
+        raise RuntimeError(f'{len(pending)} unapplied migrations')
+    _migrations_applied = True
+    return {'pending': 0}
+
+
+CHECKS = {
+    'database': _database,
+    'cache': _cache,
+    'migrations': _migrations,
+}
+
+
+def _run_checks():
+    connection = connections[DEFAULT_DB_ALIAS]
+    # This thread's connection only (settings_dict is shared until replaced):
+    # keep it between probes, and give up connecting when the probe would
+    options = connection.settings_dict.get('OPTIONS', {})
+    if connection.vendor == 'postgresql':
+        options = {**options, 'connect_timeout': max(1, math.ceil(HEALTH_CHECK_TIMEOUT))}
+    connection.settings_dict = {**connection.settings_dict, 'CONN_MAX_AGE': HEALTH_CONN_MAX_AGE, 'OPTIONS': options}
+    return {name: _timed(check) for name, check in CHECKS.items()}
+
+
+def readiness():
+    """Check every dependency, reusing a result younger than ``HEALTH_CACHE_TTL``.
+
+    Concurrent probes wait for the check already in flight instead of
+    starting their own.
+    """
+    with _lock:
+        cached = _results.get('readiness')
+        if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL:
+            return cached[1]
+
+        future = _executor.submit(_run_checks)
+        try:
+            checks = future.result(timeout=HEALTH_CHECK_TIMEOUT)
+        except TimeoutError:
+            checks = {name: {'status': 'timeout'} for name in CHECKS}
+
+        report = {
+            'status': 'ready' if all(check['status'] == 'ok' for check in checks.values()) else 'not ready',
+            'checks': checks,
+            'checkedAt': time.time(),
+        }
+        _results['readiness'] = (time.monotonic(), report)
+        return report
+
+
+def liveness():
+    """The process is up and serving requests; deliberately checks no dependencies."""
+    return {'status': 'alive'}
@@ -1,33 +1,37 @@
-
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-import psycopg2
-import os
 
+from .health import liveness, readiness
+
+# Probes are never throttled, or a busy prober would see a healthy API as down
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@throttle_classes([])
 def health_check(request):
     """Health check endpoint to verify that the API is up and running"""
-    
-    # Check database connection
-    try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_NAME', 'employee_analytics'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', 'postgres'),
-            host=os.getenv('DB_HOST', 'localhost'),
-            port=os.getenv('DB_PORT', '5432')
-        )
-        conn.close()
-        db_status = "connected"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-    
+    report = readiness()
+    database = report['checks']['database']
     data = {
-        "status": "healthy",
-        "database": db_status,
-        "version": "1.0.0"
+        "status": "healthy" if report['status'] == 'ready' else "unhealthy",
+        "database": "connected" if database['status'] == 'ok' else f"error: {database.get('error', database['status'])}",
+        "version": "1.0.0",
+        "checks": report['checks'],
     }
-    
-    return Response(data)
+    return Response(data, status=status.HTTP_200_OK if report['status'] == 'ready' else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def liveness_check(request):
+    """Liveness probe: the process is serving requests"""
+    return Response(liveness())
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def readiness_check(request):
+    """Readiness probe: the database, cache and migrations are all in order"""
+    report = readiness()
+    return Response(report, status=status.HTTP_200_OK if report['status'] == 'ready' else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,77 @@
+
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+# Upper bound on the number of buckets a caller may request via ?edges=
+MAX_BUCKETS = 50
+
+
+def range_buckets(field, ranges):
+    """Build bucket filters for inclusive {'min', 'max', 'label'} ranges on a field.
+
+    A missing or None bound leaves that side of the range open.
+    """
+    buckets = []
+    for range_info in ranges:
+        condition = Q()
+        if range_info.get('min') is not None:
+            condition &= Q(**{f'{field}__gte': range_info['min']})
+        if range_info.get('max') is not None:
+            condition &= Q(**{f'{field}__lte': range_info['max']})
+        buckets.append({'label': range_info['label'], 'filter': condition})
+    return buckets
+
+
+def count_buckets(queryset, buckets):
+    """Count rows per bucket with one conditional-aggregation query.
+
+    Every bucket becomes a ``COUNT(*) FILTER (WHERE ...)`` column of a single
+    aggregate, so the table is scanned once regardless of the bucket count.
+    """
+    aggregates = {
+        f'bucket_{index}': Count('pk', filter=bucket['filter'] or None)
+        for index, bucket in enumerate(buckets)
+    }
+    totals = queryset.aggregate(**aggregates) if aggregates else {}
+    return [
+        {'range': bucket['label'], 'count': totals[f'bucket_{index}']}
+        for index, bucket in enumerate(buckets)
+    ]
+
+
+def parse_edges(value, bounds=None):
+    """Parse a comma-separated, strictly increasing list of integer bucket edges.
+
+    ``bounds``, an inclusive ``(low, high)`` pair, limits the edges' values.
+    """
+    try:
+        edges = [int(edge) for edge in value.split(',') if edge.strip()]
+    except ValueError:
+        raise ValidationError({'edges': 'Edges must be a comma-separated list of integers.'})
+
+    if not edges:
+        raise ValidationError({'edges': 'At least one edge is required.'})
+    if len(edges) > MAX_BUCKETS:
+        raise ValidationError({'edges': f'At most {MAX_BUCKETS} edges are allowed.'})
+    if any(low >= high for low, high in zip(edges, edges[1:])):
+        raise ValidationError({'edges': 'Edges must be strictly increasing.'})
+    if bounds is not None and (edges[0] < bounds[0] or edges[-1] > bounds[1]):
+        raise ValidationError({'edges': f'Edges must be between {bounds[0]} and {bounds[1]}.'})
+    return edges
+
+
+def ranges_from_edges(edges, label='{min}-{max}', open_label='{min}+', gap=1):
+    """Turn bucket edges into ranges; the last edge starts an open-ended bucket.
+
+    ``gap`` is subtracted from the next edge to get a range's inclusive maximum,
+    so the default of 1 yields non-overlapping ranges on integer fields.
+    """
+    ranges = []
+    for low, high in zip(edges, edges[1:]):
+        ranges.append({
+            'min': low,
+            'max': high - gap,
+            'label': label.format(min=low, max=high - gap),
+        })
+    ranges.append({'min': edges[-1], 'max': None, 'label': open_label.format(min=edges[-1])})
+    return ranges
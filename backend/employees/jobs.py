@@ -0,0 +1,371 @@
+
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import time
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpRequest, HttpResponse, QueryDict, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+
+from .exports import streaming_content
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_STORAGE_DIR = getattr(settings, 'JOB_STORAGE_DIR', os.path.join(settings.BASE_DIR, 'job_files'))
+# Finished jobs and their files are deleted this long after they finish
+JOB_RETENTION = timedelta(hours=getattr(settings, 'JOB_RETENTION_HOURS', 24))
+# A running job whose worker has not reported for this long is handed to another worker
+JOB_STALE_AFTER = timedelta(seconds=getattr(settings, 'JOB_STALE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+# Seconds between progress writes while a job runs
+PROGRESS_INTERVAL = 1.0
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+class JobLost(Exception):
+    """The job was handed to another worker, or deleted, while this one ran it."""
+
+
+class JobFileGone(APIException):
+    status_code = 410
+    default_detail = "The job's file is no longer available; submit the job again."
+    default_code = 'gone'
+
+
+class ExportJob:
+    """One of the CSV/NDJSON/Arrow/Parquet exports, taking the export endpoint's parameters."""
+
+    def __init__(self, viewset_class, columns, filename):
+        self.viewset_class = viewset_class
+        self.columns = columns
+        self.filename = filename
+
+    def validate(self, request):
+        from .exports import export_stream
+        export_stream(request, self.viewset_class, self.columns, self.filename)
+
+    def run(self, request, progress):
+        """Return ``(chunks, content type, filename, total rows)``."""
+        from .exports import export_stream
+        chunks, content_type, filename, queryset = export_stream(
+            request, self.viewset_class, self.columns, self.filename, progress
+        )
+        return chunks, content_type, filename, queryset.count()
+
+
+class AnalyticsQueryReport:
+    """An /api/analytics/query/ result written to a JSON file."""
+
+    def _query(self, request):
+        from .columnstore import parse_query_params
+        from .views import AnalyticsQueryView
+        params = parse_query_params(request.query_params)
+        return params, AnalyticsQueryView().get_ranges(request, params['group_by'])
+
+    def validate(self, request):
+        self._query(request)
+
+    def run(self, request, progress):
+        from .columnstore import get_store, run_query
+        from .encoders import FastJSONRenderer
+        from .serializers import AnalyticsQuerySerializer
+        params, ranges = self._query(request)
+        result = run_query(get_store(), ranges=ranges, **params)
+        progress(result['employees'])
+        data = FastJSONRenderer().render(AnalyticsQuerySerializer(result).data)
+        return [data], 'application/json', 'analytics_query.json', result['employees']
+
+
+@lru_cache(maxsize=None)
+def job_kinds():
+    # Imported here because the views import this module
+    from .exports import ATTENDANCE_COLUMNS, EMPLOYEE_COLUMNS, PERFORMANCE_REVIEW_COLUMNS
+    from .views import AttendanceViewSet, EmployeeViewSet, PerformanceReviewViewSet
+    return {
+        'export-employees': ExportJob(EmployeeViewSet, EMPLOYEE_COLUMNS, 'employees'),
+        'export-attendance': ExportJob(AttendanceViewSet, ATTENDANCE_COLUMNS, 'attendance'),
+        'export-performance-reviews': ExportJob(PerformanceReviewViewSet, PERFORMANCE_REVIEW_COLUMNS, 'performance_reviews'),
+        'analytics-query': AnalyticsQueryReport(),
+    }
+
+
+def normalize_params(params):
+    """Query parameters as ``{name: [values]}`` with string values, from a JSON object."""
+    if not isinstance(params, dict):
+        raise ValidationError({'params': 'Must be an object of query parameters.'})
+    normalized = {}
+    for name, value in params.items():
+        values = value if isinstance(value, list) else [value]
+        if not all(isinstance(item, (str, int, float)) and not isinstance(item, bool) for item in values):
+            raise ValidationError({'params': f'{name!r} must be a string, a number or a list of them.'})
+        normalized[str(name)] = [str(item) for item in values]
+    return normalized
+
+
+def job_request(params, user=None):
+    """A GET request carrying ``params``, for running an endpoint's code outside a request."""
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    query = QueryDict(mutable=True)
+    for name, values in params.items():
+        query.setlist(name, values)
+    http_request.GET = query
+    request = Request(http_request)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def fingerprint(kind, params, user=None):
+    # Per user, so nobody is handed a job (and its file) that someone else queued
+    user_id = user.pk if user is not None else None
+    return hashlib.sha256(json.dumps([kind, params, user_id], sort_keys=True).encode()).hexdigest()
+
+
+def submit_job(kind, params, user=None):
+    """Queue a job, or return ``user``'s queued or running job with the same kind and params.
+
+    Returns ``(job, created)``. Parameters are validated up front so that
+    mistakes are reported to the caller rather than in a failed job.
+    """
+    kinds = job_kinds()
+    if kind not in kinds:
+        raise ValidationError({'kind': f"Must be one of: {', '.join(kinds)}."})
+    params = normalize_params(params)
+    kinds[kind].validate(job_request(params, user))
+
+    key = fingerprint(kind, params, user)
+    # The partial unique constraint allows one active job per fingerprint; if
+    # the one that beat this insert has already finished, the next try wins
+    for _ in range(3):
+        existing = Job.objects.filter(fingerprint=key, status__in=Job.ACTIVE).first()
+        if existing is not None:
+            return existing, False
+        try:
+            with transaction.atomic():
+                return Job.objects.create(kind=kind, params=params, fingerprint=key, created_by=user), True
+        except IntegrityError:
+            continue
+    raise IntegrityError(f'Could not queue or find an active {kind} job')
+
+
+def job_path(job):
+    return os.path.join(JOB_STORAGE_DIR, str(job.id))
+
+
+def claim_next_job(worker):
+    """Mark the oldest queued job as running on ``worker`` and return it, or None.
+
+    The claim is a conditional update, so two workers never get the same job.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by('created_at').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        claimed = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1,
+            rows_done=0, rows_total=None,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs():
+    """Hand running jobs whose worker stopped reporting back to the queue, or fail them."""
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=timezone.now() - JOB_STALE_AFTER)
+    failed = stale.filter(attempts__gte=JOB_MAX_ATTEMPTS).update(
+        status=Job.FAILED, error='The worker running this job stopped responding.', finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=JOB_MAX_ATTEMPTS).update(status=Job.QUEUED, worker='')
+    return requeued, failed
+
+
+def delete_job_file(job):
+    _remove(job_path(job))
+    _remove(job_path(job) + '.part')
+
+
+def purge_expired_jobs():
+    """Delete jobs, and their files, that finished more than JOB_RETENTION ago.
+
+    Also removes files left behind by jobs deleted some other way.
+    """
+    expired = list(Job.objects.filter(finished_at__lt=timezone.now() - JOB_RETENTION))
+    for job in expired:
+        delete_job_file(job)
+    Job.objects.filter(id__in=[job.id for job in expired]).delete()
+
+    if os.path.isdir(JOB_STORAGE_DIR):
+        cutoff = time.time() - JOB_STALE_AFTER.total_seconds()
+        names = {name: name.removesuffix('.part') for name in os.listdir(JOB_STORAGE_DIR)}
+        known = {str(job_id) for job_id in Job.objects.filter(id__in=[
+            job_id for job_id in set(names.values()) if _is_uuid(job_id)
+        ]).values_list('id', flat=True)}
+        for name, job_id in names.items():
+            path = os.path.join(JOB_STORAGE_DIR, name)
+            if job_id not in known and os.path.getmtime(path) < cutoff:
+                _remove(path)
+    return len(expired)
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+class _Progress:
+    """Counts rows written and reports them, at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, job):
+        self.job = job
+        self.rows = 0
+        self.reported_at = time.monotonic()
+
+    def __call__(self, rows):
+        self.rows += rows
+        if time.monotonic() - self.reported_at >= PROGRESS_INTERVAL:
+            self.report()
+
+    def report(self, **fields):
+        self.reported_at = time.monotonic()
+        updated = Job.objects.filter(id=self.job.id, status=Job.RUNNING, worker=self.job.worker).update(
+            rows_done=self.rows, heartbeat_at=timezone.now(), **fields
+        )
+        if not updated:
+            raise JobLost(f'Job {self.job.id} is no longer running on {self.job.worker}')
+
+
+def run_job(job):
+    """Run a claimed job, writing its file under JOB_STORAGE_DIR, and record the outcome."""
+    progress = _Progress(job)
+    path = job_path(job)
+    partial = path + '.part'
+    os.makedirs(JOB_STORAGE_DIR, exist_ok=True)
+    try:
+        chunks, content_type, filename, total = job_kinds()[job.kind].run(
+            job_request(job.params, job.created_by), progress
+        )
+        progress.report(rows_total=total)
+        size = 0
+        with open(partial, 'wb') as output:
+            for chunk in chunks:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                output.write(data)
+                size += len(data)
+        os.replace(partial, path)
+        progress.report(
+            status=Job.SUCCEEDED, file_name=filename, content_type=content_type, size=size, finished_at=timezone.now(),
+        )
+    except JobLost:
+        logger.warning('Job %s was taken over by another worker; abandoning it', job.id)
+        _remove(partial)
+    except Exception as exc:
+        logger.exception('Job %s failed', job.id)
+        _remove(partial)
+        Job.objects.filter(id=job.id, status=Job.RUNNING, worker=job.worker).update(
+            status=Job.FAILED, error=_error_message(exc), rows_done=progress.rows, finished_at=timezone.now(),
+        )
+    except BaseException:
+        # Interrupted (worker shutdown): let another worker start it again
+        _remove(partial)
+        Job.objects.filter(id=job.id, status=Job.RUNNING, worker=job.worker).update(
+            status=Job.QUEUED, worker='', attempts=F('attempts') - 1,
+        )
+        raise
+
+
+def _error_message(exc):
+    if isinstance(exc, ValidationError) and isinstance(exc.detail, dict):
+        return ' '.join(f"{name}: {' '.join(map(str, messages)) if isinstance(messages, list) else messages}"
+                        for name, messages in exc.detail.items())
+    return str(exc)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            data = source.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+
+
+def job_file_response(request, job):
+    """Serve a finished job's file, honouring a single ``Range: bytes=`` request.
+
+    The ETag changes whenever the job's file would, so ``If-Range`` lets a
+    client resume an interrupted download only while the file is the same.
+    """
+    path = job_path(job)
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        # Removed, or written on another host; the job cannot be downloaded again
+        Job.objects.filter(id=job.id, status=Job.SUCCEEDED).update(
+            status=Job.FAILED, error=JobFileGone.default_detail,
+        )
+        raise JobFileGone()
+    etag = f'"{job.id}-{size}"'
+    start, end = 0, size - 1
+    status = 200
+
+    header = request.META.get('HTTP_RANGE', '').strip()
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # Anything but one valid byte range (several ranges, other units, last < first) gets the whole file
+    match = RANGE.match(header) if header and if_range in (None, etag) else None
+    if match and match[1] and match[2] and int(match[2]) < int(match[1]):
+        match = None
+    if match and (match[1] or match[2]):
+        if match[1]:
+            start = int(match[1])
+            end = min(int(match[2]), size - 1) if match[2] else size - 1
+        else:
+            # bytes=-N asks for the last N bytes
+            start = size - int(match[2]) if int(match[2]) else size
+            start = max(start, 0)
+        if start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        status = 206
+
+    response = StreamingHttpResponse(
+        streaming_content(request, _read_range(path, start, end - start + 1)),
+        status=status, content_type=job.content_type,
+    )
+    response['Content-Length'] = str(end - start + 1)
+    if status == 206:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'attachment; filename="{job.file_name}"'
+    return response
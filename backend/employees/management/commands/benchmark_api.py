@@ -0,0 +1,257 @@
+import itertools
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+import django
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from employees.management.commands.check_query_plans import allowed_host, plan_routes
+from employees.metrics import QueryRecorder
+from employees.models import Attendance, Employee, PerformanceReview
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Dataset sizes in employees; attendance and reviews grow in proportion
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+ATTENDANCE_PER_EMPLOYEE = 30
+REVIEWS_PER_EMPLOYEE = 2
+# Fixed so that every run at a scale benchmarks the same rows
+BENCHMARK_SEED = 1
+BENCHMARK_AS_OF = date(2025, 1, 1)
+
+
+def benchmark_routes():
+    """Every route in employees/urls.py as (name, path, query params)."""
+    routes = [(name, path, params) for name, path, params, _ in plan_routes()]
+    employee = Employee.objects.order_by('id').first()
+    return routes + [
+        ('analytics dashboard', '/api/analytics/dashboard/', {}),
+        ('analytics query', '/api/analytics/query/', {
+            'group_by': 'department,age_range', 'measures': 'count,avg:salary,p90:performance_score',
+        }),
+        ('attendance export', '/api/export/attendance/', {'employee': str(employee.id)}),
+        ('review export', '/api/export/performance-reviews/', {'employee': str(employee.id)}),
+    ]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def dataset_counts():
+    return {
+        'employees': Employee.objects.count(),
+        'attendance': Attendance.objects.count(),
+        'reviews': PerformanceReview.objects.count(),
+    }
+
+
+def _request(client, path, params):
+    """Run one request to completion and return (seconds, queries, status code).
+
+    Queries are counted on the client's own connection, so those run by the
+    dashboard's panel threads are not included.
+    """
+    recorder = QueryRecorder()
+    started = time.perf_counter()
+    with connection.execute_wrapper(recorder):
+        response = client.get(path, params)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    return time.perf_counter() - started, recorder.count, response.status_code
+
+
+def _client_loop(user, path, params, count):
+    # Each client runs on its own thread, and so on its own database connection
+    client = APIClient(SERVER_NAME=allowed_host())
+    client.force_authenticate(user)
+    try:
+        return [_request(client, path, params) for _ in range(count)]
+    finally:
+        connection.close()
+
+
+def run_route(user, path, params, requests, concurrency, warmup):
+    if warmup:
+        _client_loop(user, path, params, warmup)
+
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(itertools.chain.from_iterable(
+            executor.map(lambda share: _client_loop(user, path, params, share), [s for s in shares if s])
+        ))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([seconds for seconds, _, _ in results]) * 1000
+    queries = [count for _, count, _ in results]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, _, status in results if status >= 400),
+        'error_statuses': sorted({status for _, _, status in results if status >= 400}),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'mean_ms': round(float(latencies.mean()), 2),
+        'throughput_rps': round(len(results) / elapsed, 1) if elapsed else None,
+        'queries_mean': round(sum(queries) / len(queries), 1),
+        'queries_max': max(queries),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, max_regression, min_delta_ms):
+    """Describe every route that got slower, ran more queries or failed."""
+    problems = []
+    for name, current in results['routes'].items():
+        if current['errors']:
+            problems.append(f"{name}: {current['errors']} failed requests")
+        previous = baseline.get('routes', {}).get(name)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] * (1 + max_regression)
+        if current['p95_ms'] > limit and current['p95_ms'] - previous['p95_ms'] >= min_delta_ms:
+            problems.append(f"{name}: p95 {previous['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms")
+        if current['queries_max'] > previous['queries_max']:
+            problems.append(f"{name}: queries {previous['queries_max']} -> {current['queries_max']}")
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Load test every API route with concurrent clients and write latency, throughput, query and memory figures to JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=SCALES,
+            help='Reseed the database at this scale with generate_employees first (replaces all data)'
+        )
+        parser.add_argument('--requests', type=int, default=100, help='Timed requests per route')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients per route')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route before measuring')
+        parser.add_argument('--routes', help='Only benchmark routes whose name contains one of these comma-separated words')
+        parser.add_argument(
+            '--no_cache', action='store_true',
+            help='Bypass the analytics response cache so every request computes its result'
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes for seeding')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the results')
+        parser.add_argument('--baseline', help='Results file of an earlier run; fail on regressions against it')
+        parser.add_argument(
+            '--max_regression', type=float, default=0.25,
+            help='Allowed relative p95 increase over the baseline (default 0.25)'
+        )
+        parser.add_argument(
+            '--min_delta_ms', type=float, default=5.0,
+            help='Ignore p95 increases smaller than this many milliseconds (default 5)'
+        )
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive', help='Do not prompt before reseeding')
+
+    def handle(self, *args, **options):
+        if options['scale']:
+            self.seed(options['scale'], options['workers'], options['interactive'])
+        counts = dataset_counts()
+        if not counts['employees']:
+            raise CommandError('No data to benchmark; pass --scale or seed the database with generate_employees first.')
+
+        routes = benchmark_routes()
+        if options['routes']:
+            words = [word.strip() for word in options['routes'].split(',') if word.strip()]
+            routes = [route for route in routes if any(word in route[0] for word in words)]
+
+        user, _ = User.objects.get_or_create(username='benchmark')
+        concurrency = max(1, options['concurrency'])
+        requests = max(1, options['requests'])
+        results = {
+            'meta': {
+                'started_at': datetime.now(dt_timezone.utc).isoformat(),
+                'database': connection.vendor,
+                'scale': options['scale'],
+                'dataset': counts,
+                'requests': requests,
+                'concurrency': concurrency,
+                'analytics_cache': not options['no_cache'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'routes': {},
+        }
+
+        self.stdout.write(f"{'route':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8} {'rss MB':>8}")
+        with ExitStack() as stack:
+            stack.enter_context(mock.patch.object(APIView, 'check_throttles', lambda self, request: None))
+            if options['no_cache']:
+                # A new data version per request means every cache lookup misses
+                versions = itertools.count(int(time.time() * 1000))
+                stack.enter_context(mock.patch('employees.caching.data_version', lambda: next(versions)))
+
+            for name, path, params in routes:
+                stats = run_route(user, path, params, requests, concurrency, max(0, options['warmup']))
+                results['routes'][name] = {'path': path, 'params': params, **stats}
+                line = (
+                    f"{name:<28} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+                    f"{stats['throughput_rps']:>8.1f} {stats['queries_max']:>8} {stats['peak_rss_mb'] or 0:>8.1f}"
+                )
+                self.stdout.write(self.style.ERROR(line) if stats['errors'] else line)
+        connections.close_all()
+        results['meta']['peak_rss_mb'] = peak_rss_mb()
+
+        # Timings of error responses are meaningless; never save them as a baseline
+        failed = {name: stats['error_statuses'] for name, stats in results['routes'].items() if stats['errors']}
+        if failed:
+            details = ', '.join(f"{name} ({', '.join(map(str, statuses))})" for name, statuses in failed.items())
+            raise CommandError(f'{len(failed)} routes returned errors, results not written: {details}')
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline['meta'].get('dataset') != counts:
+                self.stdout.write(self.style.WARNING('The baseline was run against a different dataset'))
+            if baseline['meta'].get('analytics_cache') != results['meta']['analytics_cache']:
+                self.stdout.write(self.style.WARNING('The baseline was run with a different --no_cache setting'))
+            problems = compare(results, baseline, options['max_regression'], options['min_delta_ms'])
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(f'REGRESSION {problem}'))
+            if problems:
+                raise CommandError(f'{len(problems)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+    def seed(self, scale, workers, interactive):
+        employees = SCALES[scale]
+        counts = dataset_counts()
+        if counts['employees'] == employees and counts['attendance'] == employees * ATTENDANCE_PER_EMPLOYEE:
+            self.stdout.write(f'Database already holds the {scale} dataset; not reseeding')
+            return
+        if interactive:
+            answer = input(f'This replaces all employee data with the {scale} dataset. Type "yes" to continue: ')
+            if answer != 'yes':
+                raise CommandError('Benchmark cancelled.')
+        call_command(
+            'generate_employees', employees=employees, attendance_per_employee=ATTENDANCE_PER_EMPLOYEE,
+            reviews_per_employee=REVIEWS_PER_EMPLOYEE, clean=True, seed=BENCHMARK_SEED,
+            as_of=BENCHMARK_AS_OF, workers=workers, batch_size=5000, stdout=self.stdout,
+        )
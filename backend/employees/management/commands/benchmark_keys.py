@@ -0,0 +1,129 @@
+import json
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from employees.generation import ATTENDANCE_FIELDS, ValuePools, copy_rows, generate_attendance_rows
+from employees.management.commands.benchmark_api import BENCHMARK_AS_OF, BENCHMARK_SEED
+from employees.models import Attendance
+from employees.uuids import uuid7
+
+# Key generators compared; employee ids (the foreign key) use the same scheme
+SCHEMES = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+ATTENDANCE_PER_EMPLOYEE = 30
+
+
+def index_sizes(cursor, table):
+    """``{index name: bytes}`` for ``table``, plus its heap size."""
+    cursor.execute(
+        'SELECT indexname, pg_relation_size(quote_ident(indexname)) FROM pg_indexes WHERE tablename = %s ORDER BY indexname',
+        [table],
+    )
+    indexes = dict(cursor.fetchall())
+    cursor.execute('SELECT pg_table_size(%s)', [table])
+    return indexes, cursor.fetchone()[0]
+
+
+def load(table, scheme, rows, batch_size):
+    """COPY ``rows`` attendance-shaped rows into ``table`` with ``scheme`` keys; return per-batch seconds.
+
+    Every scheme gets the same column values from the same seed; only the
+    primary and foreign keys differ.
+    """
+    make_key = SCHEMES[scheme]
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    pools = ValuePools(BENCHMARK_SEED)
+    created_at = datetime.combine(BENCHMARK_AS_OF, datetime.min.time(), tzinfo=dt_timezone.utc)
+    timings = []
+    for start in range(0, rows, batch_size):
+        employees = max(1, min(batch_size, rows - start) // ATTENDANCE_PER_EMPLOYEE)
+        employee_ids = [make_key() for _ in range(employees)]
+        columns = generate_attendance_rows(rng, pools, employee_ids, ATTENDANCE_PER_EMPLOYEE, BENCHMARK_AS_OF)
+        columns['id'] = [make_key() for _ in columns['id']]
+        columns['created_at'] = [created_at] * len(columns['id'])
+
+        started = time.perf_counter()
+        copy_rows(Attendance, ATTENDANCE_FIELDS, columns, table=table)
+        timings.append((len(columns['id']), time.perf_counter() - started))
+    return timings
+
+
+class Command(BaseCommand):
+    help = 'Compare bulk load throughput and index sizes of random (v4) and time-ordered (v7) UUID keys on PostgreSQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Attendance rows loaded per key scheme')
+        parser.add_argument('--batch_size', type=int, default=30_000, help='Rows per COPY')
+        parser.add_argument('--output', default='key_benchmark.json', help='Where to write the results')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_keys measures index sizes with PostgreSQL functions; run it against PostgreSQL.')
+        rows = max(ATTENDANCE_PER_EMPLOYEE, options['rows'])
+        batch_size = max(ATTENDANCE_PER_EMPLOYEE, options['batch_size'])
+        source = Attendance._meta.db_table
+        results = {
+            'meta': {
+                'started_at': timezone.now().isoformat(),
+                'rows': rows,
+                'batch_size': batch_size,
+                'postgres': connection.pg_version,
+            },
+            'schemes': {},
+        }
+
+        self.stdout.write(
+            f"{'scheme':<8} {'rows/s':>10} {'last 25%':>10} {'pk MB':>8} {'fk MB':>8} {'indexes MB':>11} {'table MB':>9}"
+        )
+        for scheme in SCHEMES:
+            # A regular table, so WAL and full-page writes are measured as in production
+            table = f'benchmark_keys_{scheme}'
+            quoted = connection.ops.quote_name(table)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {quoted}')
+                cursor.execute(f'CREATE TABLE {quoted} (LIKE {connection.ops.quote_name(source)} INCLUDING ALL)')
+            try:
+                timings = load(table, scheme, rows, batch_size)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {quoted}')
+                    indexes, table_size = index_sizes(cursor, table)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP TABLE IF EXISTS {quoted}')
+
+            loaded = sum(count for count, _ in timings)
+            tail = timings[len(timings) * 3 // 4:]
+            pk = next(size for name, size in indexes.items() if name.endswith('_pkey'))
+            # The unique (employee_id, date) constraint's index
+            fk = next((size for name, size in indexes.items() if 'employee_id' in name), 0)
+            stats = {
+                'rows': loaded,
+                'rows_per_second': round(loaded / sum(seconds for _, seconds in timings)),
+                'tail_rows_per_second': round(sum(count for count, _ in tail) / sum(seconds for _, seconds in tail)),
+                'pk_index_bytes': pk,
+                'fk_index_bytes': fk,
+                'index_bytes': sum(indexes.values()),
+                'table_bytes': table_size,
+                'indexes': indexes,
+            }
+            results['schemes'][scheme] = stats
+            megabytes = 1024 * 1024
+            self.stdout.write(
+                f"{scheme:<8} {stats['rows_per_second']:>10,} {stats['tail_rows_per_second']:>10,} "
+                f"{pk / megabytes:>8.1f} {fk / megabytes:>8.1f} {stats['index_bytes'] / megabytes:>11.1f} "
+                f"{table_size / megabytes:>9.1f}"
+            )
+
+        v4, v7 = results['schemes']['uuid4'], results['schemes']['uuid7']
+        self.stdout.write(
+            f"uuid7 loads {v7['rows_per_second'] / v4['rows_per_second']:.2f}x as fast with a "
+            f"{1 - v7['pk_index_bytes'] / v4['pk_index_bytes']:.0%} smaller primary key index"
+        )
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,61 @@
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from employees.encoders import FastJSONRenderer, row_encoder
+from employees.models import Attendance, Employee, PerformanceReview
+from employees.serializers import AttendanceSerializer, EmployeeSerializer, PerformanceReviewSerializer
+
+TARGETS = [
+    ('employees', Employee, EmployeeSerializer),
+    ('attendance', Attendance, AttendanceSerializer),
+    ('performance reviews', PerformanceReview, PerformanceReviewSerializer),
+]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer list serialization with the values() row encoder path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per page to serialize')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per path; the best is reported')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+
+        for name, model, serializer_class in TARGETS:
+            queryset = model.objects.order_by('pk')
+            if not queryset.exists():
+                raise CommandError('No data to serialize; seed the database with generate_employees first.')
+            encoder = row_encoder(serializer_class)
+
+            def serializer_path():
+                page = list(queryset[:rows])
+                return JSONRenderer().render(serializer_class(page, many=True).data)
+
+            def encoder_path():
+                page = list(queryset.values(*encoder.lookups)[:rows])
+                return FastJSONRenderer().render(encoder.encode(page))
+
+            slow, expected = best_of(repeat, serializer_path)
+            fast, actual = best_of(repeat, encoder_path)
+            if json.loads(expected) != json.loads(actual):
+                raise CommandError(f'{name}: the row encoder output differs from the serializer output')
+
+            self.stdout.write(
+                f'{name:<20} serializer {slow * 1000:8.1f} ms   row encoder {fast * 1000:8.1f} ms   '
+                f'{slow / fast if fast else 0:5.1f}x faster'
+            )
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.pagination import PageNumberPagination
+
+from employees.management.commands.check_query_plans import capture_queries
+from employees.models import Attendance, Employee, PerformanceReview
+
+# Page sizes compared for every route; the query count must not depend on them
+PAGE_SIZES = (1, 50)
+PAGINATION_MODES = ('page', 'keyset')
+
+
+def count_routes():
+    """Routes to check as (name, path, query params, paged)."""
+    review = PerformanceReview.objects.exclude(reviewer=None).order_by('id').first()
+    attendance = Attendance.objects.order_by('id').first()
+    if review is None or attendance is None or not Employee.objects.exists():
+        raise CommandError('No data to check; seed the database with generate_employees first.')
+
+    return [
+        ('employee list', '/api/employees/', {}, True),
+        ('attendance list', '/api/attendance/', {}, True),
+        ('attendance list expanded', '/api/attendance/', {'expand': 'employee'}, True),
+        ('review list', '/api/performance-reviews/', {}, True),
+        ('review list expanded', '/api/performance-reviews/', {'expand': 'employee,reviewer'}, True),
+        ('attendance detail expanded', f'/api/attendance/{attendance.id}/', {'expand': 'employee'}, False),
+        ('review detail expanded', f'/api/performance-reviews/{review.id}/', {'expand': 'employee,reviewer'}, False),
+    ]
+
+
+def count_queries(path, params, pagination=None, page_size=None):
+    """Number of SELECTs a route runs, on a page of ``page_size`` rows in the given pagination mode."""
+    if pagination == 'keyset':
+        return len(capture_queries(path, {**params, 'pagination': 'keyset', 'page_size': page_size}))
+    if pagination == 'page':
+        # Page-number pagination takes its size from settings, not the query string
+        with mock.patch.object(PageNumberPagination, 'page_size', page_size):
+            return len(capture_queries(path, params))
+    return len(capture_queries(path, params))
+
+
+def check_route(path, params, paged):
+    """``(ok, counts)``: a detail must be one query, a list the same count at every page size."""
+    if not paged:
+        # Expanded relations must be joined, not fetched one query each
+        counts = {'detail': count_queries(path, params)}
+        return counts['detail'] == 1, counts
+
+    counts = {
+        (mode, size): count_queries(path, params, mode, size)
+        for mode in PAGINATION_MODES
+        for size in PAGE_SIZES
+    }
+    ok = all(len({counts[mode, size] for size in PAGE_SIZES}) == 1 for mode in PAGINATION_MODES)
+    return ok, counts
+
+
+class Command(BaseCommand):
+    help = 'Fail when the number of queries a list endpoint runs grows with its page size'
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, path, params, paged in count_routes():
+            ok, counts = check_route(path, params, paged)
+            summary = ', '.join(
+                f'{key if isinstance(key, str) else f"{key[0]} x{key[1]}"}: {count}' for key, count in counts.items()
+            )
+            if ok:
+                self.stdout.write(self.style.SUCCESS(f'ok   {name}: {summary} queries'))
+            else:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'FAIL {name}: {summary} queries'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} routes run more queries for larger pages')
+        self.stdout.write(self.style.SUCCESS('Query counts do not grow with page size'))
@@ -0,0 +1,180 @@
+
+import itertools
+import json
+import re
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from employees.models import Attendance, Employee, PerformanceReview
+
+# Tables whose sequential scans indicate a missing or unusable index
+LARGE_TABLES = {model._meta.db_table for model in (Employee, Attendance, PerformanceReview)}
+
+# Which of a route's queries may scan a large table: none, unbounded ones
+# (counts, aggregates and exports, which read every matching row anyway), or
+# all of them. A query is unbounded without a LIMIT, or when it groups the
+# rows before the LIMIT applies.
+NO_SCANS, UNBOUNDED_SCANS, ALL_SCANS = None, 'unbounded', 'all'
+LIMIT = re.compile(r'\sLIMIT \d+(\s+OFFSET \d+)?$')
+GROUP_BY = re.compile(r'\sGROUP BY\s')
+# Server-side cursors (exports on PostgreSQL) wrap their SELECT in a DECLARE
+DECLARE_CURSOR = re.compile(r'^DECLARE .+? CURSOR (WITH(OUT)? HOLD )?FOR ', re.S)
+
+
+def allowed_host():
+    """A host name that ALLOWED_HOSTS accepts, for requests made in-process."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    # '*', or DEBUG with ALLOWED_HOSTS empty, which allows localhost
+    return 'localhost'
+
+
+def scan_allowed(sql, allowed):
+    if allowed == ALL_SCANS:
+        return True
+    return allowed == UNBOUNDED_SCANS and (not LIMIT.search(sql.rstrip()) or bool(GROUP_BY.search(sql)))
+
+
+def plan_routes():
+    """Routes to check as (name, path, query params, which queries may scan).
+
+    Page and detail queries must always use an index. Exact page-number
+    counts, whole-table aggregates and exports read every matching row, so
+    routes that run them allow unbounded queries to scan.
+    """
+    employee = Employee.objects.order_by('id').first()
+    attendance = Attendance.objects.order_by('id').first()
+    if employee is None or attendance is None:
+        raise CommandError('No data to check; seed the database with generate_employees first.')
+
+    return [
+        ('employee list', '/api/employees/', {}, UNBOUNDED_SCANS),
+        ('employee keyset page', '/api/employees/', {'pagination': 'keyset'}, NO_SCANS),
+        ('employee detail', f'/api/employees/{employee.id}/', {}, NO_SCANS),
+        ('employee by department', '/api/employees/', {'department': employee.department, 'pagination': 'keyset'}, NO_SCANS),
+        ('employee by position', '/api/employees/', {'position': employee.position, 'pagination': 'keyset'}, NO_SCANS),
+        ('employee by gender', '/api/employees/', {'gender': employee.gender, 'pagination': 'keyset'}, NO_SCANS),
+        # Only PostgreSQL has search indexes; elsewhere search falls back to icontains
+        ('employee search', '/api/employees/', {'search': employee.last_name},
+         NO_SCANS if connection.vendor == 'postgresql' else ALL_SCANS),
+        ('attendance keyset page', '/api/attendance/', {'pagination': 'keyset'}, NO_SCANS),
+        ('attendance by employee', '/api/attendance/', {'employee': str(employee.id)}, NO_SCANS),
+        ('attendance by date', '/api/attendance/', {'date': str(attendance.date), 'pagination': 'keyset'}, NO_SCANS),
+        ('attendance by status', '/api/attendance/', {'status': attendance.status, 'pagination': 'keyset'}, NO_SCANS),
+        ('review keyset page', '/api/performance-reviews/', {'pagination': 'keyset'}, NO_SCANS),
+        ('review by employee', '/api/performance-reviews/', {'employee': str(employee.id)}, NO_SCANS),
+        ('department stats', '/api/analytics/departments/', {}, NO_SCANS),
+        ('gender distribution', '/api/analytics/gender-distribution/', {}, NO_SCANS),
+        ('salary distribution', '/api/analytics/salary-distribution/', {}, UNBOUNDED_SCANS),
+        ('age distribution', '/api/analytics/age-distribution/', {}, UNBOUNDED_SCANS),
+        ('tenure distribution', '/api/analytics/tenure-distribution/', {}, NO_SCANS),
+        ('headcount', '/api/analytics/headcount/', {'interval': 'quarter'}, NO_SCANS),
+        ('cohort retention', '/api/analytics/cohort-retention/', {'cohort': 'month'}, NO_SCANS),
+        ('attendance trend', '/api/analytics/attendance/', {'interval': 'week'}, NO_SCANS),
+        ('employee attendance trend', '/api/analytics/attendance/', {'group_by': 'employee', 'employee': str(employee.id)}, NO_SCANS),
+        ('review scorecard', '/api/analytics/review-scorecard/', {}, UNBOUNDED_SCANS),
+        ('employee export', '/api/export/employees/', {'department': employee.department}, UNBOUNDED_SCANS),
+    ]
+
+
+def capture_queries(path, params):
+    """Run a route in-process and return the SQL of the SELECTs it executed."""
+    request = APIRequestFactory(SERVER_NAME=allowed_host()).get(path, params)
+    force_authenticate(request, user=User(username='query-plan-check'))
+    match = resolve(path)
+
+    # A version of its own per call, so analytics are computed rather than
+    # served from the cache, without invalidating anyone else's entries
+    versions = itertools.count(int(time.time() * 1000))
+    with CaptureQueriesContext(connection) as captured, \
+            mock.patch.object(APIView, 'check_throttles', lambda self, request: None), \
+            mock.patch('employees.caching.data_version', lambda: next(versions)):
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.render()
+    if response.status_code >= 400:
+        raise CommandError(f'{path} returned {response.status_code}')
+    statements = (DECLARE_CURSOR.sub('', query['sql'].lstrip()) for query in captured.captured_queries)
+    return [sql for sql in statements if sql.upper().startswith('SELECT')]
+
+
+def explain(sql):
+    """Return the plan of ``sql`` and the large tables it scans sequentially."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return plan, sorted(_postgres_seq_scans(plan[0]['Plan']))
+
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[-1] for row in cursor.fetchall()]
+        return plan, sorted(_sqlite_full_scans(plan))
+
+
+def _postgres_seq_scans(node):
+    tables = set()
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in LARGE_TABLES:
+        tables.add(node['Relation Name'])
+    for child in node.get('Plans', []):
+        tables |= _postgres_seq_scans(child)
+    return tables
+
+
+def _sqlite_full_scans(details):
+    # "SCAN employees_employee" is a full scan; "SCAN ... USING (COVERING) INDEX" is not
+    tables = set()
+    for detail in details:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] in LARGE_TABLES and 'USING' not in words:
+            tables.add(words[1])
+    return tables
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every list, filter and analytics query and fail on sequential scans of large tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Refresh planner statistics before checking')
+        parser.add_argument('--output', help='Write the captured plans to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        report = []
+        failures = []
+        for name, path, params, allowed in plan_routes():
+            for sql in capture_queries(path, params):
+                plan, scanned = explain(sql)
+                report.append({'route': name, 'path': path, 'params': params, 'sql': sql, 'plan': plan, 'seq_scans': scanned})
+                if scanned and not scan_allowed(sql, allowed):
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"FAIL {name}: sequential scan of {', '.join(scanned)}"))
+                    self.stdout.write(f'     {sql[:200]}')
+            if name not in failures:
+                self.stdout.write(self.style.SUCCESS(f'ok   {name}'))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, default=str)
+
+        if failures:
+            raise CommandError(f'{len(set(failures))} routes regressed to sequential scans')
+        self.stdout.write(self.style.SUCCESS(f'Checked {len(report)} queries, no unexpected sequential scans'))
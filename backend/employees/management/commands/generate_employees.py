@@ -1,7 +1,19 @@
 
+import secrets
+import time
+from datetime import date, datetime, time as dt_time, timezone as dt_timezone
+
 from django.core.management.base import BaseCommand
-from employees.factories import EmployeeFactory, AttendanceFactory, PerformanceReviewFactory
-from employees.models import Employee
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from employees.generation import GenerationJob, default_load_method, run_blocks, split_blocks
+from employees.caching import bump_data_version
+from employees.cohorts import refresh_hire_cohorts
+from employees.models import Attendance, CohortDeparture, Employee, PerformanceReview
+from employees.rollups import refresh_attendance_rollups
+from employees.snapshots import refresh_department_stats, refresh_gender_distribution
 
 class Command(BaseCommand):
     help = 'Generate synthetic employee data'
@@ -11,44 +23,81 @@ class Command(BaseCommand):
         parser.add_argument('--attendance_per_employee', type=int, default=30, help='Number of attendance records per employee')
         parser.add_argument('--reviews_per_employee', type=int, default=2, help='Number of performance reviews per employee')
         parser.add_argument('--clean', action='store_true', help='Clean existing data before generating new data')
+        parser.add_argument('--batch_size', type=int, default=1000, help='Number of employees generated and loaded per chunk')
+        parser.add_argument(
+            '--loader', choices=['copy', 'insert'], default=None,
+            help='Load rows with Postgres COPY or batched INSERTs (defaults to COPY on Postgres)'
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Random seed; the same seed, batch size and --as_of date produce identical data for any --workers'
+        )
+        parser.add_argument(
+            '--as_of', type=date.fromisoformat, default=None,
+            help='Date (YYYY-MM-DD) that generated dates are relative to (defaults to today)'
+        )
 
     def handle(self, *args, **options):
         if options['clean']:
             self.stdout.write('Cleaning existing data...')
-            Employee.objects.all().delete()
+            # Truncate rather than delete through the ORM, which would load every
+            # row to run the cascade and the cache invalidation signals. Cleaned
+            # employees did not leave, so their departures are not recorded
+            tables = [model._meta.db_table for model in (Attendance, PerformanceReview, Employee, CohortDeparture)]
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql in connection.ops.sql_flush(no_style(), tables, allow_cascade=True):
+                    cursor.execute(sql)
             self.stdout.write(self.style.SUCCESS('Data cleaned successfully'))
 
-        employee_count = 200  # Fixed to generate exactly 200 employees
-        attendance_per_employee = 30  # 30 attendance records per employee
-        reviews_per_employee = 2  # 2 performance reviews per employee
-        
-        self.stdout.write(f'Generating {employee_count} employees...')
-        
-        # Generate employees in smaller batches to avoid memory issues
-        batch_size = 50
-        for i in range(0, employee_count, batch_size):
-            batch_count = min(batch_size, employee_count - i)
-            employees = EmployeeFactory.create_batch(batch_count)
-            self.stdout.write(f'Generated batch of {batch_count} employees ({i+batch_count}/{employee_count})')
-        
-        if attendance_per_employee > 0:
-            self.stdout.write(f'Generating attendance records ({attendance_per_employee} per employee)...')
-            for employee in Employee.objects.all():
-                for _ in range(attendance_per_employee):
-                    AttendanceFactory.create(employee=employee)
-            self.stdout.write(self.style.SUCCESS(f'Generated {employee_count * attendance_per_employee} attendance records'))
-        
-        if reviews_per_employee > 0:
-            self.stdout.write(f'Generating performance reviews ({reviews_per_employee} per employee)...')
-            employees_list = list(Employee.objects.all())
-            for employee in employees_list:
-                for _ in range(reviews_per_employee):
-                    # Get a different employee as reviewer
-                    reviewer = employee
-                    while reviewer == employee:
-                        reviewer = employees_list[0] if len(employees_list) == 1 else employees_list[employees_list.index(employee) - 1]
-                    
-                    PerformanceReviewFactory.create(employee=employee, reviewer=reviewer)
-            self.stdout.write(self.style.SUCCESS(f'Generated {employee_count * reviews_per_employee} performance reviews'))
-        
-        self.stdout.write(self.style.SUCCESS('Successfully generated synthetic employee data'))
+        employee_count = options['employees']
+        attendance_per_employee = options['attendance_per_employee']
+        reviews_per_employee = options['reviews_per_employee']
+        batch_size = max(1, options['batch_size'])
+        load_method = options['loader'] or default_load_method()
+        today = options['as_of'] or timezone.now().date()
+
+        workers = max(1, options['workers'])
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; ignoring --workers'))
+            workers = 1
+
+        # Seeded runs also pin created_at/updated_at so that reruns are identical
+        seed = options['seed']
+        timestamp = None
+        if seed is not None:
+            timestamp = datetime.combine(today, dt_time.min, tzinfo=dt_timezone.utc)
+        else:
+            seed = secrets.randbits(32)
+
+        self.stdout.write(
+            f'Generating {employee_count} employees with {attendance_per_employee} attendance records '
+            f'and {reviews_per_employee} reviews each (loader: {load_method}, workers: {workers}, seed: {seed})...'
+        )
+
+        job = GenerationJob(seed, attendance_per_employee, reviews_per_employee, today, load_method, timestamp)
+        totals = {'employees': 0, 'attendance': 0, 'reviews': 0}
+        started = time.perf_counter()
+
+        for counts in run_blocks(job, split_blocks(employee_count, batch_size), workers):
+            for key, value in counts.items():
+                totals[key] += value
+            self.stdout.write(
+                f"Generated batch of {counts['employees']} employees ({totals['employees']}/{employee_count})"
+            )
+
+        elapsed = time.perf_counter() - started
+
+        # Bulk loading bypasses the model signals that keep the snapshots current
+        refresh_department_stats()
+        refresh_gender_distribution()
+        refresh_attendance_rollups()
+        refresh_hire_cohorts()
+        bump_data_version()
+
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {totals['employees']} employees, {totals['attendance']} attendance records and "
+            f"{totals['reviews']} performance reviews: {rows} rows in {elapsed:.2f}s "
+            f'({rows / elapsed if elapsed else 0:,.0f} rows/sec)'
+        ))
@@ -0,0 +1,53 @@
+
+from django.core.management.base import BaseCommand
+
+from employees.caching import bump_data_version
+from employees.cohorts import hire_dates_changed_since, last_cohort_refresh, refresh_hire_cohorts
+from employees.models import DepartmentStatsSnapshot, GenderDistributionSnapshot
+from employees.rollups import dates_changed_since, last_rolled_up, refresh_attendance_rollups
+from employees.snapshots import (
+    changed_since,
+    last_refreshed,
+    refresh_department_stats,
+    refresh_gender_distribution,
+)
+
+class Command(BaseCommand):
+    help = 'Refresh the pre-aggregated analytics snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every group instead of only those changed since the last refresh'
+        )
+
+    def handle(self, *args, **options):
+        timestamps = [last_refreshed(DepartmentStatsSnapshot), last_refreshed(GenderDistributionSnapshot)]
+        rolled_up = last_rolled_up()
+        cohorts_refreshed = last_cohort_refresh()
+
+        if options['full'] or None in timestamps or rolled_up is None or cohorts_refreshed is None:
+            departments = refresh_department_stats()
+            genders = refresh_gender_distribution()
+            rollups = refresh_attendance_rollups()
+            cohorts = refresh_hire_cohorts()
+            bump_data_version()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt snapshots for {departments} departments and {genders} genders, '
+                f'{rollups} attendance rollup rows and {cohorts} hire cohorts'
+            ))
+            return
+
+        # Rows written with raw SQL or deleted outside the ORM need --full
+        changed_departments, changed_genders = changed_since(min(timestamps))
+        changed_dates = dates_changed_since(rolled_up)
+        changed_hire_dates = hire_dates_changed_since(cohorts_refreshed)
+        refresh_department_stats(changed_departments)
+        refresh_gender_distribution(changed_genders)
+        refresh_attendance_rollups(changed_dates)
+        refresh_hire_cohorts(changed_hire_dates)
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {len(changed_departments)} changed departments, {len(changed_genders)} changed genders, '
+            f'{len(changed_dates)} changed attendance dates and {len(changed_hire_dates)} changed hire dates'
+        ))
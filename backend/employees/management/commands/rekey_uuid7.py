@@ -0,0 +1,116 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, models, transaction
+
+from employees.caching import bump_data_version
+from employees.models import Attendance, Employee, PerformanceReview
+from employees.uuids import uuid7_at
+
+MODELS = {'employee': Employee, 'attendance': Attendance, 'review': PerformanceReview}
+# A batch waiting longer than this for a row lock gives up and is retried
+LOCK_TIMEOUT_MS = 2000
+MAX_RETRIES = 5
+
+
+def referencing_columns(model):
+    """``(table, column)`` of every foreign key pointing at ``model``'s primary key."""
+    return [
+        (relation.related_model._meta.db_table, relation.field.column)
+        for relation in model._meta.related_objects
+        if isinstance(relation.field, models.ForeignKey)
+    ]
+
+
+def remap(cursor, table, column, mapping):
+    """Rewrite ``column`` of ``table`` from old to new values in one statement."""
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['(%s, %s)'] * len(mapping))
+    cursor.execute(
+        f'WITH mapping (old, new) AS (VALUES {placeholders}) '
+        f'UPDATE {quote(table)} SET {quote(column)} = mapping.new FROM mapping '
+        f'WHERE {quote(table)}.{quote(column)} = mapping.old',
+        [value for pair in mapping for value in pair],
+    )
+
+
+def rekey_batch(model, rows):
+    """Give ``rows`` (pk, created_at) version-7 keys and update every foreign key to them.
+
+    Runs in one transaction; the foreign key constraints are deferred, so
+    they are checked once the keys and the references to them all match.
+    """
+    pk = model._meta.pk
+    mapping = [
+        (pk.get_db_prep_value(old, connection), pk.get_db_prep_value(uuid7_at(created_at), connection))
+        for old, created_at in rows
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'SET LOCAL lock_timeout = {LOCK_TIMEOUT_MS}')
+        remap(cursor, model._meta.db_table, pk.column, mapping)
+        for table, column in referencing_columns(model):
+            remap(cursor, table, column, mapping)
+
+
+class Command(BaseCommand):
+    help = 'Rewrite random (version-4) primary keys as time-ordered UUIDv7 keys, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models', default=','.join(MODELS),
+            help=f"Comma-separated models to rekey (default: {','.join(MODELS)})"
+        )
+        parser.add_argument('--batch_size', type=int, default=500, help='Rows rekeyed per transaction')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['models'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in MODELS]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}. Choose from: {', '.join(MODELS)}.")
+
+        batch_size = max(1, options['batch_size'])
+        total = 0
+        for name in names:
+            total += self.rekey(name, MODELS[name], batch_size, options['sleep'])
+        if total:
+            # Cached responses and the column store still hold the old keys
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Rekeyed {total} rows'))
+
+    def rekey(self, name, model, batch_size, sleep):
+        """Walk the table in primary key order, rekeying rows that are not version 7 yet.
+
+        Rekeyed rows may land ahead of the walk again; they are skipped, so an
+        interrupted run can simply be started again.
+        """
+        rekeyed = 0
+        last = None
+        started = time.perf_counter()
+        while True:
+            queryset = model.objects.order_by('pk')
+            if last is not None:
+                queryset = queryset.filter(pk__gt=last)
+            rows = list(queryset.values_list('pk', 'created_at')[:batch_size])
+            if not rows:
+                break
+            last = rows[-1][0]
+            rows = [(pk, created_at) for pk, created_at in rows if pk.version != 7]
+            if not rows:
+                continue
+
+            for attempt in range(MAX_RETRIES):
+                try:
+                    rekey_batch(model, rows)
+                    break
+                except OperationalError as exc:
+                    # Lock timeout (or SQLite busy): back off and try the batch again
+                    if attempt == MAX_RETRIES - 1:
+                        raise CommandError(f'Gave up on a {name} batch after {MAX_RETRIES} attempts: {exc}')
+                    time.sleep(0.5 * 2 ** attempt)
+            rekeyed += len(rows)
+            self.stdout.write(f'{name}: {rekeyed} rows rekeyed ({rekeyed / (time.perf_counter() - started):.0f}/s)')
+            if sleep:
+                time.sleep(sleep)
+        return rekeyed
@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+
+from employees.jobs import claim_next_job, purge_expired_jobs, requeue_stale_jobs, run_job, worker_name
+
+# Seconds between sweeps for stale and expired jobs
+MAINTENANCE_INTERVAL = 60
+
+
+def _stop(signum, frame):
+    # Raised inside run_job, which puts the job back in the queue
+    raise SystemExit(0)
+
+
+def work(poll, once):
+    """Claim and run jobs until interrupted, or until the queue is empty with ``once``."""
+    signal.signal(signal.SIGTERM, _stop)
+    worker = worker_name()
+    swept_at = 0
+    try:
+        while True:
+            if time.monotonic() - swept_at >= MAINTENANCE_INTERVAL:
+                requeue_stale_jobs()
+                purge_expired_jobs()
+                swept_at = time.monotonic()
+
+            job = claim_next_job(worker)
+            if job is not None:
+                run_job(job)
+            elif once:
+                return
+            else:
+                close_old_connections()
+                time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run queued export and report jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait between checks of an empty queue')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        if workers > 1 and connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; ignoring --workers'))
+            workers = 1
+        self.stdout.write(f'Running jobs in {workers} worker process(es)')
+
+        if workers == 1:
+            work(options['poll'], options['once'])
+            return
+
+        # Forked workers must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=work, args=(options['poll'], options['once'])) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, _stop)
+        try:
+            for process in processes:
+                process.join()
+        except (KeyboardInterrupt, SystemExit):
+            # Ctrl+C reaches the workers too; pass SIGTERM on. Each puts its current job back in the queue.
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
@@ -0,0 +1,313 @@
+
+import atexit
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = getattr(settings, 'METRICS_ENABLED', True)
+# Fraction of requests whose queries and rendering are instrumented; request
+# counts, latency and response size are always recorded
+METRICS_SAMPLE_RATE = getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+METRICS_EXCLUDED_PATHS = set(getattr(settings, 'METRICS_EXCLUDED_PATHS', ['/metrics']))
+# Requests slower than this, or running more queries than this, are flagged
+SLOW_REQUEST_MS = getattr(settings, 'SLOW_REQUEST_MS', 500)
+SLOW_REQUEST_QUERIES = getattr(settings, 'SLOW_REQUEST_QUERIES', 50)
+# Seconds between publishing this process's metrics to METRICS_DIR
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+# One file per worker process; /metrics sums them. Clear it when deploying.
+METRICS_DIR = getattr(settings, 'METRICS_DIR', os.path.join(settings.BASE_DIR, 'metrics'))
+# Slowest statements kept per request for the slow request log
+SLOWEST_QUERIES = 3
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests served', None),
+    'http_request_duration_seconds': (
+        'histogram', 'Request latency',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Response body size (streaming responses excluded)',
+        (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+    ),
+    'http_requests_sampled_total': ('counter', 'Requests whose queries and rendering were instrumented', None),
+    'http_slow_requests_total': ('counter', 'Requests over the latency or query count threshold', None),
+    'db_queries_per_request': ('histogram', 'Queries run per sampled request', (0, 1, 2, 5, 10, 20, 50, 100, 500)),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in queries by sampled requests', None),
+    'analytics_cache_requests_total': ('counter', 'Cached analytics requests by result (hit or miss)', None),
+    'response_render_duration_seconds': (
+        'histogram', 'Time spent rendering (serializing) sampled responses',
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+}
+
+
+class Registry:
+    """Thread-safe in-process counters and histograms with Prometheus text output."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self._flushed_at = 0.0
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {key: [list(counts), total, count] for key, (counts, total, count) in self.histograms.items()},
+            }
+
+    def maybe_flush(self):
+        """Publish a snapshot for other workers' ``/metrics`` at most once per interval."""
+        now = time.monotonic()
+        if now - self._flushed_at < METRICS_FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+        try:
+            publish()
+        except Exception:
+            logger.exception('Could not publish metrics')
+
+
+registry = Registry()
+
+
+_process = {}
+_publish_lock = threading.Lock()
+
+
+def _process_file():
+    """This process's snapshot file, named so that a reused pid never overwrites a dead worker's."""
+    pid = os.getpid()
+    if _process.get('pid') != pid:
+        _process.update(pid=pid, file=f'{socket.gethostname()}-{pid}-{time.time_ns()}.json')
+    return os.path.join(METRICS_DIR, _process['file'])
+
+
+def publish():
+    """Write this process's metrics to its file, atomically."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _process_file()
+    with _publish_lock:
+        # Snapshot under the lock, so an older snapshot never replaces a newer one
+        snapshot = registry.snapshot()
+        payload = {
+            'counters': [[name, labels, value] for (name, labels), value in snapshot['counters'].items()],
+            'histograms': [[name, labels, *histogram] for (name, labels), histogram in snapshot['histograms'].items()],
+        }
+        with open(f'{path}.tmp', 'w') as output:
+            json.dump(payload, output)
+        os.replace(f'{path}.tmp', path)
+
+
+def _load(path):
+    with open(path) as source:
+        payload = json.load(source)
+
+    def key(name, labels):
+        return name, tuple(tuple(pair) for pair in labels)
+
+    return {
+        'counters': {key(name, labels): value for name, labels, value in payload['counters']},
+        'histograms': {key(name, labels): [counts, total, count] for name, labels, counts, total, count in payload['histograms']},
+    }
+
+
+def collect():
+    """The metrics of every worker that has run on this host, summed.
+
+    This process publishes first, then every file is read, so each worker
+    contributes what it last published: between two scrapes that number
+    only grows, whichever worker serves them. Files of workers that have
+    exited are kept, so counters never go back while the directory lives.
+    """
+    merged = {'counters': {}, 'histograms': {}}
+    try:
+        publish()
+        paths = [os.path.join(METRICS_DIR, name) for name in os.listdir(METRICS_DIR) if name.endswith('.json')]
+    except OSError:
+        logger.exception('Could not publish metrics')
+        return registry.snapshot()
+
+    for path in paths:
+        try:
+            snapshot = _load(path)
+        except (OSError, ValueError):
+            logger.exception('Could not read metrics from %s', path)
+            continue
+        for key, value in snapshot['counters'].items():
+            merged['counters'][key] = merged['counters'].get(key, 0) + value
+        for key, (counts, total, count) in snapshot['histograms'].items():
+            mine = merged['histograms'].setdefault(key, [[0] * len(counts), 0.0, 0])
+            mine[0] = [a + b for a, b in zip(mine[0], counts)]
+            mine[1] += total
+            mine[2] += count
+    return merged
+
+
+@atexit.register
+def _flush_at_exit():
+    # Keep what this worker counted since its last publish
+    if registry.counters or registry.histograms:
+        try:
+            publish()
+        except OSError:
+            pass
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_prometheus(snapshot):
+    """Format a snapshot in the Prometheus text exposition format (0.0.4)."""
+    by_name = defaultdict(list)
+    for (name, labels), value in snapshot['counters'].items():
+        by_name[name].append((labels, value))
+    for (name, labels), value in snapshot['histograms'].items():
+        by_name[name].append((labels, value))
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name.get(name, []), key=lambda item: item[0]):
+            if kind == 'counter':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", str(bound))])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and times queries and keeps the slowest few."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.slowest) < SLOWEST_QUERIES or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, sql))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[SLOWEST_QUERIES:]
+
+
+class InstrumentationMiddleware:
+    """Record latency, query count and time, render time and response size per view.
+
+    Metrics are labelled with the URL name, not the path, to keep their
+    cardinality bounded. See :func:`render_prometheus` for the output.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not METRICS_ENABLED or request.path in METRICS_EXCLUDED_PATHS:
+            return self.get_response(request)
+
+        sampled = METRICS_SAMPLE_RATE >= 1 or random.random() < METRICS_SAMPLE_RATE
+        recorder = QueryRecorder() if sampled else None
+        request._render_timing = {} if sampled else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if sampled:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        self.record(request, response, elapsed, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time just the rendering
+        timing = getattr(request, '_render_timing', None)
+        if timing is not None:
+            timing['started'] = time.perf_counter()
+
+            def rendered(response):
+                # A callback's return value would replace the response, so return nothing
+                timing.setdefault('elapsed', time.perf_counter() - timing['started'])
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def record(self, request, response, elapsed, recorder):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+        labels = (('view', view),)
+
+        registry.inc('http_requests_total', labels + (('method', request.method), ('status', str(response.status_code))))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        if not response.streaming:
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+
+        if recorder is not None:
+            registry.inc('http_requests_sampled_total', labels)
+            registry.observe('db_queries_per_request', labels, recorder.count)
+            registry.inc('db_query_duration_seconds_total', labels, recorder.duration)
+            if 'elapsed' in request._render_timing:
+                registry.observe('response_render_duration_seconds', labels, request._render_timing['elapsed'])
+
+            if elapsed * 1000 >= SLOW_REQUEST_MS or recorder.count >= SLOW_REQUEST_QUERIES:
+                registry.inc('http_slow_requests_total', labels)
+                logger.warning(
+                    'Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms; slowest: %s',
+                    request.method, request.get_full_path(), view, elapsed * 1000, recorder.count,
+                    recorder.duration * 1000,
+                    ' | '.join(f'{duration * 1000:.1f} ms {sql[:300]}' for duration, sql in recorder.slowest) or 'none',
+                )
+
+        registry.maybe_flush()
@@ -0,0 +1,22 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .metrics import collect, render_prometheus
+
+# Scrapers must send "Authorization: Bearer <METRICS_TOKEN>"; without a token
+# the endpoint is only served when DEBUG is on
+METRICS_TOKEN = getattr(settings, 'METRICS_TOKEN', None)
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint for the request instrumentation metrics"""
+    if METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f'Bearer {METRICS_TOKEN}'):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        return HttpResponse('Set METRICS_TOKEN to serve metrics with DEBUG off.', status=403, content_type='text/plain')
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Employee',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('gender', models.CharField(max_length=20)),
+                ('age', models.IntegerField()),
+                ('department', models.CharField(max_length=100)),
+                ('position', models.CharField(max_length=100)),
+                ('salary', models.IntegerField()),
+                ('hire_date', models.DateField()),
+                ('performance_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('hours_worked', models.DecimalField(decimal_places=1, max_digits=4)),
+                ('late_minutes', models.IntegerField(default=0)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='employees.employee')),
+            ],
+            options={
+                'unique_together': {('employee', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PerformanceReview',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('review_date', models.DateField()),
+                ('communication_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('teamwork_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('technical_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('leadership_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('overall_score', models.DecimalField(decimal_places=1, max_digits=3)),
+                ('comments', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_reviews', to='employees.employee')),
+                ('reviewer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviews_given', to='employees.employee')),
+            ],
+            options={
+                'unique_together': {('employee', 'review_date')},
+            },
+        ),
+    ]
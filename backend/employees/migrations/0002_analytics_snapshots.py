@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100, unique=True)),
+                ('employee_count', models.IntegerField()),
+                ('average_salary', models.FloatField()),
+                ('average_performance', models.FloatField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GenderDistributionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gender', models.CharField(max_length=20, unique=True)),
+                ('count', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
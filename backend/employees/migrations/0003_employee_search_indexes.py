@@ -0,0 +1,55 @@
+# Search indexes for employees.search. They are PostgreSQL-specific, so they
+# are created with SQL on PostgreSQL only and other databases are left as is.
+
+from django.db import migrations
+
+SEARCH_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "COALESCE(first_name, '') || ' ' || COALESCE(last_name, '') || ' ' || "
+    "COALESCE(email, '') || ' ' || COALESCE(department, '') || ' ' || COALESCE(position, ''))"
+)
+
+TRIGRAM_FIELDS = ['first_name', 'last_name', 'email']
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS employee_search_document_idx '
+        f'ON employees_employee USING gin ({SEARCH_DOCUMENT})'
+    )
+
+    # pg_trgm ships with the standard contrib package; skip substring indexes without it
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in TRIGRAM_FIELDS:
+        # Matches the UPPER(column::text) LIKE UPPER(...) that icontains compiles to
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS employee_{field}_trgm_idx '
+            f'ON employees_employee USING gin ((UPPER({field}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS employee_search_document_idx')
+    for field in TRIGRAM_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS employee_{field}_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_analytics_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=50)),
+                ('record_count', models.IntegerField()),
+                ('hours_worked_total', models.DecimalField(decimal_places=1, max_digits=12)),
+                ('late_minutes_total', models.BigIntegerField()),
+                ('late_count', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', 'date'], name='rollup_department_date_idx')],
+                'unique_together': {('date', 'department', 'status')},
+            },
+        ),
+    ]
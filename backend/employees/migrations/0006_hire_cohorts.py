@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_attendance_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HireCohort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hire_date', models.DateField(unique=True)),
+                ('employees', models.IntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CohortDeparture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hire_date', models.DateField()),
+                ('departed_on', models.DateField()),
+                ('employees', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['departed_on'], name='departure_departed_on_idx')],
+                'unique_together': {('hire_date', 'departed_on')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:24
+
+import employees.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='id',
+            field=models.UUIDField(default=employees.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='id',
+            field=models.UUIDField(default=employees.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='id',
+            field=models.UUIDField(default=employees.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='performancereview',
+            name='id',
+            field=models.UUIDField(default=employees.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,10 +1,12 @@
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
-import uuid
+
+from .uuids import uuid7
 
 class Employee(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
@@ -18,11 +20,26 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Default list ordering and keyset pagination
+            models.Index(fields=['-created_at', '-id'], name='employee_created_idx'),
+            # Department filter; also covers the per-department stats refresh
+            models.Index(fields=['department', 'salary', 'performance_score'], name='employee_department_idx'),
+            models.Index(fields=['position', 'department'], name='employee_position_idx'),
+            models.Index(fields=['gender'], name='employee_gender_idx'),
+            models.Index(fields=['salary'], name='employee_salary_idx'),
+            models.Index(fields=['age'], name='employee_age_idx'),
+            models.Index(fields=['hire_date'], name='employee_hire_date_idx'),
+            # Incremental snapshot refresh looks up recently updated employees
+            models.Index(fields=['updated_at'], name='employee_updated_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 class Attendance(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance')
     date = models.DateField()
     status = models.CharField(max_length=50)  # present, absent, late, etc.
@@ -33,12 +50,17 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ['employee', 'date']
+        indexes = [
+            # Date filter, default ordering and keyset pagination
+            models.Index(fields=['-date', '-id'], name='attendance_date_idx'),
+            models.Index(fields=['status', '-date'], name='attendance_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.employee} - {self.date}"
 
 class PerformanceReview(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='performance_reviews')
     review_date = models.DateField()
     reviewer = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, related_name='reviews_given')
@@ -52,6 +74,127 @@ class PerformanceReview(models.Model):
 
     class Meta:
         unique_together = ['employee', 'review_date']
+        indexes = [
+            models.Index(fields=['-review_date', '-id'], name='review_date_idx'),
+        ]
 
     def __str__(self):
         return f"Review for {self.employee} on {self.review_date}"
+
+# Pre-aggregated analytics snapshots, kept current by employees.signals and
+# the refresh_analytics management command
+class DepartmentStatsSnapshot(models.Model):
+    department = models.CharField(max_length=100, unique=True)
+    employee_count = models.IntegerField()
+    average_salary = models.FloatField()
+    average_performance = models.FloatField()
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.department} stats as of {self.refreshed_at}"
+
+class GenderDistributionSnapshot(models.Model):
+    gender = models.CharField(max_length=20, unique=True)
+    count = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.gender} count as of {self.refreshed_at}"
+
+# Attendance aggregated per day, department and status, maintained by employees.rollups
+class AttendanceDailyRollup(models.Model):
+    date = models.DateField()
+    department = models.CharField(max_length=100)
+    status = models.CharField(max_length=50)
+    record_count = models.IntegerField()
+    hours_worked_total = models.DecimalField(max_digits=12, decimal_places=1)
+    late_minutes_total = models.BigIntegerField()
+    late_count = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['date', 'department', 'status']
+        indexes = [
+            models.Index(fields=['department', 'date'], name='rollup_department_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.department} {self.status} on {self.date}"
+
+# Employees per hire date, and the employees of each hire date deleted on each
+# day, maintained by employees.cohorts. Both grow with the calendar rather
+# than the headcount, so as-of analytics never scan employees.
+class HireCohort(models.Model):
+    hire_date = models.DateField(unique=True)
+    employees = models.IntegerField()
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.employees} hired on {self.hire_date}"
+
+class CohortDeparture(models.Model):
+    hire_date = models.DateField()
+    departed_on = models.DateField()
+    employees = models.IntegerField()
+
+    class Meta:
+        unique_together = ['hire_date', 'departed_on']
+        indexes = [
+            models.Index(fields=['departed_on'], name='departure_departed_on_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employees} hired on {self.hire_date} left on {self.departed_on}"
+
+# The analytics data version (see employees.caching): one row, bumped with an
+# atomic UPDATE so that concurrent writers in any process never collide.
+class DataVersion(models.Model):
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"Data version {self.version}"
+
+# Exports and reports run by the run_jobs workers; see employees.jobs
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+    ACTIVE = (QUEUED, RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    # Hash of kind and params; identical active jobs are merged on it
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    rows_done = models.BigIntegerField(default=0)
+    rows_total = models.BigIntegerField(null=True, blank=True)
+    file_name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint'], condition=models.Q(status__in=['queued', 'running']),
+                name='job_active_fingerprint_uniq',
+            ),
+        ]
+        indexes = [
+            # Workers claim the oldest queued job and look for stale running ones
+            models.Index(fields=['status', 'created_at'], name='job_status_idx'),
+            models.Index(fields=['finished_at'], name='job_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
@@ -0,0 +1,189 @@
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+KEYSET_PAGE_SIZE = getattr(settings, 'KEYSET_PAGE_SIZE', settings.REST_FRAMEWORK.get('PAGE_SIZE') or 10)
+KEYSET_MAX_PAGE_SIZE = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 1000)
+
+
+def approximate_count(queryset):
+    """Estimate the row count of ``queryset`` without ``COUNT(*)``.
+
+    On PostgreSQL an unfiltered queryset uses the table statistics in
+    ``pg_class.reltuples`` and a filtered one uses the planner's row estimate.
+    Other databases fall back to an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 for a table that has never been analyzed
+        if row and row[0] >= 0:
+            return row[0]
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """Keyset (seek) pagination over a unique ordering such as ``('-created_at', '-id')``.
+
+    The cursor holds the ordering values of the last row served, so every
+    page is an index range scan with no ``OFFSET`` and no ``COUNT(*)``. Pass
+    ``?count=approximate`` or ``?count=exact`` to include a total.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    page_size = KEYSET_PAGE_SIZE
+    max_page_size = KEYSET_MAX_PAGE_SIZE
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+
+    @classmethod
+    def requested(cls, request):
+        """Keyset mode is opt-in via ``?pagination=keyset`` or a cursor."""
+        params = request.query_params
+        return params.get('pagination') == 'keyset' or cls.cursor_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _encode_cursor(self, row, reverse):
+        # Rows are model instances or, on the fast list path, values() dicts
+        if isinstance(row, dict):
+            values = [str(row[name]) for name, _ in self._fields()]
+        else:
+            values = [str(getattr(row, name)) for name, _ in self._fields()]
+        payload = json.dumps({'v': values, 'r': reverse}).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+
+    def _decode_cursor(self, model, encoded):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self._fields(), payload['v'], strict=True)
+            ]
+            return values, bool(payload['r'])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+
+    def _seek(self, values, reverse):
+        """Filter for rows strictly after (or, reversed, before) ``values`` in the ordering."""
+        fields = self._fields()
+        condition = Q()
+        for index, (name, descending) in enumerate(fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for (previous_name, _), value in zip(fields[:index], values):
+                step &= Q(**{previous_name: value})
+            condition |= step
+        # The redundant bound on the leading column lets an index range scan start at the cursor
+        name, descending = fields[0]
+        lookup = 'lte' if descending != reverse else 'gte'
+        return Q(**{f'{name}__{lookup}': values[0]}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        count_mode = request.query_params.get(self.count_query_param)
+        self.count = None
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'approximate':
+            self.count = approximate_count(queryset)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if encoded:
+            values, reverse = self._decode_cursor(queryset.model, encoded)
+            queryset = queryset.filter(self._seek(values, reverse))
+
+        ordering = list(self.ordering)
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking backwards always leaves a next page; walking forwards from a cursor, a previous one
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                self.next_cursor = self._encode_cursor(rows[-1], reverse=False)
+            if encoded and (has_more or not reverse):
+                self.previous_cursor = self._encode_cursor(rows[0], reverse=True)
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'pagination')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        payload = [
+            ('next', self._link(self.next_cursor)),
+            ('previous', self._link(self.previous_cursor)),
+        ]
+        if self.count is not None:
+            payload.insert(0, ('count', self.count))
+        payload.append(('results', data))
+        return Response(OrderedDict(payload))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Present when ?count= is given'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """Lets a viewset switch from its page-number pagination to keyset pagination on request.
+
+    Set ``keyset_ordering`` to a unique ordering, e.g. ``('-created_at', '-id')``.
+    """
+    keyset_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.keyset_ordering and KeysetPagination.requested(self.request):
+            self._paginator = KeysetPagination(self.keyset_ordering)
+        return super().paginator
@@ -0,0 +1,223 @@
+
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Max, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Attendance, AttendanceDailyRollup
+
+# Statuses that count towards the presence rate
+PRESENT_STATUSES = {'Present', 'Late', 'Remote', 'Half-Day'}
+
+INTERVALS = ('day', 'week', 'month')
+GROUPINGS = ('department', 'employee')
+DEFAULT_WINDOW_DAYS = 90
+# Longest range a single request may span
+MAX_WINDOW_DAYS = 366 * 3
+
+
+def refresh_attendance_rollups(dates=None):
+    """Recompute the daily rollup rows for ``dates`` (every date when None).
+
+    Rows are rebuilt a whole date at a time with one grouped query per call.
+    """
+    attendance = Attendance.objects.all()
+    rollups = AttendanceDailyRollup.objects.all()
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return 0
+        attendance = attendance.filter(date__in=dates)
+        rollups = rollups.filter(date__in=dates)
+
+    refreshed_at = timezone.now()
+    rows = [
+        AttendanceDailyRollup(refreshed_at=refreshed_at, **row)
+        for row in attendance
+            .values('date', 'status', department=F('employee__department'))
+            .annotate(
+                record_count=Count('id'),
+                hours_worked_total=Sum('hours_worked'),
+                late_minutes_total=Sum('late_minutes'),
+                late_count=Count('id', filter=Q(late_minutes__gt=0)),
+            )
+            .order_by()
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        AttendanceDailyRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def adjust_attendance_rollup(date, department, status, hours_worked, late_minutes, sign=1):
+    """Add one attendance row's values to its rollup row, or take them away with ``sign=-1``.
+
+    Touches a single rollup row instead of recomputing the date. Returns False
+    when there is no row to take the values from, so the date must be recomputed.
+    """
+    hours_worked = Decimal(str(hours_worked or 0))
+    late_minutes = late_minutes or 0
+    late = 1 if late_minutes > 0 else 0
+    rollups = AttendanceDailyRollup.objects.filter(date=date, department=department, status=status)
+    changes = {
+        'record_count': F('record_count') + sign,
+        'hours_worked_total': F('hours_worked_total') + sign * hours_worked,
+        'late_minutes_total': F('late_minutes_total') + sign * late_minutes,
+        'late_count': F('late_count') + sign * late,
+        'refreshed_at': timezone.now(),
+    }
+    if rollups.update(**changes):
+        if sign < 0:
+            # A full recompute has no rows for groups without records
+            rollups.filter(record_count__lte=0).delete()
+        return True
+    if sign < 0:
+        return False
+
+    try:
+        with transaction.atomic():
+            AttendanceDailyRollup.objects.create(
+                date=date, department=department, status=status, record_count=1,
+                hours_worked_total=hours_worked, late_minutes_total=late_minutes, late_count=late,
+                refreshed_at=changes['refreshed_at'],
+            )
+    except IntegrityError:
+        # A concurrent writer created the row first
+        rollups.update(**changes)
+    return True
+
+
+def last_rolled_up():
+    return AttendanceDailyRollup.objects.aggregate(refreshed_at=Max('refreshed_at'))['refreshed_at']
+
+
+def dates_changed_since(timestamp):
+    """Dates with attendance recorded after ``timestamp``."""
+    return set(Attendance.objects.filter(created_at__gt=timestamp).values_list('date', flat=True).distinct())
+
+
+def parse_trend_params(params):
+    """Validate trend query parameters; the range defaults to the last 90 days."""
+    interval = params.get('interval', 'day')
+    if interval not in INTERVALS:
+        raise ValidationError({'interval': f"Must be one of: {', '.join(INTERVALS)}."})
+    group_by = params.get('group_by', 'department')
+    if group_by not in GROUPINGS:
+        raise ValidationError({'group_by': f"Must be one of: {', '.join(GROUPINGS)}."})
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise ValidationError({name: 'Dates must be in YYYY-MM-DD format.'})
+    end = dates.get('end') or timezone.now().date()
+    start = dates.get('start') or end - timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+    if start > end:
+        raise ValidationError({'start': 'Start must not be after end.'})
+    if (end - start).days >= MAX_WINDOW_DAYS:
+        raise ValidationError({'start': f'Ranges may span at most {MAX_WINDOW_DAYS} days.'})
+
+    employee = params.get('employee')
+    if group_by == 'employee':
+        try:
+            employee = uuid.UUID(employee or '')
+        except ValueError:
+            raise ValidationError({'employee': 'An employee id is required when grouping by employee.'})
+
+    return {
+        'interval': interval,
+        'group_by': group_by,
+        'start': start,
+        'end': end,
+        'department': params.get('department'),
+        'employee': employee,
+    }
+
+
+def _period(field, interval):
+    if interval == 'day':
+        return F(field)
+    return Trunc(field, interval, output_field=DateField())
+
+
+def _fold(rows, keys):
+    """Fold per-status aggregate rows into one trend point per period (and group)."""
+    points = OrderedDict()
+    for row in rows:
+        key = tuple(row[name] for name in keys)
+        point = points.setdefault(key, {
+            **{name: row[name] for name in keys},
+            'records': 0, 'present': 0, 'hours': 0, 'lateMinutes': 0, 'lateCount': 0, 'statusMix': {},
+        })
+        point['records'] += row['records']
+        point['hours'] += float(row['hours'] or 0)
+        point['lateMinutes'] += row['late_minutes_sum'] or 0
+        point['lateCount'] += row['late_count']
+        point['statusMix'][row['status']] = row['records']
+        if row['status'] in PRESENT_STATUSES:
+            point['present'] += row['records']
+
+    trend = []
+    for point in points.values():
+        records = point.pop('records')
+        present = point.pop('present')
+        hours = point.pop('hours')
+        late_minutes = point.pop('lateMinutes')
+        late_count = point.pop('lateCount')
+        point.update({
+            'records': records,
+            'presenceRate': present / records if records else None,
+            'averageHours': hours / records if records else None,
+            'averageLateMinutes': late_minutes / records if records else None,
+            'lateRate': late_count / records if records else None,
+        })
+        trend.append(point)
+    return trend
+
+
+def department_trend(interval, start, end, department=None, by_department=True):
+    """Trend points from the daily rollups, optionally split by department."""
+    rollups = AttendanceDailyRollup.objects.filter(date__gte=start, date__lte=end)
+    if department:
+        rollups = rollups.filter(department=department)
+
+    keys = ['period', 'department'] if by_department else ['period']
+    rows = rollups \
+        .annotate(period=_period('date', interval)) \
+        .values(*keys, 'status') \
+        .annotate(
+            records=Sum('record_count'),
+            hours=Sum('hours_worked_total'),
+            late_minutes_sum=Sum('late_minutes_total'),
+            late_count=Sum('late_count'),
+        ) \
+        .order_by(*keys, 'status')
+    return _fold(rows, keys)
+
+
+def employee_trend(interval, start, end, employee):
+    """Trend points for one employee, aggregated from their attendance rows."""
+    rows = Attendance.objects.filter(employee=employee, date__gte=start, date__lte=end) \
+        .annotate(period=_period('date', interval)) \
+        .values('period', 'status') \
+        .annotate(
+            records=Count('id'),
+            hours=Sum('hours_worked'),
+            late_minutes_sum=Sum('late_minutes'),
+            late_count=Count('id', filter=Q(late_minutes__gt=0)),
+        ) \
+        .order_by('period', 'status')
+    return _fold(rows, ['period'])
@@ -0,0 +1,200 @@
+
+from collections import defaultdict
+
+import numpy as np
+from django.db import connections
+from django.db.models import Aggregate, Avg, Count, DateField, F, FloatField, StdDev
+from django.db.models.functions import Trunc
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import PerformanceReview
+
+# Score dimensions as (response key, model field)
+SCORE_DIMENSIONS = [
+    ('overall', 'overall_score'),
+    ('communication', 'communication_score'),
+    ('teamwork', 'teamwork_score'),
+    ('technical', 'technical_score'),
+    ('leadership', 'leadership_score'),
+]
+PERCENTILES = [('p25', 0.25), ('p50', 0.5), ('p90', 0.9)]
+
+GROUPINGS = {'department': 'employee__department', 'position': 'employee__position'}
+INTERVALS = ('month', 'quarter', 'year')
+# Reviewers with fewer reviews than this are left out of the calibration stats
+MIN_REVIEWER_REVIEWS = 5
+# Calibration stats are reported for the busiest reviewers only
+MAX_REVIEWERS = 100
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's ``percentile_cont(fraction) WITHIN GROUP (ORDER BY expression)``."""
+    function = 'PERCENTILE_CONT'
+    name = 'PercentileCont'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+def parse_scorecard_params(params):
+    group_by = params.get('group_by', 'department')
+    if group_by not in GROUPINGS:
+        raise ValidationError({'group_by': f"Must be one of: {', '.join(GROUPINGS)}."})
+    interval = params.get('interval', 'quarter')
+    if interval not in INTERVALS:
+        raise ValidationError({'interval': f"Must be one of: {', '.join(INTERVALS)}."})
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                raise ValidationError({name: 'Dates must be in YYYY-MM-DD format.'})
+    if 'start' in dates and 'end' in dates and dates['start'] > dates['end']:
+        raise ValidationError({'start': 'Start must not be after end.'})
+
+    try:
+        min_reviews = int(params.get('min_reviews', MIN_REVIEWER_REVIEWS))
+    except ValueError:
+        raise ValidationError({'min_reviews': 'Must be an integer.'})
+
+    return {
+        'group_by': group_by,
+        'interval': interval,
+        'start': dates.get('start'),
+        'end': dates.get('end'),
+        'min_reviews': max(1, min_reviews),
+    }
+
+
+def _rounded(value):
+    return None if value is None else round(float(value), 2)
+
+
+def _reviews(start=None, end=None):
+    reviews = PerformanceReview.objects.all()
+    if start:
+        reviews = reviews.filter(review_date__gte=start)
+    if end:
+        reviews = reviews.filter(review_date__lte=end)
+    return reviews
+
+
+def group_scorecards(reviews, group_by):
+    """Mean and percentiles of every score dimension per group.
+
+    PostgreSQL computes everything in one grouped query with
+    ``percentile_cont``; other databases get the means from the same query and
+    the (identically interpolated) percentiles from NumPy.
+    """
+    group_field = GROUPINGS[group_by]
+    postgres = connections[reviews.db].vendor == 'postgresql'
+
+    aggregates = {'reviews': Count('id')}
+    for key, field in SCORE_DIMENSIONS:
+        aggregates[f'{key}_mean'] = Avg(field)
+        if postgres:
+            for name, fraction in PERCENTILES:
+                aggregates[f'{key}_{name}'] = PercentileCont(field, fraction)
+
+    rows = list(
+        reviews.values(group=F(group_field))
+            .annotate(**aggregates)
+            .order_by('group')
+    )
+    if not postgres:
+        _add_percentiles(reviews, group_field, rows)
+
+    return [
+        {
+            'group': row['group'],
+            'reviews': row['reviews'],
+            'scores': {
+                key: {
+                    'mean': _rounded(row[f'{key}_mean']),
+                    **{name: _rounded(row[f'{key}_{name}']) for name, _ in PERCENTILES},
+                }
+                for key, _ in SCORE_DIMENSIONS
+            },
+        }
+        for row in rows
+    ]
+
+
+def _add_percentiles(reviews, group_field, rows):
+    fields = [field for _, field in SCORE_DIMENSIONS]
+    scores = defaultdict(list)
+    for group, *values in reviews.values_list(group_field, *fields).iterator(chunk_size=5000):
+        scores[group].append(values)
+
+    fractions = [fraction * 100 for _, fraction in PERCENTILES]
+    for row in rows:
+        # Linear interpolation matches percentile_cont
+        matrix = np.array(scores[row['group']], dtype=float)
+        percentiles = np.percentile(matrix, fractions, axis=0)
+        for column, (key, _) in enumerate(SCORE_DIMENSIONS):
+            for index, (name, _) in enumerate(PERCENTILES):
+                row[f'{key}_{name}'] = percentiles[index][column]
+
+
+def score_trend(reviews, interval):
+    """Mean of every score dimension per review period."""
+    rows = reviews \
+        .annotate(period=Trunc('review_date', interval, output_field=DateField())) \
+        .values('period') \
+        .annotate(reviews=Count('id'), **{key: Avg(field) for key, field in SCORE_DIMENSIONS}) \
+        .order_by('period')
+    return [
+        {
+            'period': row['period'],
+            'reviews': row['reviews'],
+            'scores': {key: _rounded(row[key]) for key, _ in SCORE_DIMENSIONS},
+        }
+        for row in rows
+    ]
+
+
+def reviewer_calibration(reviews, min_reviews=MIN_REVIEWER_REVIEWS):
+    """How each reviewer's overall scores compare with everyone's.
+
+    ``leniency`` is the reviewer's mean minus the mean over all reviews in
+    range, so a positive value means the reviewer scores generously.
+    """
+    baseline = reviews.aggregate(mean=Avg('overall_score'))['mean']
+    rows = reviews.exclude(reviewer=None) \
+        .values('reviewer', 'reviewer__first_name', 'reviewer__last_name') \
+        .annotate(
+            reviews=Count('id'),
+            mean=Avg('overall_score'),
+            spread=StdDev('overall_score'),
+        ) \
+        .filter(reviews__gte=min_reviews) \
+        .order_by('-reviews', 'reviewer')[:MAX_REVIEWERS]
+    return [
+        {
+            'reviewer': row['reviewer'],
+            'name': f"{row['reviewer__first_name']} {row['reviewer__last_name']}",
+            'reviews': row['reviews'],
+            'meanOverall': _rounded(row['mean']),
+            'stddevOverall': _rounded(row['spread']),
+            'leniency': _rounded(float(row['mean']) - float(baseline)) if baseline is not None else None,
+        }
+        for row in rows
+    ]
+
+
+def review_scorecard(group_by='department', interval='quarter', start=None, end=None, min_reviews=MIN_REVIEWER_REVIEWS):
+    reviews = _reviews(start, end)
+    return {
+        'groupBy': group_by,
+        'groups': group_scorecards(reviews, group_by),
+        'trend': score_trend(reviews, interval),
+        'reviewers': reviewer_calibration(reviews, min_reviews),
+    }
@@ -0,0 +1,90 @@
+
+import re
+from functools import lru_cache
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+# Columns covered by the search document; keep in sync with migration 0003
+SEARCH_FIELDS = ('first_name', 'last_name', 'email', 'department', 'position')
+SEARCH_CONFIG = 'simple'
+# Columns with pg_trgm indexes, used for substring matches inside words
+SUBSTRING_FIELDS = ('first_name', 'last_name', 'email')
+# pg_trgm indexes can only help with patterns of at least three characters
+MIN_SUBSTRING_LENGTH = 3
+
+
+@lru_cache(maxsize=None)
+def has_trigram_extension(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_document():
+    """The expression indexed by ``employee_search_document_idx``."""
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def prefix_query(term):
+    """Match every word of ``term`` as a prefix, for typeahead ("jo sm" finds "John Smith")."""
+    words = re.findall(r'\w+', term.lower())
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_employees(queryset, term):
+    """Filter ``queryset`` to employees matching ``term``, best matches first.
+
+    On PostgreSQL this is an indexed full-text prefix search, ranked by
+    ``ts_rank``, plus a trigram-indexed substring match on names and email
+    when pg_trgm is installed. Other databases fall back to ``icontains``.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+
+    if connections[queryset.db].vendor != 'postgresql':
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition)
+
+    query = prefix_query(term)
+    if query is None:
+        return queryset.none()
+
+    document = search_document()
+    condition = Q(search_document=query)
+    if len(term) >= MIN_SUBSTRING_LENGTH and has_trigram_extension(queryset.db):
+        for field in SUBSTRING_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.annotate(search_document=document) \
+        .filter(condition) \
+        .annotate(search_rank=SearchRank(document, query)) \
+        .order_by('-search_rank', *ordering)
+
+
+class EmployeeSearchFilter(BaseFilterBackend):
+    """Filter backend for ``?search=`` backed by :func:`search_employees`."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param)
+        if not term:
+            return queryset
+        return search_employees(queryset, term)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Search names, email, department and position; words match as prefixes.',
+            'schema': {'type': 'string'},
+        }]
@@ -1,18 +1,49 @@
 
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Employee, Attendance, PerformanceReview
+from .models import Employee, Attendance, PerformanceReview, Job
 
 class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class EmployeeSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Employee
+        fields = ['id', 'first_name', 'last_name', 'email', 'department', 'position']
+
+class ExpandableSerializerMixin:
+    """Inline the related objects named in the ``expand`` context instead of their ids."""
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get('expand', ()):
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+
+class AttendanceSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'employee': EmployeeSummarySerializer}
+
     class Meta:
         model = Attendance
         fields = '__all__'
 
-class PerformanceReviewSerializer(serializers.ModelSerializer):
+# Bulk ingestion serializers: uniqueness is resolved by the upsert and the
+# employee reference is checked once per chunk, so neither costs a query per row
+class EmployeeBulkSerializer(EmployeeSerializer):
+    class Meta(EmployeeSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
+class AttendanceBulkSerializer(AttendanceSerializer):
+    employee = serializers.UUIDField()
+
+    class Meta(AttendanceSerializer.Meta):
+        validators = []
+
+class PerformanceReviewSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'employee': EmployeeSummarySerializer, 'reviewer': EmployeeSummarySerializer}
+
     class Meta:
         model = PerformanceReview
         fields = '__all__'
@@ -39,3 +70,83 @@ class GenderDistributionSerializer(serializers.Serializer):
 class TenureDistributionSerializer(serializers.Serializer):
     range = serializers.CharField()
     count = serializers.IntegerField()
+
+class HeadcountSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    headcount = serializers.IntegerField()
+    hires = serializers.IntegerField()
+    departures = serializers.IntegerField()
+
+class CohortRetentionSerializer(serializers.Serializer):
+    cohort = serializers.DateField()
+    hired = serializers.IntegerField()
+    remaining = serializers.ListField(child=serializers.IntegerField())
+    retention = serializers.ListField(child=serializers.FloatField())
+
+class AttendanceTrendSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    department = serializers.CharField(required=False)
+    records = serializers.IntegerField()
+    presenceRate = serializers.FloatField(allow_null=True)
+    averageHours = serializers.FloatField(allow_null=True)
+    averageLateMinutes = serializers.FloatField(allow_null=True)
+    lateRate = serializers.FloatField(allow_null=True)
+    statusMix = serializers.DictField(child=serializers.IntegerField())
+
+class ScoreStatsSerializer(serializers.Serializer):
+    mean = serializers.FloatField(allow_null=True)
+    p25 = serializers.FloatField(allow_null=True)
+    p50 = serializers.FloatField(allow_null=True)
+    p90 = serializers.FloatField(allow_null=True)
+
+class ScorecardGroupSerializer(serializers.Serializer):
+    group = serializers.CharField()
+    reviews = serializers.IntegerField()
+    scores = serializers.DictField(child=ScoreStatsSerializer())
+
+class ScorecardTrendSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    reviews = serializers.IntegerField()
+    scores = serializers.DictField(child=serializers.FloatField(allow_null=True))
+
+class ReviewerCalibrationSerializer(serializers.Serializer):
+    reviewer = serializers.UUIDField()
+    name = serializers.CharField()
+    reviews = serializers.IntegerField()
+    meanOverall = serializers.FloatField(allow_null=True)
+    stddevOverall = serializers.FloatField(allow_null=True)
+    leniency = serializers.FloatField(allow_null=True)
+
+class ReviewScorecardSerializer(serializers.Serializer):
+    groupBy = serializers.CharField()
+    groups = ScorecardGroupSerializer(many=True)
+    trend = ScorecardTrendSerializer(many=True)
+    reviewers = ReviewerCalibrationSerializer(many=True)
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    groupBy = serializers.ListField(child=serializers.CharField())
+    measures = serializers.ListField(child=serializers.CharField())
+    employees = serializers.IntegerField()
+    rows = serializers.ListField(child=serializers.DictField())
+    loadedAt = serializers.DateTimeField()
+
+class JobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'rows_done', 'rows_total', 'file_name', 'content_type', 'size',
+            'error', 'attempts', 'created_at', 'started_at', 'finished_at', 'download_url',
+        ]
+
+    def get_download_url(self, job):
+        if job.status != Job.SUCCEEDED:
+            return None
+        url = reverse('job-download', args=[job.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class JobCreateSerializer(serializers.Serializer):
+    kind = serializers.CharField()
+    params = serializers.DictField(required=False, default=dict)
@@ -0,0 +1,136 @@
+
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_data_version
+from .cohorts import record_departures, refresh_hire_cohorts
+from .models import Attendance, Employee, PerformanceReview
+from .rollups import adjust_attendance_rollup, refresh_attendance_rollups
+from .snapshots import refresh_department_stats, refresh_gender_distribution
+
+
+# Work left for the current transaction: snapshot groups, attendance dates and
+# hire cohorts to refresh and whether cached analytics must be invalidated. Every write schedules a flush,
+# but only the first one to run after commit has anything to do, so a bulk
+# delete costs one refresh rather than one per row.
+_pending = threading.local()
+
+
+def _flush_pending():
+    pending = _pending.__dict__.pop('work', None)
+    if not pending:
+        return
+    # Refresh before bumping so no reader caches pre-refresh snapshots under the new version
+    departments, genders, dates, hire_dates = pending
+    if departments or genders:
+        refresh_department_stats(departments)
+        refresh_gender_distribution(genders)
+    if dates:
+        refresh_attendance_rollups(dates)
+    if hire_dates:
+        refresh_hire_cohorts(hire_dates)
+    bump_data_version()
+
+
+def schedule_refresh(departments=(), genders=(), dates=(), hire_dates=()):
+    """Refresh the affected snapshot groups, rollup dates and hire cohorts and invalidate cached analytics on commit."""
+    pending = _pending.__dict__.setdefault('work', (set(), set(), set(), set()))
+    pending[0].update(departments)
+    pending[1].update(genders)
+    pending[2].update(dates)
+    pending[3].update(hire_dates)
+    transaction.on_commit(_flush_pending)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_groups(sender, instance, raw=False, **kwargs):
+    # An update that moves an employee must refresh the group it left as well
+    instance._previous_groups = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_groups = (
+        Employee.objects.filter(pk=instance.pk).values_list('department', 'gender', 'hire_date').first()
+    )
+
+
+@receiver(post_save, sender=Employee)
+def refresh_snapshots_after_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    departments = {instance.department}
+    genders = {instance.gender}
+    hire_dates = {instance.hire_date}
+    dates = ()
+    previous = getattr(instance, '_previous_groups', None)
+    if previous:
+        departments.add(previous[0])
+        genders.add(previous[1])
+        hire_dates.add(previous[2])
+        # Attendance rolls up under the employee's department, so a move restates their days
+        if previous[0] != instance.department:
+            dates = set(instance.attendance.values_list('date', flat=True))
+    schedule_refresh(departments, genders, dates, hire_dates)
+
+
+@receiver(post_delete, sender=Employee)
+def refresh_snapshots_after_delete(sender, instance, **kwargs):
+    # Recorded right away, inside the deleting transaction, as it cannot be recomputed later
+    record_departures([instance.hire_date])
+    schedule_refresh({instance.department}, {instance.gender}, hire_dates={instance.hire_date})
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    instance._previous_attendance = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_attendance = Attendance.objects.filter(pk=instance.pk).values_list(
+        'employee_id', 'employee__department', 'date', 'status', 'hours_worked', 'late_minutes',
+    ).first()
+
+
+def _department(employee_id):
+    return Employee.objects.filter(pk=employee_id).values_list('department', flat=True).first()
+
+
+@receiver(post_save, sender=Attendance)
+def update_rollups_after_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # One row changed, so move its values between rollup rows rather than recompute whole dates
+    dates = set()
+    department = None
+    previous = getattr(instance, '_previous_attendance', None)
+    if previous:
+        employee_id, department, date, status, hours_worked, late_minutes = previous
+        if not adjust_attendance_rollup(date, department, status, hours_worked, late_minutes, sign=-1):
+            dates.add(date)
+        if employee_id != instance.employee_id:
+            department = None
+    if department is None:
+        department = _department(instance.employee_id)
+    adjust_attendance_rollup(instance.date, department, instance.status, instance.hours_worked, instance.late_minutes)
+    schedule_refresh(dates=dates)
+
+
+@receiver(post_delete, sender=Attendance)
+def update_rollups_after_delete(sender, instance, origin=None, **kwargs):
+    if origin is instance:
+        department = _department(instance.employee_id)
+        if department is not None and adjust_attendance_rollup(
+            instance.date, department, instance.status, instance.hours_worked, instance.late_minutes, sign=-1,
+        ):
+            schedule_refresh()
+            return
+    # Queryset and cascading deletes remove many rows: recompute their dates once on commit
+    schedule_refresh(dates={instance.date})
+
+
+@receiver(post_save, sender=PerformanceReview)
+@receiver(post_delete, sender=PerformanceReview)
+def invalidate_analytics_cache(sender, raw=False, **kwargs):
+    if not raw:
+        schedule_refresh()
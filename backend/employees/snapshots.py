@@ -0,0 +1,84 @@
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+
+from .models import DepartmentStatsSnapshot, Employee, GenderDistributionSnapshot
+
+
+def _refresh(snapshot_model, key, aggregates, keys=None):
+    """Recompute snapshot rows from ``Employee`` grouped by ``key``.
+
+    Only the groups in ``keys`` are recomputed when given; groups that no
+    longer have any employees are removed from the snapshot.
+    """
+    queryset = Employee.objects.all()
+    snapshots = snapshot_model.objects.all()
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return 0
+        queryset = queryset.filter(**{f'{key}__in': keys})
+        snapshots = snapshots.filter(**{f'{key}__in': keys})
+
+    refreshed_at = timezone.now()
+    rows = [
+        snapshot_model(refreshed_at=refreshed_at, **row)
+        for row in queryset.values(key).annotate(**aggregates).order_by()
+    ]
+    update_fields = [*aggregates, 'refreshed_at']
+
+    with transaction.atomic():
+        snapshot_model.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=[key], update_fields=update_fields
+        )
+        snapshots.exclude(**{f'{key}__in': [getattr(row, key) for row in rows]}).delete()
+    return len(rows)
+
+
+def refresh_department_stats(departments=None):
+    return _refresh(
+        DepartmentStatsSnapshot,
+        'department',
+        {
+            'employee_count': Count('id'),
+            'average_salary': Avg('salary'),
+            'average_performance': Avg('performance_score'),
+        },
+        departments,
+    )
+
+
+def refresh_gender_distribution(genders=None):
+    return _refresh(GenderDistributionSnapshot, 'gender', {'count': Count('id')}, genders)
+
+
+SNAPSHOT_REFRESHERS = {
+    DepartmentStatsSnapshot: refresh_department_stats,
+    GenderDistributionSnapshot: refresh_gender_distribution,
+}
+
+
+def changed_since(timestamp):
+    """Departments and genders of employees updated after ``timestamp``."""
+    changed = Employee.objects.filter(updated_at__gt=timestamp)
+    return (
+        set(changed.values_list('department', flat=True).distinct()),
+        set(changed.values_list('gender', flat=True).distinct()),
+    )
+
+
+def last_refreshed(snapshot_model):
+    return snapshot_model.objects.aggregate(refreshed_at=Max('refreshed_at'))['refreshed_at']
+
+
+def ensure_snapshot(snapshot_model):
+    """Return the snapshot's freshness timestamp, building it first if it has never been built.
+
+    An empty ``Employee`` table yields an empty snapshot and no timestamp.
+    """
+    refreshed_at = last_refreshed(snapshot_model)
+    if refreshed_at is None:
+        SNAPSHOT_REFRESHERS[snapshot_model]()
+        refreshed_at = last_refreshed(snapshot_model)
+    return refreshed_at
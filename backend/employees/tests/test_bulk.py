@@ -0,0 +1,210 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from employees.bulk import AttendanceBulkUpsert, EmployeeBulkUpsert, NDJSONParser
+from employees.models import Attendance, AttendanceDailyRollup, DepartmentStatsSnapshot, Employee
+from employees.rollups import refresh_attendance_rollups
+from employees.snapshots import refresh_department_stats
+
+from .utils import FIRST_ATTENDANCE_DATE, SeededTestCase
+
+FIELDS = ('first_name', 'last_name', 'email', 'gender', 'age', 'department', 'position', 'salary')
+
+
+def employee_row(employee=None, **changes):
+    row = {
+        'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com', 'gender': 'Female', 'age': 36,
+        'department': 'Engineering', 'position': 'Senior', 'salary': 120000, 'hire_date': '2020-03-01',
+        'performance_score': '4.5',
+    }
+    if employee is not None:
+        row.update({name: getattr(employee, name) for name in FIELDS})
+        row.update(hire_date=str(employee.hire_date), performance_score=str(employee.performance_score))
+    row.update(changes)
+    return row
+
+
+def attendance_row(employee, date, **changes):
+    return {
+        'employee': str(employee.pk), 'date': str(date), 'status': 'Present', 'hours_worked': '8.0',
+        'late_minutes': 0, **changes,
+    }
+
+
+def ndjson(rows):
+    """The rows as NDJSON; strings are sent as raw lines."""
+    return b''.join((row if isinstance(row, str) else json.dumps(row)).encode() + b'\n' for row in rows)
+
+
+def derived_rows():
+    """Department snapshots and attendance rollups, without their refresh times."""
+    return (
+        sorted(DepartmentStatsSnapshot.objects.values_list(
+            'department', 'employee_count', 'average_salary', 'average_performance',
+        )),
+        sorted(AttendanceDailyRollup.objects.values_list(
+            'date', 'department', 'status', 'record_count', 'hours_worked_total', 'late_minutes_total', 'late_count',
+        )),
+    )
+
+
+class BulkUpsertCases:
+    """Upsert behaviour, run for each way a payload arrives; see the subclasses."""
+
+    def rows(self, rows):
+        raise NotImplementedError
+
+    def upsert(self, upsert_class, rows, chunk_size=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            return upsert_class(chunk_size=chunk_size).run(self.rows(rows))
+
+    def test_partial_failures_are_reported_by_payload_index(self):
+        result = self.upsert(EmployeeBulkUpsert, [
+            employee_row(email='one@example.com'),
+            employee_row(email='two@example.com', age='old'),
+            employee_row(email='three@example.com'),
+            ['not', 'an', 'object'],
+            employee_row(email='not an email'),
+            employee_row(email='four@example.com'),
+        ])
+        self.assertEqual((result['created'], result['updated']), (3, 0))
+        self.assertEqual([error['index'] for error in result['errors']], [1, 3, 4])
+        self.assertIn('age', result['errors'][0]['errors'])
+        self.assertEqual(result['errors'][1]['errors'], {'non_field_errors': ['Expected an object.']})
+        self.assertIn('email', result['errors'][2]['errors'])
+        self.assertEqual(
+            set(Employee.objects.filter(email__endswith='@example.com', first_name='Ada').values_list('email', flat=True)),
+            {'one@example.com', 'three@example.com', 'four@example.com'},
+        )
+
+    def test_an_invalid_chunk_does_not_stop_later_chunks(self):
+        result = self.upsert(EmployeeBulkUpsert, [
+            employee_row(email='bad@example.com', salary='lots'),
+            employee_row(email='worse@example.com', age=None),
+            employee_row(email='good@example.com'),
+        ])
+        self.assertEqual((result['created'], result['updated']), (1, 0))
+        self.assertEqual([error['index'] for error in result['errors']], [0, 1])
+
+    def test_last_row_wins_within_a_chunk(self):
+        result = self.upsert(EmployeeBulkUpsert, [
+            employee_row(first_name='First'),
+            employee_row(first_name='Second'),
+        ])
+        self.assertEqual((result['created'], result['updated'], result['errors']), (1, 0, []))
+        self.assertEqual(Employee.objects.get(email='ada@example.com').first_name, 'Second')
+
+    def test_repeat_in_a_later_chunk_is_an_update(self):
+        result = self.upsert(EmployeeBulkUpsert, [
+            employee_row(first_name='First'),
+            employee_row(email='other@example.com'),
+            employee_row(first_name='Third'),
+        ])
+        self.assertEqual((result['created'], result['updated']), (2, 1))
+        self.assertEqual(Employee.objects.get(email='ada@example.com').first_name, 'Third')
+
+    def test_created_and_updated_counts(self):
+        existing = self.employees[:3]
+        result = self.upsert(EmployeeBulkUpsert, [
+            employee_row(existing[0], salary=1),
+            employee_row(email='new@example.com'),
+            employee_row(existing[1], salary=2),
+            employee_row(existing[2], salary=3),
+        ], chunk_size=3)
+        self.assertEqual((result['created'], result['updated'], result['errors']), (1, 3, []))
+        self.assertEqual(
+            list(Employee.objects.filter(pk__in=[employee.pk for employee in existing]).order_by('salary')
+                 .values_list('salary', flat=True)),
+            [1, 2, 3],
+        )
+        # An update keeps the row's id and creation time
+        self.assertEqual(Employee.objects.get(email=existing[0].email).created_at, existing[0].created_at)
+
+    def test_department_move_refreshes_snapshots_and_rollups(self):
+        employee = self.employees[0]
+        department = next(name for name in {e.department for e in self.employees} if name != employee.department)
+        result = self.upsert(EmployeeBulkUpsert, [employee_row(employee, department=department)])
+        self.assertEqual((result['created'], result['updated']), (0, 1))
+
+        derived = derived_rows()
+        refresh_department_stats()
+        refresh_attendance_rollups()
+        self.assertEqual(derived, derived_rows())
+
+    def test_attendance_upsert(self):
+        employee = self.employees[0]
+        new_date = FIRST_ATTENDANCE_DATE + timedelta(days=10)
+        result = self.upsert(AttendanceBulkUpsert, [
+            attendance_row(employee, FIRST_ATTENDANCE_DATE, status='Late', late_minutes=30),
+            attendance_row(employee, new_date),
+            {**attendance_row(employee, new_date), 'employee': '00000000-0000-0000-0000-000000000000'},
+            attendance_row(employee, new_date, status='Remote'),
+        ])
+        # The second chunk updates the row the first created
+        self.assertEqual((result['created'], result['updated']), (1, 2))
+        self.assertEqual([error['index'] for error in result['errors']], [2])
+        self.assertIn('employee', result['errors'][0]['errors'])
+        self.assertEqual(Attendance.objects.get(employee=employee, date=new_date).status, 'Remote')
+
+        derived = derived_rows()
+        refresh_attendance_rollups()
+        self.assertEqual(derived, derived_rows())
+
+
+class JSONArrayBulkUpsertTests(BulkUpsertCases, SeededTestCase):
+    def rows(self, rows):
+        return list(rows)
+
+
+class NDJSONBulkUpsertTests(BulkUpsertCases, SeededTestCase):
+    def rows(self, rows):
+        return NDJSONParser().parse(io.BytesIO(ndjson(rows)))
+
+    def test_invalid_lines_are_reported_and_blank_lines_skipped(self):
+        rows = NDJSONParser().parse(io.BytesIO(
+            ndjson([employee_row(email='one@example.com'), '{"first_name": ']) + b'\n'
+            + ndjson([employee_row(email='two@example.com')])
+        ))
+        with self.captureOnCommitCallbacks(execute=True):
+            result = EmployeeBulkUpsert(chunk_size=2).run(rows)
+        self.assertEqual((result['created'], result['updated']), (2, 0))
+        self.assertEqual([error['index'] for error in result['errors']], [1])
+        self.assertIn('Invalid JSON', result['errors'][0]['errors']['non_field_errors'][0])
+
+
+class BulkEndpointTests(SeededTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(APIView, 'check_throttles', lambda self, request: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('loader'))
+
+    def test_json_array(self):
+        response = self.client.post('/api/employees/bulk/', [employee_row(), {'email': 'x'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['created'], [error['index'] for error in response.json()['errors']]), (1, [1]))
+
+    def test_ndjson(self):
+        body = ndjson([employee_row(), 'not json'])
+        response = self.client.post('/api/employees/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['created'], [error['index'] for error in response.json()['errors']]), (1, [1]))
+
+    def test_rejects_a_single_object(self):
+        response = self.client.post('/api/employees/bulk/', employee_row(), format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_delete(self):
+        employee = self.employees[0]
+        response = self.client.delete('/api/employees/bulk/', [str(employee.pk), 'nope'], format='json')
+        self.assertEqual(response.json(), {
+            'deleted': 1, 'errors': [{'index': 1, 'errors': {'id': ['"nope" is not a valid UUID.']}}],
+        })
+        self.assertFalse(Employee.objects.filter(pk=employee.pk).exists())
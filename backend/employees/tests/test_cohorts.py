@@ -0,0 +1,48 @@
+from datetime import date
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from employees.cohorts import MAX_TENURE_YEARS, years_before
+from employees.histograms import parse_edges
+from employees.views import AnalyticsQueryView, TenureDistributionView
+
+
+def api_request(path):
+    return Request(APIRequestFactory().get(path))
+
+
+class YearsBeforeTests(SimpleTestCase):
+    def test_same_calendar_day(self):
+        self.assertEqual(years_before(date(2024, 6, 15), 5), date(2019, 6, 15))
+
+    def test_leap_day_maps_to_28_february(self):
+        self.assertEqual(years_before(date(2024, 2, 29), 1), date(2023, 2, 28))
+        self.assertEqual(years_before(date(2024, 2, 29), 4), date(2020, 2, 29))
+
+    def test_clamps_to_the_first_representable_year(self):
+        self.assertEqual(years_before(date(2024, 6, 15), 5000), date(1, 6, 15))
+        self.assertEqual(years_before(date(2024, 2, 29), 5000), date(1, 2, 28))
+
+
+class TenureEdgeTests(SimpleTestCase):
+    def test_parse_edges_bounds(self):
+        self.assertEqual(parse_edges('0,5,100', (0, 100)), [0, 5, 100])
+        with self.assertRaises(ValidationError):
+            parse_edges('0,5000', (0, 100))
+        with self.assertRaises(ValidationError):
+            parse_edges('-1,5', (0, 100))
+
+    def test_tenure_distribution_rejects_edges_beyond_max_tenure(self):
+        view = TenureDistributionView()
+        with self.assertRaises(ValidationError):
+            view.get_ranges(api_request('/api/analytics/tenure-distribution/?edges=0,5000'))
+        ranges = view.get_ranges(api_request(f'/api/analytics/tenure-distribution/?edges=0,{MAX_TENURE_YEARS}'))
+        self.assertEqual(ranges[-1]['min'], MAX_TENURE_YEARS)
+
+    def test_query_rejects_tenure_edges_beyond_max_tenure(self):
+        request = api_request('/api/analytics/query/?group_by=tenure_range&tenure_edges=0,3000')
+        with self.assertRaises(ValidationError):
+            AnalyticsQueryView().get_ranges(request, ['tenure_range'])
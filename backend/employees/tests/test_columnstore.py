@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from employees.cohorts import years_before
+from employees.columnstore import CATEGORICALS, RANGE_DIMENSIONS, EmployeeColumns, parse_measure, run_query
+from employees.histograms import ranges_from_edges
+from employees.models import Employee
+from employees.views import AgeDistributionView, SalaryDistributionView, TenureDistributionView
+
+from .utils import SeededTestCase
+
+MEASURES = {
+    name: parse_measure(name)
+    for name in (
+        'count', 'sum:salary', 'sum:performance_score', 'avg:salary', 'avg:performance_score', 'avg:age',
+        'min:age', 'min:performance_score', 'max:salary', 'max:performance_score',
+        'p1:salary', 'p50:age', 'p90:performance_score', 'p99:salary',
+    )
+}
+ORM_AGGREGATES = {'count': Count, 'sum': Sum, 'avg': Avg, 'min': Min, 'max': Max}
+DEFAULT_RANGES = {
+    'age_range': AgeDistributionView.ranges,
+    'salary_range': SalaryDistributionView.ranges,
+    'tenure_range': TenureDistributionView.ranges,
+}
+
+
+def percentile(values, fraction):
+    """Linear interpolation between the closest ranks, like percentile_cont."""
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def range_filter(dimension, item, today):
+    field = RANGE_DIMENSIONS[dimension]
+    condition = Q()
+    if dimension == 'tenure_range':
+        # Hired at least ``min`` whole years ago, and less than ``max``
+        if item.get('min') is not None:
+            condition &= Q(hire_date__lte=years_before(today, item['min']))
+        if item.get('max') is not None:
+            condition &= Q(hire_date__gt=years_before(today, item['max']))
+        return condition
+    if item.get('min') is not None:
+        condition &= Q(**{f'{field}__gte': item['min']})
+    if item.get('max') is not None:
+        condition &= Q(**{f'{field}__lte': item['max']})
+    return condition
+
+
+def orm_row(employees, measures):
+    """The measures of ``employees`` computed by the database, or in Python for percentiles."""
+    aggregates = {
+        name: ORM_AGGREGATES[aggregate]('id' if aggregate == 'count' else field)
+        for name, (aggregate, field, fraction) in measures.items() if fraction is None
+    }
+    row = employees.aggregate(**aggregates)
+    for name, (_, field, fraction) in measures.items():
+        if fraction is not None:
+            row[name] = percentile([float(value) for value in employees.values_list(field, flat=True)], fraction)
+    return row
+
+
+class RunQueryTests(SeededTestCase):
+    """Column store answers match the same aggregates computed with the ORM."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.today = timezone.now().date()
+        # Hired exactly two years ago, and a day later: either side of a tenure bound
+        two_years_ago = years_before(cls.today, 2)
+        Employee.objects.filter(pk=cls.employees[0].pk).update(department='Boundary', hire_date=two_years_ago)
+        Employee.objects.filter(pk=cls.employees[1].pk).update(
+            department='Boundary', hire_date=two_years_ago + timedelta(days=1),
+        )
+
+    def setUp(self):
+        self.store = EmployeeColumns.load(version=0)
+
+    def query(self, group_by, filters=None, ranges=None, measures=MEASURES):
+        return run_query(self.store, group_by, measures, filters=filters, ranges=ranges, today=self.today)
+
+    def assertMatchesOrm(self, group_by, filters=None, ranges=None):
+        ranges = {**{name: DEFAULT_RANGES[name] for name in group_by if name in RANGE_DIMENSIONS}, **(ranges or {})}
+        result = self.query(group_by, filters, ranges)
+
+        employees = Employee.objects.all()
+        for name, values in (filters or {}).items():
+            employees = employees.filter(**{f'{name}__in': values})
+        for dimension in group_by:
+            if dimension in RANGE_DIMENSIONS:
+                employees = employees.filter(
+                    Q.create([range_filter(dimension, item, self.today) for item in ranges[dimension]], connector=Q.OR)
+                )
+        self.assertEqual(result['employees'], employees.count())
+        self.assertEqual(sum(row['count'] for row in result['rows']), employees.count())
+
+        for row in result['rows']:
+            group = employees
+            for dimension in group_by:
+                if dimension in CATEGORICALS:
+                    group = group.filter(**{dimension: row[dimension]})
+                else:
+                    item = next(item for item in ranges[dimension] if item['label'] == row[dimension])
+                    group = group.filter(range_filter(dimension, item, self.today))
+            expected = orm_row(group, MEASURES)
+            for name in MEASURES:
+                with self.subTest(group_by=group_by, group={d: row[d] for d in group_by}, measure=name):
+                    self.assertAlmostEqual(row[name], float(expected[name]), delta=0.006)
+
+    def test_totals(self):
+        self.assertMatchesOrm([])
+
+    def test_categorical_dimensions(self):
+        self.assertMatchesOrm(['department'])
+        self.assertMatchesOrm(['department', 'gender', 'position'])
+
+    def test_filters(self):
+        departments = sorted({employee.department for employee in self.employees})[:2]
+        self.assertMatchesOrm(['gender'], filters={'department': departments})
+        self.assertMatchesOrm([], filters={'department': departments, 'gender': ['Female', 'Non-Binary']})
+        self.assertMatchesOrm(['department'], filters={'position': ['Senior', 'Lead', 'no such position']})
+
+    def test_default_ranges(self):
+        self.assertMatchesOrm(['age_range'])
+        self.assertMatchesOrm(['salary_range', 'gender'])
+        self.assertMatchesOrm(['tenure_range'])
+
+    def test_custom_ranges(self):
+        self.assertMatchesOrm(['age_range', 'tenure_range'], ranges={
+            'age_range': ranges_from_edges([30, 40, 50]),
+            'tenure_range': ranges_from_edges([1, 2, 3, 5], TenureDistributionView.label, TenureDistributionView.open_label, gap=0),
+        })
+
+    def test_tenure_bounds(self):
+        # Exactly two years counts towards 2-5, a day short of it towards 1-2
+        result = self.query(['tenure_range'], {'department': ['Boundary']}, DEFAULT_RANGES, {'count': MEASURES['count']})
+        self.assertEqual(result['rows'], [
+            {'tenure_range': '1-2 Years', 'count': 1},
+            {'tenure_range': '2-5 Years', 'count': 1},
+        ])
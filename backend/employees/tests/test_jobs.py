@@ -0,0 +1,218 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from employees import jobs
+from employees.jobs import (
+    JOB_MAX_ATTEMPTS, JOB_STALE_AFTER, claim_next_job, job_file_response, job_path, requeue_stale_jobs, submit_job,
+)
+from employees.models import Job
+
+from .utils import TEST_CACHES
+
+CONTENT = bytes(range(100))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class JobFileResponseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(jobs, 'JOB_STORAGE_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.job = self.finished_job(CONTENT)
+
+    def finished_job(self, content):
+        job = Job.objects.create(
+            kind='export-employees', fingerprint=str(len(content)), status=Job.SUCCEEDED,
+            file_name='employees.csv', content_type='text/csv', size=len(content),
+        )
+        with open(job_path(job), 'wb') as output:
+            output.write(content)
+        return job
+
+    def download(self, job=None, **headers):
+        request = RequestFactory().get('/api/jobs/download/', **headers)
+        return job_file_response(request, job or self.job)
+
+    def assertPartial(self, response, start, end):
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], str(end - start + 1))
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[start:end + 1])
+
+    def assertWhole(self, response, content=CONTENT):
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Range', response)
+        self.assertEqual(response['Content-Length'], str(len(content)))
+        self.assertEqual(b''.join(response.streaming_content), content)
+
+    def test_without_range(self):
+        response = self.download()
+        self.assertWhole(response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.job.id}-{len(CONTENT)}"')
+
+    def test_bounded_range(self):
+        self.assertPartial(self.download(HTTP_RANGE='bytes=10-19'), 10, 19)
+
+    def test_end_past_the_file_is_clamped(self):
+        self.assertPartial(self.download(HTTP_RANGE='bytes=90-500'), 90, 99)
+
+    def test_open_ended_range(self):
+        self.assertPartial(self.download(HTTP_RANGE='bytes=40-'), 40, 99)
+
+    def test_suffix_range(self):
+        self.assertPartial(self.download(HTTP_RANGE='bytes=-10'), 90, 99)
+        self.assertPartial(self.download(HTTP_RANGE='bytes=-1000'), 0, 99)
+
+    def test_last_before_first_is_ignored(self):
+        self.assertWhole(self.download(HTTP_RANGE='bytes=20-10'))
+
+    def test_unsupported_ranges_are_ignored(self):
+        for header in ('bytes=0-1,5-6', 'items=0-1', 'bytes=-'):
+            with self.subTest(header=header):
+                self.assertWhole(self.download(HTTP_RANGE=header))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=150-200', 'bytes=-0'):
+            with self.subTest(header=header):
+                response = self.download(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_matching_etag(self):
+        etag = self.download()['ETag']
+        self.assertPartial(self.download(HTTP_RANGE='bytes=50-', HTTP_IF_RANGE=etag), 50, 99)
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.download(HTTP_RANGE='bytes=50-', HTTP_IF_RANGE=f'"{self.job.id}-10"')
+        self.assertWhole(response)
+
+    def test_zero_byte_file(self):
+        empty = self.finished_job(b'')
+        self.assertWhole(self.download(empty), b'')
+        for header in ('bytes=0-', 'bytes=-5'):
+            with self.subTest(header=header):
+                response = self.download(empty, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_missing_file_fails_the_job(self):
+        jobs.delete_job_file(self.job)
+        with self.assertRaises(jobs.JobFileGone):
+            self.download()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.FAILED)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SubmitJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('submitter')
+        cls.other = User.objects.create_user('other')
+
+    def test_identical_active_job_is_returned(self):
+        job, created = submit_job('export-employees', {'department': 'HR'}, self.user)
+        self.assertTrue(created)
+        self.assertEqual(submit_job('export-employees', {'department': ['HR']}, self.user), (job, False))
+
+        Job.objects.filter(id=job.id).update(status=Job.RUNNING)
+        self.assertEqual(submit_job('export-employees', {'department': 'HR'}, self.user), (job, False))
+
+    def test_finished_job_is_not_reused(self):
+        job, _ = submit_job('export-employees', {}, self.user)
+        Job.objects.filter(id=job.id).update(status=Job.SUCCEEDED)
+        again, created = submit_job('export-employees', {}, self.user)
+        self.assertTrue(created)
+        self.assertNotEqual(again, job)
+
+    def test_jobs_are_per_user_and_params(self):
+        submit_job('export-employees', {}, self.user)
+        self.assertTrue(submit_job('export-employees', {}, self.other)[1])
+        self.assertTrue(submit_job('export-employees', {'department': 'HR'}, self.user)[1])
+        self.assertTrue(submit_job('export-attendance', {}, self.user)[1])
+
+    def test_constraint_allows_one_active_job_per_fingerprint(self):
+        Job.objects.create(kind='export-employees', fingerprint='same')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(kind='export-employees', fingerprint='same', status=Job.RUNNING)
+        Job.objects.create(kind='export-employees', fingerprint='same', status=Job.SUCCEEDED)
+
+    def test_losing_a_race_returns_the_winner(self):
+        lookup = Job.objects.filter
+        winners = []
+
+        def racing_lookup(*args, **kwargs):
+            # Another request queues the same job just after this one looked for it
+            if not winners:
+                winners.append(Job.objects.create(
+                    kind='export-employees', fingerprint=kwargs['fingerprint'], created_by=self.user,
+                ))
+                return Job.objects.none()
+            return lookup(*args, **kwargs)
+
+        with mock.patch.object(Job.objects, 'filter', side_effect=racing_lookup):
+            job, created = submit_job('export-employees', {}, self.user)
+        self.assertFalse(created)
+        self.assertEqual(job, winners[0])
+        self.assertEqual(Job.objects.count(), 1)
+
+
+class JobQueueTests(TestCase):
+    def queue(self, minutes_ago, **fields):
+        job = Job.objects.create(kind='export-employees', fingerprint=f'job-{minutes_ago}', **fields)
+        Job.objects.filter(id=job.id).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return job
+
+    def test_claims_the_oldest_queued_job(self):
+        newer = self.queue(1)
+        older = self.queue(5)
+        self.queue(10, status=Job.RUNNING, worker='elsewhere')
+
+        claimed = claim_next_job('worker-a')
+        self.assertEqual(claimed, older)
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), (Job.RUNNING, 'worker-a', 1))
+        self.assertIsNotNone(claimed.heartbeat_at)
+        self.assertEqual(claim_next_job('worker-b'), newer)
+        self.assertIsNone(claim_next_job('worker-c'))
+
+    def test_claim_skips_jobs_taken_meanwhile(self):
+        job = self.queue(5)
+        claim = Job.objects.filter
+
+        def racing_claim(*args, **kwargs):
+            # Another worker claims the job after it was listed as a candidate
+            if 'id' in kwargs:
+                claim(id=job.id).update(status=Job.RUNNING, worker='worker-b')
+            return claim(*args, **kwargs)
+
+        with mock.patch.object(Job.objects, 'filter', side_effect=racing_claim):
+            self.assertIsNone(claim_next_job('worker-a'))
+        job.refresh_from_db()
+        self.assertEqual(job.worker, 'worker-b')
+
+    def test_requeue_stale_jobs(self):
+        stale = timezone.now() - JOB_STALE_AFTER - timedelta(seconds=1)
+        retry = self.queue(3, status=Job.RUNNING, worker='gone', heartbeat_at=stale, attempts=1)
+        exhausted = self.queue(2, status=Job.RUNNING, worker='gone', heartbeat_at=stale, attempts=JOB_MAX_ATTEMPTS)
+        alive = self.queue(1, status=Job.RUNNING, worker='busy', heartbeat_at=timezone.now(), attempts=1)
+
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((retry.status, retry.worker), (Job.QUEUED, ''))
+        self.assertEqual(exhausted.status, Job.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertEqual((alive.status, alive.worker), (Job.RUNNING, 'busy'))
+
+        # The requeued job is claimed again, as its next attempt
+        self.assertEqual(claim_next_job('worker-a').attempts, 2)
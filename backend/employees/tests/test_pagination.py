@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from employees.models import Attendance, Employee
+
+from .utils import SeededTestCase
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class KeysetPaginationTests(SeededTestCase):
+    """Following the cursor links visits every row once, in order, either way."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Groups of employees created at the same instant, so pages split ties on created_at
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for index, employee in enumerate(cls.employees):
+            Employee.objects.filter(pk=employee.pk).update(created_at=start + timedelta(seconds=index // 4))
+
+    def setUp(self):
+        patcher = mock.patch.object(APIView, 'check_throttles', lambda self, request: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('reader'))
+
+    def walk(self, url, link, limit=200):
+        """Follow ``link`` from ``url`` to the end, returning every page's ids and the last response."""
+        pages = []
+        while url:
+            # A cursor that fails to move on would otherwise loop forever
+            self.assertLess(len(pages), limit, f'more than {limit} pages')
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages, data
+
+    def assertTraversal(self, path, expected, page_size):
+        pages, last = self.walk(f'{path}?pagination=keyset&page_size={page_size}', 'next')
+        forward = [row for page in pages for row in page]
+        self.assertEqual(forward, expected)
+        self.assertTrue(all(len(page) == page_size for page in pages[:-1]))
+
+        # Back from the last page, the previous links give the same pages in reverse
+        backward_pages, _ = self.walk(last['previous'], 'previous') if last['previous'] else ([], None)
+        backward = [row for page in reversed(backward_pages) for row in page]
+        self.assertEqual(backward + pages[-1], expected)
+
+    def test_employees_with_created_at_ties(self):
+        expected = [str(pk) for pk in Employee.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        for page_size in (1, 4, 7, len(expected), len(expected) + 1):
+            with self.subTest(page_size=page_size):
+                self.assertTraversal('/api/employees/', expected, page_size)
+
+    def test_attendance_with_date_ties(self):
+        expected = [str(pk) for pk in Attendance.objects.order_by('-date', '-id').values_list('id', flat=True)]
+        for page_size in (10, 13):
+            with self.subTest(page_size=page_size):
+                self.assertTraversal('/api/attendance/', expected, page_size)
+
+    def test_filtered_traversal(self):
+        department = self.employees[0].department
+        expected = [
+            str(pk) for pk in Employee.objects.filter(department=department)
+                .order_by('-created_at', '-id').values_list('id', flat=True)
+        ]
+        pages, _ = self.walk(f'/api/employees/?pagination=keyset&page_size=2&department={department}', 'next')
+        self.assertEqual([row for page in pages for row in page], expected)
+
+    def test_first_page_links(self):
+        data = self.client.get('/api/employees/?pagination=keyset&page_size=5').json()
+        self.assertIsNone(data['previous'])
+        self.assertNotIn('pagination=', data['next'])
+        self.assertIn('page_size=5', data['next'])
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        employee = Employee.objects.first()
+        cursors = [
+            'not a cursor',
+            base64.urlsafe_b64encode(b'not json').decode(),
+            cursor(['a list']),
+            cursor({'v': [str(employee.created_at)], 'r': False}),
+            cursor({'v': [str(employee.created_at), str(employee.pk), 'extra'], 'r': False}),
+            cursor({'v': ['yesterday', str(employee.pk)], 'r': False}),
+            cursor({'v': [str(employee.created_at), 'not-a-uuid'], 'r': False}),
+        ]
+        for value in cursors:
+            with self.subTest(cursor=value):
+                response = self.client.get('/api/employees/', {'cursor': value})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Invalid cursor.'})
@@ -0,0 +1,25 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from employees.management.commands.check_query_counts import check_route, count_routes
+
+from .utils import SeededTestCase
+
+
+class QueryCountTests(SeededTestCase):
+    """List pages cost the same number of queries at any size, with or without ``?expand=``."""
+
+    def test_query_counts_do_not_grow_with_page_size(self):
+        for name, path, params, paged in count_routes():
+            with self.subTest(route=name):
+                ok, counts = check_route(path, params, paged)
+                self.assertTrue(ok, f'{name}: {counts}')
+
+    # The defaults from .env.example; the test runner would otherwise add 'testserver'
+    @override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+    def test_command_runs_under_default_allowed_hosts(self):
+        output = StringIO()
+        call_command('check_query_counts', stdout=output)
+        self.assertIn('Query counts do not grow with page size', output.getvalue())
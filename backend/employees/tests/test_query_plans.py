@@ -0,0 +1,23 @@
+from django.db import connection
+
+from employees.management.commands.check_query_plans import capture_queries, explain, plan_routes, scan_allowed
+
+from .utils import SeededTestCase
+
+
+class QueryPlanTests(SeededTestCase):
+    """No list, filter or analytics query may scan a large table unless it reads all of it anyway."""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny, so make the planner use any index it can
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def test_no_unexpected_sequential_scans(self):
+        for name, path, params, allowed in plan_routes():
+            with self.subTest(route=name):
+                for sql in capture_queries(path, params):
+                    _, scanned = explain(sql)
+                    if not scan_allowed(sql, allowed):
+                        self.assertEqual(scanned, [], f'{name} scans {", ".join(scanned)}: {sql[:200]}')
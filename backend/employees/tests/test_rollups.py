@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from employees.factories import AttendanceFactory
+from employees.models import Attendance, AttendanceDailyRollup
+from employees.rollups import refresh_attendance_rollups
+
+from .utils import FIRST_ATTENDANCE_DATE, SeededTestCase
+
+
+def rollup_rows():
+    return sorted(
+        AttendanceDailyRollup.objects.values_list(
+            'date', 'department', 'status', 'record_count', 'hours_worked_total', 'late_minutes_total', 'late_count',
+        )
+    )
+
+
+class SingleRowRollupTests(SeededTestCase):
+    """Saving or deleting one attendance row keeps the rollups equal to a full recompute."""
+
+    def assertRollupsCurrent(self):
+        rows = rollup_rows()
+        refresh_attendance_rollups()
+        self.assertEqual(rows, rollup_rows())
+
+    def change(self, write):
+        """Run ``write`` and its on-commit refresh, returning the SQL it ran."""
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            write()
+        return [query['sql'] for query in queries.captured_queries]
+
+    def assertNoRecompute(self, statements):
+        grouped = [sql for sql in statements if 'GROUP BY' in sql]
+        self.assertEqual(grouped, [], 'a single-row write recomputed whole dates')
+
+    def test_create_on_a_new_date(self):
+        statements = self.change(lambda: AttendanceFactory(
+            employee=self.employees[0], date=FIRST_ATTENDANCE_DATE - timedelta(days=1), status='Late', late_minutes=15,
+        ))
+        self.assertNoRecompute(statements)
+        self.assertRollupsCurrent()
+
+    def test_create_on_an_existing_date(self):
+        employee = self.employees[0]
+        self.change(lambda: Attendance.objects.filter(employee=employee, date=FIRST_ATTENDANCE_DATE).delete())
+        statements = self.change(lambda: AttendanceFactory(employee=employee, date=FIRST_ATTENDANCE_DATE))
+        self.assertNoRecompute(statements)
+        self.assertRollupsCurrent()
+
+    def test_update_moves_values_between_rollup_rows(self):
+        record = Attendance.objects.filter(date=FIRST_ATTENDANCE_DATE).first()
+        other = next(employee for employee in self.employees if employee.department != record.employee.department)
+        record.employee = other
+        record.date = FIRST_ATTENDANCE_DATE + timedelta(days=30)
+        record.status = 'Late' if record.status != 'Late' else 'Present'
+        record.hours_worked = 7.5
+        record.late_minutes = 20
+        statements = self.change(record.save)
+        self.assertNoRecompute(statements)
+        self.assertRollupsCurrent()
+
+    def test_delete_removes_emptied_rollup_rows(self):
+        record = Attendance.objects.order_by('id').first()
+        lone = AttendanceFactory(employee=record.employee, date=FIRST_ATTENDANCE_DATE + timedelta(days=60))
+        refresh_attendance_rollups()
+        for instance in (record, lone):
+            statements = self.change(instance.delete)
+            self.assertNoRecompute(statements)
+            self.assertRollupsCurrent()
+        self.assertFalse(AttendanceDailyRollup.objects.filter(date=lone.date).exists())
+
+    def test_queryset_delete_recomputes_its_dates(self):
+        self.change(lambda: Attendance.objects.filter(date=FIRST_ATTENDANCE_DATE).delete())
+        self.assertFalse(AttendanceDailyRollup.objects.filter(date=FIRST_ATTENDANCE_DATE).exists())
+        self.assertRollupsCurrent()
+
+    def test_stale_rollups_fall_back_to_a_recompute(self):
+        record = Attendance.objects.order_by('id').first()
+        AttendanceDailyRollup.objects.filter(date=record.date).delete()
+        self.change(record.delete)
+        self.assertRollupsCurrent()
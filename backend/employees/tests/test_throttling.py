@@ -0,0 +1,108 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from employees.throttling import FileBackend, gcra
+
+from .utils import SeededTestCase
+
+NOW = 1_000_000.0
+
+
+class GcraTests(SimpleTestCase):
+    """10 requests a minute: each advances the arrival time by 6 seconds."""
+
+    def test_first_request_is_allowed(self):
+        self.assertEqual(gcra(None, NOW, 6, 60), (True, NOW + 6, 0.0))
+
+    def test_past_arrival_time_starts_from_now(self):
+        self.assertEqual(gcra(NOW - 600, NOW, 6, 60), (True, NOW + 6, 0.0))
+
+    def test_burst_up_to_the_rate_then_denied(self):
+        tat = None
+        for _ in range(10):
+            allowed, tat, wait = gcra(tat, NOW, 6, 60)
+            self.assertTrue(allowed)
+        self.assertEqual(tat, NOW + 60)
+        self.assertEqual(gcra(tat, NOW, 6, 60), (False, None, 6))
+        # A denied request does not move the arrival time, and the wait shrinks as time passes
+        self.assertEqual(gcra(tat, NOW + 4, 6, 60), (False, None, 2))
+        self.assertEqual(gcra(tat, NOW + 6, 6, 60), (True, NOW + 66, 0.0))
+
+    def test_weighted_request(self):
+        allowed, tat, _ = gcra(None, NOW, 30, 60)
+        self.assertTrue(allowed)
+        self.assertEqual(gcra(tat, NOW, 30, 60), (True, NOW + 60, 0.0))
+        self.assertEqual(gcra(NOW + 60, NOW, 30, 60), (False, None, 30))
+
+    def test_cost_above_the_rate_is_never_allowed(self):
+        self.assertEqual(gcra(None, NOW, 120, 60), (False, None, 60))
+
+
+class FileBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.backend = FileBackend(os.path.join(directory.name, 'throttle.sqlite3'))
+        patcher = mock.patch('employees.throttling.time.time', return_value=NOW)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_denies_after_the_rate_with_the_wait(self):
+        for _ in range(10):
+            self.assertEqual(self.backend.acquire('user_1', 6, 60), (True, 0.0))
+        self.assertEqual(self.backend.acquire('user_1', 6, 60), (False, 6))
+        self.clock.return_value = NOW + 6
+        self.assertEqual(self.backend.acquire('user_1', 6, 60), (True, 0.0))
+
+    def test_keys_are_independent(self):
+        self.assertEqual(self.backend.acquire('user_1', 60, 60), (True, 0.0))
+        self.assertEqual(self.backend.acquire('user_1', 60, 60), (False, 60))
+        self.assertEqual(self.backend.acquire('user_2', 60, 60), (True, 0.0))
+
+    def test_state_is_shared_between_connections(self):
+        other = FileBackend(self.backend.path)
+        self.assertEqual(self.backend.acquire('user_1', 60, 60), (True, 0.0))
+        self.assertEqual(other.acquire('user_1', 60, 60), (False, 60))
+
+    def test_cost_above_the_rate_is_denied(self):
+        self.assertEqual(self.backend.acquire('user_1', 120, 60), (False, 60))
+
+
+class ThrottleScopeTests(SeededTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = FileBackend(os.path.join(directory.name, 'throttle.sqlite3'))
+        patcher = mock.patch('employees.throttling.get_backend', return_value=backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('throttled'))
+
+    def test_exports_cost_five_requests(self):
+        # Costing 5 of 10 a minute, two exports pass and the third waits
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/export/employees/').status_code, 200)
+        response = self.client.get('/api/export/employees/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_bulk_writes_do_not_use_up_the_standard_rate(self):
+        employee = self.employees[0]
+        row = {
+            'first_name': 'Renamed', 'last_name': employee.last_name, 'email': employee.email,
+            'gender': employee.gender, 'age': employee.age, 'department': employee.department,
+            'position': employee.position, 'salary': employee.salary, 'hire_date': str(employee.hire_date),
+            'performance_score': str(employee.performance_score),
+        }
+        for _ in range(10):
+            self.assertEqual(self.client.post('/api/employees/bulk/', [row], format='json').status_code, 200)
+        self.assertEqual(self.client.post('/api/employees/bulk/', [row], format='json').status_code, 429)
+        for _ in range(10):
+            self.assertEqual(self.client.get('/api/employees/').status_code, 200)
+        self.assertEqual(self.client.get('/api/employees/').status_code, 429)
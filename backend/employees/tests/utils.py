@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+from factory.random import reseed_random
+
+from employees.cohorts import refresh_hire_cohorts
+from employees.factories import AttendanceFactory, EmployeeFactory, PerformanceReviewFactory
+from employees.rollups import refresh_attendance_rollups
+from employees.snapshots import refresh_department_stats, refresh_gender_distribution
+
+# A private cache, so tests neither read nor bump the data version of a running server
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'employees-tests'}}
+
+SEED = 20240101
+EMPLOYEES = 30
+ATTENDANCE_PER_EMPLOYEE = 3
+FIRST_ATTENDANCE_DATE = date(2024, 1, 1)
+
+
+def seed_data():
+    """A few dozen employees with attendance and reviewed-by-colleague reviews, plus the derived tables."""
+    reseed_random(SEED)
+    employees = EmployeeFactory.create_batch(EMPLOYEES)
+    for index, employee in enumerate(employees):
+        for day in range(ATTENDANCE_PER_EMPLOYEE):
+            AttendanceFactory(employee=employee, date=FIRST_ATTENDANCE_DATE + timedelta(days=day))
+        PerformanceReviewFactory(employee=employee, reviewer=employees[(index + 1) % len(employees)])
+
+    refresh_department_stats()
+    refresh_gender_distribution()
+    refresh_attendance_rollups()
+    refresh_hire_cohorts()
+    return employees
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SeededTestCase(TestCase):
+    """Runs against the data from :func:`seed_data`, created once per class."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Run the refreshes the saves schedule, or they would leak into the first test that commits
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.employees = seed_data()
@@ -0,0 +1,181 @@
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+# memory (per process), file (an SQLite file shared by the workers of one
+# host) or redis (any Redis-compatible server shared across hosts)
+THROTTLE_BACKEND = getattr(settings, 'THROTTLE_BACKEND', 'file')
+THROTTLE_LOCATION = getattr(settings, 'THROTTLE_LOCATION', None)
+# Requests to these URL names use up this many requests' worth of the rate
+THROTTLE_COSTS = getattr(settings, 'THROTTLE_COSTS', {})
+# Share of file backend checks that also purge expired keys
+PURGE_PROBABILITY = 0.001
+
+
+class MemoryBackend:
+    """Per-process state; only correct with a single worker."""
+
+    def __init__(self, location=None):
+        self._lock = threading.Lock()
+        self._tats = {}
+
+    def acquire(self, key, increment, period):
+        now = time.monotonic()
+        with self._lock:
+            allowed, tat, wait = gcra(self._tats.get(key), now, increment, period)
+            if allowed:
+                self._tats[key] = tat
+            if len(self._tats) > 100_000:
+                self._tats = {name: value for name, value in self._tats.items() if value > now}
+        return allowed, wait
+
+
+class FileBackend:
+    """State in an SQLite file, so every worker process on the host shares it.
+
+    Each check is one short write transaction on a per-thread connection.
+    """
+
+    def __init__(self, location=None):
+        self.path = location or os.path.join(settings.BASE_DIR, 'throttle.sqlite3')
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Losing the last few checks in a power cut is fine for rate limits
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID')
+            self._local.connection = connection
+        return connection
+
+    def acquire(self, key, increment, period):
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tat FROM throttle WHERE key = ?', (key,)).fetchone()
+            allowed, tat, wait = gcra(row[0] if row else None, now, increment, period)
+            if allowed:
+                connection.execute('INSERT OR REPLACE INTO throttle (key, tat) VALUES (?, ?)', (key, tat))
+            if random.random() < PURGE_PROBABILITY:
+                connection.execute('DELETE FROM throttle WHERE tat < ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, wait
+
+
+# GCRA in one round trip; the server's clock keeps every host consistent
+REDIS_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local increment = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then tat = now end
+local new_tat = tat + increment
+if new_tat - now > period then
+    return {0, tostring(new_tat - now - period)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class RedisBackend:
+    """State in Redis (or a compatible server), shared by every host."""
+
+    def __init__(self, location=None):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('THROTTLE_BACKEND=redis needs the redis package.')
+        self.client = redis.Redis.from_url(location or 'redis://localhost:6379/2')
+        self.script = self.client.register_script(REDIS_SCRIPT)
+
+    def acquire(self, key, increment, period):
+        allowed, wait = self.script(keys=[f'throttle:{key}'], args=[increment, period])
+        return bool(allowed), float(wait)
+
+
+BACKENDS = {'memory': MemoryBackend, 'file': FileBackend, 'redis': RedisBackend}
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    if THROTTLE_BACKEND not in BACKENDS:
+        raise ImproperlyConfigured(f"THROTTLE_BACKEND must be one of: {', '.join(BACKENDS)}.")
+    return BACKENDS[THROTTLE_BACKEND](THROTTLE_LOCATION)
+
+
+def gcra(tat, now, increment, period):
+    """Generic cell rate algorithm: a token bucket stored as one timestamp.
+
+    ``tat`` is the theoretical arrival time: when the bucket would be full
+    again. A request advances it by ``increment`` and is allowed while it
+    stays within ``period`` of now. Returns ``(allowed, new tat, wait)``.
+    """
+    tat = max(tat or now, now) + increment
+    if tat - now > period:
+        return False, None, tat - now - period
+    return True, tat, 0.0
+
+
+def request_cost(request, view):
+    match = getattr(request, 'resolver_match', None)
+    name = match.url_name if match else None
+    if name in THROTTLE_COSTS:
+        return THROTTLE_COSTS[name]
+    return getattr(view, 'throttle_cost', 1)
+
+
+class SharedRateThrottle(throttling.SimpleRateThrottle):
+    """Rate throttle with constant state per key in a backend shared by all workers.
+
+    Requests are weighted by :func:`request_cost`, so a rate of ``10/minute``
+    admits ten requests of cost 1 or two of cost 5. Throttling fails open:
+    if the backend is unavailable, requests are let through and logged.
+    """
+    _wait = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        # A request costing more than the whole rate could never pass
+        cost = min(request_cost(request, view), self.num_requests)
+        try:
+            allowed, self._wait = get_backend().acquire(self.key, cost * self.duration / self.num_requests, self.duration)
+        except Exception:
+            logger.exception('Throttle backend unavailable; allowing the request')
+            return True
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(SharedRateThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SharedRateThrottle, throttling.UserRateThrottle):
+    pass
@@ -7,6 +7,7 @@ router = DefaultRouter()
 router.register(r'employees', views.EmployeeViewSet)
 router.register(r'attendance', views.AttendanceViewSet)
 router.register(r'performance-reviews', views.PerformanceReviewViewSet)
+router.register(r'jobs', views.JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -15,5 +16,13 @@ urlpatterns = [
     path('analytics/age-distribution/', views.AgeDistributionView.as_view(), name='age-distribution'),
     path('analytics/gender-distribution/', views.GenderDistributionView.as_view(), name='gender-distribution'),
     path('analytics/tenure-distribution/', views.TenureDistributionView.as_view(), name='tenure-distribution'),
-    path('export/employees/', views.export_employees_csv, name='export-employees'),
+    path('analytics/headcount/', views.HeadcountView.as_view(), name='headcount'),
+    path('analytics/cohort-retention/', views.CohortRetentionView.as_view(), name='cohort-retention'),
+    path('analytics/attendance/', views.AttendanceTrendView.as_view(), name='attendance-trend'),
+    path('analytics/review-scorecard/', views.ReviewScorecardView.as_view(), name='review-scorecard'),
+    path('analytics/query/', views.AnalyticsQueryView.as_view(), name='analytics-query'),
+    path('analytics/dashboard/', views.AnalyticsDashboardView.as_view(), name='analytics-dashboard'),
+    path('export/employees/', views.export_employees, name='export-employees'),
+    path('export/attendance/', views.export_attendance, name='export-attendance'),
+    path('export/performance-reviews/', views.export_performance_reviews, name='export-performance-reviews'),
 ]
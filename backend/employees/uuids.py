@@ -0,0 +1,49 @@
+import secrets
+import threading
+import time
+import uuid
+
+# Version 7 layout (RFC 9562): 48-bit Unix milliseconds, 4-bit version,
+# 12-bit rand_a, 2-bit variant, 62-bit rand_b
+MAX_COUNTER = 0xFFF
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def _build(ms, rand_a, rand_b):
+    return uuid.UUID(int=(ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | rand_a << 64 | 0b10 << 62 | rand_b)
+
+
+def uuid7():
+    """A time-ordered version-7 UUID; keys from one process strictly increase.
+
+    Within a millisecond ``rand_a`` is a counter (RFC 9562 method 1) seeded
+    from random bits, so keys created back to back stay in order. When it
+    overflows, or the clock steps back, the timestamp of the previous key is
+    carried forward instead.
+    """
+    global _last_ms, _counter
+    ms = time.time_ns() // 1_000_000
+    with _lock:
+        if ms > _last_ms:
+            # Leave headroom below the counter's limit
+            _counter = secrets.randbits(11)
+            _last_ms = ms
+        else:
+            _counter += 1
+            if _counter > MAX_COUNTER:
+                _last_ms += 1
+                _counter = secrets.randbits(11)
+        ms, counter = _last_ms, _counter
+    return _build(ms, counter, secrets.randbits(62))
+
+
+def uuid7_at(moment):
+    """A version-7 UUID for the aware datetime ``moment``, with random low bits."""
+    return _build(int(moment.timestamp() * 1000), secrets.randbits(12), secrets.randbits(62))
+
+
+def is_uuid7(value):
+    return uuid.UUID(str(value)).version == 7
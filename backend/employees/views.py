@@ -1,16 +1,50 @@
 
-from django.db.models import Count, Avg, F, Case, When, Value, IntegerField, Q
+from django.db.models import Count, Avg, F, Case, When, Value, IntegerField
 from django.utils import timezone
-from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from django.utils.http import http_date
+from rest_framework import mixins, viewsets, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Employee, Attendance, PerformanceReview
+from .bulk import AttendanceBulkUpsert, EmployeeBulkUpsert, NDJSONParser, bulk_delete, payload_rows
+from .caching import versioned_cache
+from .cohorts import (
+    DEFAULT_COHORTS,
+    DEFAULT_HEADCOUNT_PERIODS,
+    MAX_TENURE_YEARS,
+    cohort_retention,
+    ensure_cohorts,
+    headcount,
+    parse_as_of,
+    parse_cohort_params,
+    tenure_distribution,
+)
+from .columnstore import get_store, parse_query_params, run_query
+from .dashboard import run_panels, server_timing
+from .encoders import FastListMixin
+from .exports import (
+    ATTENDANCE_COLUMNS,
+    EMPLOYEE_COLUMNS,
+    PERFORMANCE_REVIEW_COLUMNS,
+    export_response,
+)
+from .histograms import count_buckets, parse_edges, range_buckets, ranges_from_edges
+from .jobs import delete_job_file, job_file_response, submit_job
+from .models import (
+    Employee,
+    Attendance,
+    PerformanceReview,
+    DepartmentStatsSnapshot,
+    GenderDistributionSnapshot,
+    Job,
+)
+from .pagination import KeysetPaginationMixin
+from .rollups import department_trend, employee_trend, parse_trend_params
 from .serializers import (
     EmployeeSerializer, 
     AttendanceSerializer, 
@@ -19,202 +53,425 @@ from .serializers import (
     SalaryDistributionSerializer,
     AgeDistributionSerializer,
     GenderDistributionSerializer,
-    TenureDistributionSerializer
+    TenureDistributionSerializer,
+    AttendanceTrendSerializer,
+    ReviewScorecardSerializer,
+    AnalyticsQuerySerializer,
+    HeadcountSerializer,
+    CohortRetentionSerializer,
+    JobSerializer,
+    JobCreateSerializer,
 )
+from .scorecards import parse_scorecard_params, review_scorecard
+from .search import EmployeeSearchFilter
+from .snapshots import ensure_snapshot
+from .throttling import UserRateThrottle
+
+# Bulk ingestion: POST upserts and DELETE removes a JSON array or NDJSON stream
+class BulkMixin:
+    bulk_upsert_class = None
+
+    def get_throttles(self):
+        # Bulk writes have their own budget, so they never use up the reads'
+        if self.action == 'bulk':
+            return [BulkRateThrottle()]
+        return super().get_throttles()
+
+    @action(detail=False, methods=['post', 'delete'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        rows = payload_rows(request.data)
+        if request.method == 'DELETE':
+            return Response(bulk_delete(self.get_queryset().model, rows))
+        return Response(self.bulk_upsert_class().run(rows))
+
+# Nested employee summaries: ?expand=employee,reviewer
+class ExpandMixin:
+    expand_query_param = 'expand'
+
+    def get_expand(self):
+        value = self.request.query_params.get(self.expand_query_param) if self.request else None
+        if not value:
+            return ()
+        expand = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        allowed = getattr(self.serializer_class, 'expandable_fields', {})
+        unknown = [name for name in expand if name not in allowed]
+        if unknown:
+            raise ValidationError({
+                self.expand_query_param: f"Cannot expand: {', '.join(unknown)}. Choose from: {', '.join(allowed)}."
+            })
+        return expand
+
+    def get_queryset(self):
+        # A join per expanded relation keeps the query count independent of the page size
+        queryset = super().get_queryset()
+        expand = self.get_expand()
+        return queryset.select_related(*expand) if expand else queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
 
 # Custom throttle classes
 class StandardRateThrottle(UserRateThrottle):
+    scope = 'standard'
+    rate = '10/minute'
+
+class BulkRateThrottle(UserRateThrottle):
+    scope = 'bulk'
     rate = '10/minute'
 
 # Employee ViewSet with pagination and filtering
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(BulkMixin, FastListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all().order_by('-created_at')
     serializer_class = EmployeeSerializer
+    bulk_upsert_class = EmployeeBulkUpsert
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
     pagination_class = PageNumberPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    keyset_ordering = ('-created_at', '-id')
+    filter_backends = [DjangoFilterBackend, EmployeeSearchFilter]
     filterset_fields = ['department', 'position', 'gender']
-    search_fields = ['first_name', 'last_name', 'email', 'department', 'position']
-
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        search_term = self.request.query_params.get('search', None)
-        if search_term:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search_term) |
-                Q(last_name__icontains=search_term) |
-                Q(position__icontains=search_term) |
-                Q(department__icontains=search_term)
-            )
-        return queryset
 
 # Attendance ViewSet
-class AttendanceViewSet(viewsets.ModelViewSet):
-    queryset = Attendance.objects.all()
+class AttendanceViewSet(BulkMixin, ExpandMixin, FastListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
+    queryset = Attendance.objects.all().order_by('-date', '-id')
     serializer_class = AttendanceSerializer
+    bulk_upsert_class = AttendanceBulkUpsert
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-date', '-id')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['employee', 'date', 'status']
 
 # Performance Review ViewSet
-class PerformanceReviewViewSet(viewsets.ModelViewSet):
-    queryset = PerformanceReview.objects.all()
+class PerformanceReviewViewSet(ExpandMixin, FastListMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
+    queryset = PerformanceReview.objects.all().order_by('-review_date', '-id')
     serializer_class = PerformanceReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-review_date', '-id')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['employee', 'review_date']
 
 # Analytics views
+def snapshot_response(data, refreshed_at):
+    """Respond with snapshot data, reporting its freshness in ``Last-Modified``."""
+    response = Response(data)
+    if refreshed_at is not None:
+        response['Last-Modified'] = http_date(refreshed_at.timestamp())
+    return response
+
 class DepartmentStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
     
-    def get(self, request):
-        stats = Employee.objects.values('department') \
+    def get_stats(self):
+        # Served from the pre-aggregated snapshot, see employees.snapshots
+        refreshed_at = ensure_snapshot(DepartmentStatsSnapshot)
+        stats = DepartmentStatsSnapshot.objects.values('department') \
             .annotate(
-                employeeCount=Count('id'),
-                averageSalary=Avg('salary'),
-                averagePerformance=Avg('performance_score')
+                employeeCount=F('employee_count'),
+                averageSalary=F('average_salary'),
+                averagePerformance=F('average_performance')
             ) \
             .order_by('department')
         
         serializer = DepartmentStatSerializer(stats, many=True)
-        return Response(serializer.data)
+        return serializer.data, refreshed_at
 
-class SalaryDistributionView(APIView):
+    @versioned_cache
+    def get(self, request):
+        return snapshot_response(*self.get_stats())
+
+class RangeDistributionView(APIView):
+    """Base view for histograms over a numeric field.
+
+    All buckets are counted in a single query. Callers may replace the default
+    ranges with ``?edges=a,b,c``, which yields ``a..b-1``, ``b..c-1`` and ``c+``.
+    """
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
-    
+    serializer_class = None
+    field = None
+    ranges = []
+    label = '{min}-{max}'
+    open_label = '{min}+'
+    gap = 1
+    # Inclusive (low, high) limits on ?edges= values, or None
+    edge_bounds = None
+
+    def get_ranges(self, request):
+        edges = request.query_params.get('edges')
+        if not edges:
+            return self.ranges
+        return ranges_from_edges(parse_edges(edges, self.edge_bounds), self.label, self.open_label, self.gap)
+
+    def get_buckets(self, ranges):
+        return range_buckets(self.field, ranges)
+
+    def get_distribution(self, ranges):
+        buckets = self.get_buckets(ranges)
+        distribution = count_buckets(Employee.objects.all(), buckets)
+
+        serializer = self.serializer_class(distribution, many=True)
+        return serializer.data
+
+    @versioned_cache
     def get(self, request):
-        # Define salary ranges
-        ranges = [
-            {'min': 0, 'max': 50000, 'label': '$0-$50K'},
-            {'min': 50001, 'max': 75000, 'label': '$50K-$75K'},
-            {'min': 75001, 'max': 100000, 'label': '$75K-$100K'},
-            {'min': 100001, 'max': 150000, 'label': '$100K-$150K'},
-            {'min': 150001, 'max': 1000000, 'label': '$150K+'}
-        ]
-        
-        # Calculate distributions using Django ORM
-        distribution = []
-        for range_info in ranges:
-            count = Employee.objects.filter(
-                salary__gte=range_info['min'],
-                salary__lte=range_info['max']
-            ).count()
-            
-            distribution.append({
-                'range': range_info['label'],
-                'count': count
-            })
+        return Response(self.get_distribution(self.get_ranges(request)))
+
+class SalaryDistributionView(RangeDistributionView):
+    serializer_class = SalaryDistributionSerializer
+    field = 'salary'
+    label = '${min}-${max}'
+    open_label = '${min}+'
+    ranges = [
+        {'min': 0, 'max': 50000, 'label': '$0-$50K'},
+        {'min': 50001, 'max': 75000, 'label': '$50K-$75K'},
+        {'min': 75001, 'max': 100000, 'label': '$75K-$100K'},
+        {'min': 100001, 'max': 150000, 'label': '$100K-$150K'},
+        {'min': 150001, 'max': 1000000, 'label': '$150K+'}
+    ]
+
+class AgeDistributionView(RangeDistributionView):
+    serializer_class = AgeDistributionSerializer
+    field = 'age'
+    ranges = [
+        {'min': 20, 'max': 29, 'label': '20-29'},
+        {'min': 30, 'max': 39, 'label': '30-39'},
+        {'min': 40, 'max': 49, 'label': '40-49'},
+        {'min': 50, 'max': 59, 'label': '50-59'},
+        {'min': 60, 'max': 100, 'label': '60+'}
+    ]
+
+class GenderDistributionView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [StandardRateThrottle]
+    
+    def get_distribution(self):
+        refreshed_at = ensure_snapshot(GenderDistributionSnapshot)
+        distribution = GenderDistributionSnapshot.objects.values('gender', 'count') \
+            .order_by('gender')
         
-        serializer = SalaryDistributionSerializer(distribution, many=True)
+        serializer = GenderDistributionSerializer(distribution, many=True)
+        return serializer.data, refreshed_at
+
+    @versioned_cache
+    def get(self, request):
+        return snapshot_response(*self.get_distribution())
+
+class TenureDistributionView(RangeDistributionView):
+    """Tenure histogram on ``?as_of=`` (default today), summed from the hire
+    cohorts (see employees.cohorts) rather than counted over employees."""
+    serializer_class = TenureDistributionSerializer
+    field = 'hire_date'
+    label = '{min}-{max} Years'
+    open_label = '{min}+ Years'
+    gap = 0
+    edge_bounds = (0, MAX_TENURE_YEARS)
+    # Tenure ranges (in years)
+    ranges = [
+        {'min': 0, 'max': 1, 'label': '<1 Year'},
+        {'min': 1, 'max': 2, 'label': '1-2 Years'},
+        {'min': 2, 'max': 5, 'label': '2-5 Years'},
+        {'min': 5, 'max': 10, 'label': '5-10 Years'},
+        {'min': 10, 'max': 100, 'label': '10+ Years'}
+    ]
+
+    def get_distribution(self, ranges, as_of=None):
+        ensure_cohorts()
+        distribution = tenure_distribution(ranges, as_of or timezone.now().date())
+
+        serializer = self.serializer_class(distribution, many=True)
+        return serializer.data
+
+    @versioned_cache
+    def get(self, request):
+        return Response(self.get_distribution(self.get_ranges(request), parse_as_of(request.query_params)))
+
+class HeadcountView(APIView):
+    """Headcount at the end of each month, quarter or year with its hires and departures."""
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [StandardRateThrottle]
+
+    @versioned_cache
+    def get(self, request):
+        params = parse_cohort_params(request.query_params, 'interval', 'month', DEFAULT_HEADCOUNT_PERIODS)
+        ensure_cohorts()
+
+        serializer = HeadcountSerializer(headcount(**params), many=True)
         return Response(serializer.data)
 
-class AgeDistributionView(APIView):
+class CohortRetentionView(APIView):
+    """Retention curves of hire cohorts: how many of each are still employed after every later period."""
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
-    
+
+    @versioned_cache
     def get(self, request):
-        # Define age ranges
-        ranges = [
-            {'min': 20, 'max': 29, 'label': '20-29'},
-            {'min': 30, 'max': 39, 'label': '30-39'},
-            {'min': 40, 'max': 49, 'label': '40-49'},
-            {'min': 50, 'max': 59, 'label': '50-59'},
-            {'min': 60, 'max': 100, 'label': '60+'}
-        ]
-        
-        # Calculate distributions
-        distribution = []
-        for range_info in ranges:
-            count = Employee.objects.filter(
-                age__gte=range_info['min'],
-                age__lte=range_info['max']
-            ).count()
-            
-            distribution.append({
-                'range': range_info['label'],
-                'count': count
-            })
-        
-        serializer = AgeDistributionSerializer(distribution, many=True)
+        params = parse_cohort_params(request.query_params, 'cohort', 'year', DEFAULT_COHORTS)
+        ensure_cohorts()
+
+        serializer = CohortRetentionSerializer(cohort_retention(**params), many=True)
         return Response(serializer.data)
 
-class GenderDistributionView(APIView):
+class AttendanceTrendView(APIView):
+    """Attendance time series bucketed by day, week or month.
+
+    Department series are read from the daily rollups (see employees.rollups);
+    ``?group_by=employee&employee=<id>`` aggregates one employee's records.
+    """
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
-    
+
+    @versioned_cache
     def get(self, request):
-        distribution = Employee.objects.values('gender') \
-            .annotate(count=Count('id')) \
-            .order_by('gender')
-        
-        serializer = GenderDistributionSerializer(distribution, many=True)
+        params = parse_trend_params(request.query_params)
+        if params['group_by'] == 'employee':
+            trend = employee_trend(params['interval'], params['start'], params['end'], params['employee'])
+        else:
+            trend = department_trend(
+                params['interval'], params['start'], params['end'],
+                department=params['department'],
+            )
+
+        serializer = AttendanceTrendSerializer(trend, many=True)
         return Response(serializer.data)
 
-class TenureDistributionView(APIView):
+class ReviewScorecardView(APIView):
+    """Performance review scorecards: per-group score statistics, the trend per
+    review period and reviewer calibration, each from one grouped query."""
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [StandardRateThrottle]
-    
+
+    @versioned_cache
     def get(self, request):
-        today = timezone.now().date()
-        
-        # Define tenure ranges (in years)
-        ranges = [
-            {'min': 0, 'max': 1, 'label': '<1 Year'},
-            {'min': 1, 'max': 2, 'label': '1-2 Years'},
-            {'min': 2, 'max': 5, 'label': '2-5 Years'},
-            {'min': 5, 'max': 10, 'label': '5-10 Years'},
-            {'min': 10, 'max': 100, 'label': '10+ Years'}
-        ]
-        
-        # Calculate distributions
-        distribution = []
-        for range_info in ranges:
-            min_date = today.replace(year=today.year - range_info['max'])
-            max_date = today.replace(year=today.year - range_info['min'])
-            
-            count = Employee.objects.filter(
-                hire_date__gt=min_date,
-                hire_date__lte=max_date
-            ).count()
-            
-            distribution.append({
-                'range': range_info['label'],
-                'count': count
-            })
-        
-        serializer = TenureDistributionSerializer(distribution, many=True)
+        scorecard = review_scorecard(**parse_scorecard_params(request.query_params))
+
+        serializer = ReviewScorecardSerializer(scorecard)
+        return Response(serializer.data)
+
+class AnalyticsDashboardView(APIView):
+    """All five dashboard analytics in one response.
+
+    The panels run concurrently, each on its own connection, so the response
+    takes about as long as the slowest panel rather than their sum.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [StandardRateThrottle]
+
+    def get_panels(self):
+        return {
+            'departments': lambda: DepartmentStatsView().get_stats()[0],
+            'salaryDistribution': lambda: SalaryDistributionView().get_distribution(SalaryDistributionView.ranges),
+            'ageDistribution': lambda: AgeDistributionView().get_distribution(AgeDistributionView.ranges),
+            'genderDistribution': lambda: GenderDistributionView().get_distribution()[0],
+            'tenureDistribution': lambda: TenureDistributionView().get_distribution(TenureDistributionView.ranges),
+        }
+
+    @versioned_cache
+    def get(self, request):
+        data, timings = run_panels(self.get_panels())
+        response = Response(data)
+        response['Server-Timing'] = server_timing(timings)
+        return response
+
+class AnalyticsQueryView(APIView):
+    """Ad-hoc group-by queries over employees, answered from the in-memory column store.
+
+    ``?group_by=department,age_range&measures=count,avg:salary,p90:performance_score``
+    groups by up to three dimensions. Range dimensions use the buckets of the
+    matching distribution view, or ``?<age|salary|tenure>_edges=a,b,c``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [StandardRateThrottle]
+    range_views = {
+        'age_range': AgeDistributionView,
+        'salary_range': SalaryDistributionView,
+        'tenure_range': TenureDistributionView,
+    }
+
+    def get_ranges(self, request, group_by):
+        ranges = {}
+        for dimension in group_by:
+            view = self.range_views.get(dimension)
+            if view is None:
+                continue
+            edges = request.query_params.get(f"{dimension.split('_')[0]}_edges")
+            ranges[dimension] = ranges_from_edges(parse_edges(edges, view.edge_bounds), view.label, view.open_label, view.gap) \
+                if edges else view.ranges
+        return ranges
+
+    @versioned_cache
+    def get(self, request):
+        params = parse_query_params(request.query_params)
+        result = run_query(get_store(), ranges=self.get_ranges(request, params['group_by']), **params)
+
+        serializer = AnalyticsQuerySerializer(result)
         return Response(serializer.data)
 
-# Export CSV view
+# Export views (CSV, NDJSON, Arrow, Parquet)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 @throttle_classes([StandardRateThrottle])
-def export_employees_csv(request):
-    import csv
-    from django.http import HttpResponse
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="employees.csv"'
-    
-    writer = csv.writer(response)
-    # Write header
-    writer.writerow([
-        'ID', 'First Name', 'Last Name', 'Email', 'Gender', 'Age',
-        'Department', 'Position', 'Salary', 'Hire Date', 'Performance Score'
-    ])
-    
-    # Write data
-    employees = Employee.objects.all()
-    for employee in employees:
-        writer.writerow([
-            employee.id, employee.first_name, employee.last_name,
-            employee.email, employee.gender, employee.age,
-            employee.department, employee.position, employee.salary,
-            employee.hire_date, employee.performance_score
-        ])
-    
-    return response
+def export_employees(request):
+    return export_response(request, EmployeeViewSet, EMPLOYEE_COLUMNS, 'employees')
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([StandardRateThrottle])
+def export_attendance(request):
+    return export_response(request, AttendanceViewSet, ATTENDANCE_COLUMNS, 'attendance')
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([StandardRateThrottle])
+def export_performance_reviews(request):
+    return export_response(request, PerformanceReviewViewSet, PERFORMANCE_REVIEW_COLUMNS, 'performance_reviews')
+
+# Background exports and reports, run by the run_jobs command
+class JobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """``POST`` queues an export or report; poll the job, then fetch ``download/``.
+
+    A request identical to a job that is still queued or running returns
+    that job (``200``) instead of queueing another (``202``).
+    """
+    queryset = Job.objects.all().order_by('-created_at')
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Users see their own jobs; staff see everyone's
+        queryset = super().get_queryset()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(created_by=self.request.user)
+
+    def get_throttles(self):
+        # Queueing work is limited like the synchronous exports; polling is not
+        if self.action == 'create':
+            return [StandardRateThrottle()]
+        return super().get_throttles()
+
+    def create(self, request):
+        serializer = JobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job, created = submit_job(serializer.validated_data['kind'], serializer.validated_data['params'], request.user)
+        data = JobSerializer(job, context={'request': request}).data
+        return Response(data, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+    def destroy(self, request, pk=None):
+        job = self.get_object()
+        if job.status == Job.RUNNING:
+            return Response({'detail': 'Running jobs cannot be deleted.'}, status=status.HTTP_409_CONFLICT)
+        # Only a job still queued can be claimed meanwhile; the conditional delete loses that race safely
+        if not Job.objects.filter(id=job.id, status=job.status).delete()[0]:
+            return Response({'detail': 'The job has started.'}, status=status.HTTP_409_CONFLICT)
+        delete_job_file(job)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['get'], url_path='download', url_name='download')
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED:
+            return Response({'detail': f'The job is {job.status}.'}, status=status.HTTP_409_CONFLICT)
+        return job_file_response(request, job)